@@ -0,0 +1,244 @@
+"""
+Arsip ZIP video untuk download_folder_videos dan download_all_videos.
+
+ZIP ditulis sambil dikirim (StreamingHttpResponse): zipfile menulis ke
+penampung kecil yang dikosongkan setiap potongan file dibaca, jadi memori
+tetap sekitar COPY_CHUNK_SIZE berapa pun besar arsipnya dan byte pertama
+langsung terkirim. Video disimpan tanpa kompresi (ZIP_STORED, mp4 sudah
+terkompresi); karena output tidak bisa di-seek, ukuran dan CRC tiap entry
+ditulis di data descriptor setelah isinya. Entry atau arsip di atas 4 GB
+otomatis memakai Zip64.
+
+Folder yang sering di-download juga disimpan sebagai file ZIP di
+archives/ (FolderArchive) oleh job worker KIND_ARCHIVE. Arsip dicatat
+bersama signature: hash nama, ukuran, dan mtime_ns setiap video anggota.
+Arsip hanya dipakai selama signature-nya sama dengan file di disk saat ini,
+jadi trim, upload ulang, atau video baru di folder membuat arsip dibangun
+ulang, sedangkan folder yang tidak berubah tidak pernah di-zip dua kali.
+File arsip dikirim dengan Content-Length dan dukungan Range (lihat
+media.py). Total ukuran arsip dibatasi FOLDER_ARCHIVE_MAX_BYTES dengan
+eviction LRU berdasarkan last_accessed_at. Lihat juga
+`python manage.py build_folder_archives`.
+"""
+import hashlib
+import logging
+import os
+import zipfile
+
+from django.conf import settings
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .locks import atomic_output
+from .models import FolderArchive, Video
+
+logger = logging.getLogger(__name__)
+
+COPY_CHUNK_SIZE = 1024 * 1024
+ARCHIVE_DIR = 'archives'
+# Naikkan jika isi/format arsip berubah, supaya arsip lama dibangun ulang
+ARCHIVE_VERSION = '1'
+
+
+def safe_name(name, extra=''):
+    """ Nama folder/file yang aman untuk path di dalam ZIP """
+    return "".join(c for c in name if c.isalnum() or c in (' ', '-', '_') + tuple(extra)).strip()
+
+
+class _ZipSink:
+    """ Tujuan tulis ZipFile yang tidak bisa di-seek; isinya diambil per potongan oleh iter_zip """
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_zip(entries, chunk_size=COPY_CHUNK_SIZE):
+    """
+    Yield potongan byte ZIP untuk entries: iterable (path absolut, nama di ZIP).
+    File yang tidak bisa dibuka dilewati.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED, allowZip64=True, strict_timestamps=False) as zip_file:
+        for path, arcname in entries:
+            try:
+                # stat dulu: jika gagal belum ada file yang terbuka
+                zinfo = zipfile.ZipInfo.from_file(path, arcname, strict_timestamps=False)
+                src = open(path, 'rb')
+            except OSError as e:
+                logger.warning(f"Lewati {arcname} di ZIP: {e}")
+                continue
+            zinfo.compress_type = zipfile.ZIP_STORED
+            # file_size dari stat menentukan apakah header entry memakai Zip64
+            with src, zip_file.open(zinfo, 'w') as dest:
+                for chunk in iter(lambda: src.read(chunk_size), b''):
+                    dest.write(chunk)
+                    yield sink.take()
+            data = sink.take()
+            if data:
+                yield data
+    # Central directory (dan record Zip64 jika perlu) ditulis saat ZipFile ditutup
+    yield sink.take()
+
+
+def video_entries(videos):
+    """
+    (path, nama di ZIP) untuk setiap video yang filenya ada, dikelompokkan per
+    folder: <folder>/<judul>. Video dibaca per batch dari database.
+    """
+    rows = videos.order_by('folder_name', 'sequence', 'title').values_list('title', 'file', 'folder_name')
+    for title, file_name, folder_name in rows.iterator(chunk_size=2000):
+        if not file_name:
+            continue
+        path = os.path.join(settings.MEDIA_ROOT, file_name)
+        if not os.path.isfile(path):
+            continue
+        # Hanya video, tanpa metadata
+        yield path, f"{safe_name(folder_name or 'uncategorized')}/{safe_name(title, '.')}"
+
+
+def archive_path(folder_name):
+    """ Path arsip relatif terhadap MEDIA_ROOT; hash mencegah bentrok nama folder setelah safe_name """
+    digest = hashlib.sha1(folder_name.encode()).hexdigest()[:8]
+    return os.path.join(ARCHIVE_DIR, f"{safe_name(folder_name) or 'folder'}-{digest}.zip")
+
+
+def folder_entries(folder_name):
+    return list(video_entries(Video.objects.filter(folder_name=folder_name)))
+
+
+def archive_signature(entries):
+    """ Hash isi arsip dari (path, nama di ZIP) tanpa membaca file: nama, ukuran, dan mtime """
+    digest = hashlib.sha256(ARCHIVE_VERSION.encode())
+    for path, arcname in entries:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        digest.update(f"|{arcname}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def get_fresh_archive(folder_name):
+    """
+    FolderArchive folder ini jika filenya ada dan isinya masih sama dengan
+    video di disk (hit dicatat), None jika belum ada atau sudah basi.
+    """
+    archive = FolderArchive.objects.filter(folder_name=folder_name).first()
+    if archive is None:
+        return None
+    if not os.path.exists(os.path.join(settings.MEDIA_ROOT, archive.path)):
+        archive.delete()
+        return None
+    if archive.signature != archive_signature(folder_entries(folder_name)):
+        return None
+    FolderArchive.objects.filter(id=archive.id).update(hits=F('hits') + 1, last_accessed_at=timezone.now())
+    return archive
+
+
+def build_folder_archive(folder_name, progress=None):
+    """
+    Tulis ZIP folder ke archives/ jika arsip yang ada sudah basi. Return
+    dict hasil; 'skipped' True jika arsip lama masih sesuai.
+    """
+    entries = folder_entries(folder_name)
+    if not entries:
+        return {'folder_name': folder_name, 'file_count': 0, 'skipped': True}
+    # Signature dihitung sebelum file dibaca: jika file berubah saat zip ditulis,
+    # arsip dianggap basi pada request berikutnya dan dibangun ulang
+    signature = archive_signature(entries)
+    archive = FolderArchive.objects.filter(folder_name=folder_name).first()
+    relative_path = archive_path(folder_name)
+    full_path = os.path.join(settings.MEDIA_ROOT, relative_path)
+    if archive and archive.signature == signature and os.path.exists(os.path.join(settings.MEDIA_ROOT, archive.path)):
+        return {'folder_name': folder_name, 'file_count': archive.file_count, 'size_bytes': archive.size_bytes, 'skipped': True}
+
+    total = sum(os.path.getsize(path) for path, _ in entries)
+    max_bytes = getattr(settings, 'FOLDER_ARCHIVE_MAX_BYTES', 0)
+    if max_bytes and total > max_bytes:
+        # Lebih besar dari seluruh budget: tidak disimpan, download tetap di-stream
+        return {'folder_name': folder_name, 'file_count': len(entries), 'size_bytes': 0, 'skipped': True, 'over_budget': True}
+
+    written = 0
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    with atomic_output(full_path) as tmp_path:
+        with open(tmp_path, 'wb') as output:
+            for chunk in iter_zip(entries):
+                output.write(chunk)
+                written += len(chunk)
+                if progress:
+                    progress(min(written / max(total, 1), 0.99))
+
+    archive, _ = FolderArchive.objects.update_or_create(
+        folder_name=folder_name,
+        defaults={
+            'path': relative_path,
+            'signature': signature,
+            'size_bytes': os.path.getsize(full_path),
+            'file_count': len(entries),
+            'built_at': timezone.now(),
+            'last_accessed_at': timezone.now(),
+        },
+    )
+    logger.info(f"Arsip {folder_name}: {len(entries)} video, {archive.size_bytes / 1024 / 1024:.1f} MB")
+
+    if max_bytes and archive.size_bytes > max_bytes:
+        # Header ZIP membuat arsip sedikit melewati budget
+        _delete_archives([archive])
+        return {'folder_name': folder_name, 'file_count': len(entries), 'size_bytes': 0, 'skipped': False, 'over_budget': True}
+    enforce_budget(keep_ids={archive.id})
+    return {'folder_name': folder_name, 'file_count': len(entries), 'size_bytes': archive.size_bytes, 'skipped': False}
+
+
+def _delete_archives(archives):
+    deleted_files = 0
+    deleted_bytes = 0
+    for archive in archives:
+        full_path = os.path.join(settings.MEDIA_ROOT, archive.path)
+        if os.path.exists(full_path):
+            # Download yang sedang berjalan tetap bisa membaca file yang sudah dibuka
+            os.remove(full_path)
+        deleted_files += 1
+        deleted_bytes += archive.size_bytes
+        archive.delete()
+    return deleted_files, deleted_bytes
+
+
+def total_size():
+    return FolderArchive.objects.aggregate(total=Sum('size_bytes'))['total'] or 0
+
+
+def enforce_budget(max_bytes=None, keep_ids=(), dry_run=False):
+    """ Hapus arsip paling lama tidak di-download sampai total ukuran <= max_bytes """
+    if max_bytes is None:
+        max_bytes = getattr(settings, 'FOLDER_ARCHIVE_MAX_BYTES', 0)
+    if not max_bytes:
+        return 0, 0
+
+    excess = total_size() - max_bytes
+    victims = []
+    if excess > 0:
+        for archive in FolderArchive.objects.exclude(id__in=keep_ids).order_by('last_accessed_at'):
+            victims.append(archive)
+            excess -= archive.size_bytes
+            if excess <= 0:
+                break
+
+    if dry_run:
+        return len(victims), sum(archive.size_bytes for archive in victims)
+
+    evicted_files, evicted_bytes = _delete_archives(victims)
+    if evicted_files:
+        logger.info(f"Arsip folder: {evicted_files} file ({evicted_bytes} bytes) di-evict")
+    return evicted_files, evicted_bytes
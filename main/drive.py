@@ -0,0 +1,214 @@
+"""
+Download video dari Google Drive untuk ingest Excel (upload_file).
+
+Semua download berjalan di thread pool dengan satu requests.Session
+bersama (koneksi dipakai ulang). Tiap file di-stream per chunk ke file
+sementara di folder tujuan lalu di-rename (atomic_output), jadi memori
+per download konstan dan file setengah jadi tidak pernah terlihat di
+videos/<folder>. Error jaringan, 429 dan 5xx diulang dengan backoff.
+
+Alamat Drive diambil dari settings.GOOGLE_DRIVE_BASE_URL, sehingga ingest
+bisa diuji dengan server HTTP lokal pengganti Drive, misalnya:
+
+    python -m http.server  # + GOOGLE_DRIVE_BASE_URL=http://127.0.0.1:8000
+"""
+import hashlib
+import logging
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from html import unescape
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from .locks import atomic_output
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# File lebih kecil dari ini hampir pasti halaman error, bukan video
+MIN_VIDEO_BYTES = 1000
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 60
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class DriveDownloadError(Exception):
+    """ Download gagal; retryable=False jika mengulang tidak akan membantu (404, bukan video, dll) """
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+def drive_base_url():
+    return getattr(settings, 'GOOGLE_DRIVE_BASE_URL', 'https://drive.google.com').rstrip('/')
+
+
+def extract_file_id(link):
+    """ File ID dari berbagai format link Google Drive, atau None """
+    # Pattern 1: /d/FILE_ID/view atau /d/FILE_ID
+    match = re.search(r'/d/([a-zA-Z0-9_-]+)', link)
+    if match:
+        return match.group(1)
+    # Pattern 2: id=FILE_ID
+    match = re.search(r'[?&]id=([a-zA-Z0-9_-]+)', link)
+    if match:
+        return match.group(1)
+    # Pattern 3: Link berakhir dengan file ID
+    match = re.search(r'([a-zA-Z0-9_-]{25,})/?$', link)
+    if match:
+        return match.group(1)
+    return None
+
+
+def download_url(file_id):
+    return f"{drive_base_url()}/uc?export=download&id={file_id}"
+
+
+def make_session(pool_size):
+    """ Session bersama untuk semua thread download, pool koneksi seukuran jumlah worker """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _confirm_request(html_content):
+    """
+    URL dan parameter dari halaman konfirmasi Drive ("file terlalu besar untuk
+    dipindai virus"). Return (url, params) atau None.
+    """
+    form_match = re.search(r'<form[^>]*action="([^"]*)"[^>]*>(.*?)</form>', html_content, re.S)
+    if not form_match:
+        return None
+    action = unescape(form_match.group(1))
+    params = dict(re.findall(r'<input[^>]*type="hidden"[^>]*name="([^"]*)"[^>]*value="([^"]*)"', form_match.group(2)))
+    url = action if action.startswith('http') else f"{drive_base_url()}{action}"
+    return url, params
+
+
+def _open_download(session, file_id):
+    """ Response stream berisi file video, melewati halaman konfirmasi jika ada """
+    response = session.get(download_url(file_id), stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+    if response.status_code in RETRY_STATUSES:
+        response.close()
+        raise DriveDownloadError(f"HTTP {response.status_code}")
+    if response.status_code != 200:
+        response.close()
+        raise DriveDownloadError(f"Gagal download video (status {response.status_code})", retryable=False)
+
+    if 'text/html' in response.headers.get('content-type', ''):
+        # Drive meminta konfirmasi untuk file besar
+        confirm = _confirm_request(response.text)
+        response.close()
+        if not confirm:
+            raise DriveDownloadError(
+                "Response berisi HTML, file mungkin tidak dibagikan publik", retryable=False,
+            )
+        url, params = confirm
+        response = session.get(url, params=params, stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+        if response.status_code != 200 or 'text/html' in response.headers.get('content-type', ''):
+            status = response.status_code
+            response.close()
+            raise DriveDownloadError(
+                f"Confirmation download juga gagal (status {status})",
+                retryable=status in RETRY_STATUSES,
+            )
+    return response
+
+
+def download_file(session, file_id, target_path, retries=3, backoff=1.0):
+    """
+    Download satu file Drive ke target_path (absolut). File hanya muncul di
+    target_path jika download selesai utuh. Return (ukuran byte, sha256).
+    """
+    attempt = 0
+    while True:
+        try:
+            with atomic_output(target_path) as tmp_path:
+                response = _open_download(session, file_id)
+                hasher = hashlib.sha256()
+                size = 0
+                with response, open(tmp_path, 'wb') as f:
+                    for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+                        hasher.update(chunk)
+                        size += len(chunk)
+                expected = response.headers.get('content-length')
+                if expected and not response.headers.get('content-encoding') and int(expected) != size:
+                    raise DriveDownloadError(f"Download terputus ({size}/{expected} byte)")
+                if size < MIN_VIDEO_BYTES:
+                    raise DriveDownloadError(
+                        f"File terlalu kecil ({size} bytes), kemungkinan bukan video", retryable=False,
+                    )
+            return size, hasher.hexdigest()
+        except (requests.RequestException, DriveDownloadError) as e:
+            retryable = getattr(e, 'retryable', True)
+            if not retryable or attempt >= retries:
+                raise DriveDownloadError(str(e), retryable=False) from e
+            delay = backoff * 2 ** attempt
+            attempt += 1
+            logger.warning(f"Download {file_id} gagal ({e}), coba lagi ({attempt}/{retries}) dalam {delay:.0f}s")
+            time.sleep(delay)
+
+
+class DownloadProgress:
+    """ Jumlah file dan byte yang sudah selesai, aman dipakai dari banyak thread """
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.bytes = 0
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def update(self, size=0, failed=False):
+        with self.lock:
+            self.done += 1
+            self.failed += int(failed)
+            self.bytes += size
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        return (
+            f"{self.done}/{self.total} file ({self.failed} gagal), "
+            f"{self.bytes / 1024 / 1024:.1f} MB, {self.bytes / 1024 / 1024 / max(elapsed, 1e-6):.1f} MB/s"
+        )
+
+
+def download_many(tasks, workers=None, retries=None, progress=None):
+    """
+    Download banyak file sekaligus. tasks: list dict berisi 'file_id' dan
+    'target_path'. Yield (task, (size, sha256), None) atau (task, None, error)
+    sesuai urutan selesai, supaya pemanggil bisa menyimpan hasil di thread-nya
+    sendiri (mis. tulis DB). progress dipanggil dengan DownloadProgress.
+    """
+    workers = max(1, workers or getattr(settings, 'DRIVE_DOWNLOAD_WORKERS', 4))
+    retries = getattr(settings, 'DRIVE_DOWNLOAD_RETRIES', 3) if retries is None else retries
+    state = DownloadProgress(len(tasks))
+    session = make_session(workers)
+
+    with session, ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(download_file, session, task['file_id'], task['target_path'], retries): task
+            for task in tasks
+        }
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                result = future.result()
+            except DriveDownloadError as e:
+                state.update(failed=True)
+                result, error = None, e
+            else:
+                state.update(size=result[0])
+                error = None
+            if progress:
+                progress(state)
+            yield task, result, error
@@ -0,0 +1,370 @@
+"""
+Proses merge dan trim video yang dipakai oleh worker job (lihat jobs.py).
+
+Fungsi di sini tidak bergantung pada request, sehingga bisa dijalankan di
+luar thread HTTP. Error dilaporkan dengan VideoProcessingError.
+"""
+import logging
+import multiprocessing
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections
+
+from . import merge_cache
+from .locks import atomic_output, atomic_outputs, file_lock
+from .media_tools import EncodeProgressLogger, cut_video, merge_video_files, probe_video, probe_video_packets
+from .metadata import get_metadata, to_probe_info
+from .models import Video, title_sequence
+
+logger = logging.getLogger(__name__)
+
+# Selisih (detik) end_time dengan durasi video n yang dianggap trim tanpa perubahan
+NOOP_TRIM_TOLERANCE = 0.001
+
+
+class VideoProcessingError(Exception):
+    """ Error proses video yang pesannya aman ditampilkan ke user """
+
+    def __init__(self, message, status=500):
+        super().__init__(message)
+        self.status = status
+
+
+def _report(progress, value):
+    if progress:
+        progress(value)
+
+
+def _progress_logger(progress, start=0.0, end=1.0):
+    if not progress:
+        return 'bar'
+    return EncodeProgressLogger(progress, start, end)
+
+
+def encoder_thread_budget():
+    """ Jumlah thread encoder untuk satu job trim """
+    budget = getattr(settings, 'VIDEO_ENCODE_THREADS', None)
+    if not budget:
+        budget = (os.cpu_count() or 1) // max(1, getattr(settings, 'VIDEO_WORKER_PROCESSES', 1))
+    return max(1, budget)
+
+
+# Progress tiap bagian trim di process anak, diisi lewat initializer pool
+_part_progress = None
+
+
+def _init_part_progress(shared_progress):
+    global _part_progress
+    _part_progress = shared_progress
+
+
+def _cut_part_in_process(slot, source_path, start_time, end_time, output_path, cut_options):
+    """ Dijalankan di process anak: hanya menulis file, tidak menyentuh database """
+    def report(value):
+        _part_progress[slot] = value
+
+    mode = cut_video(
+        source_path, start_time, end_time, output_path,
+        progress_logger=EncodeProgressLogger(report), **cut_options,
+    )
+    _part_progress[slot] = 1.0
+    return mode
+
+
+def _cut_parts_parallel(cuts, progress, workers, start, end):
+    """ Menulis potongan bersamaan, masing-masing di process sendiri (maksimal workers process) """
+    context = multiprocessing.get_context('fork')
+    shared_progress = context.Array('d', len(cuts))
+    # Koneksi DB tidak boleh dipakai bersama oleh process hasil fork
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_part_progress,
+        initargs=(shared_progress,),
+    ) as pool:
+        futures = [
+            pool.submit(_cut_part_in_process, slot, *cut)
+            for slot, cut in enumerate(cuts)
+        ]
+        pending = futures
+        while pending:
+            _, pending = wait(pending, timeout=0.5)
+            _report(progress, start + (end - start) * sum(shared_progress) / len(cuts))
+        return [future.result() for future in futures]
+
+
+def _cut_parts_serial(cuts, progress, start, end):
+    modes = []
+    step = (end - start) / len(cuts)
+    for index, (source_path, part_start, part_end, output_path, cut_options) in enumerate(cuts):
+        progress_start = start + step * index
+        modes.append(cut_video(
+            source_path, part_start, part_end, output_path,
+            progress_logger=_progress_logger(progress, progress_start, progress_start + step),
+            **cut_options,
+        ))
+        _report(progress, progress_start + step)
+    return modes
+
+
+def parallel_workers(count, thread_budget):
+    """ Jumlah process untuk count potongan: paralel hanya jika tiap process kebagian minimal satu thread """
+    if count < 2 or thread_budget < 2 or not getattr(settings, 'VIDEO_TRIM_PARALLEL', True):
+        return 1
+    return min(count, thread_budget)
+
+
+def cut_parts(cuts, workers=1, progress=None, start=0.1, end=0.95):
+    """
+    Tulis beberapa potongan. cuts: list (source_path, start_time, end_time,
+    output_path, cut_options). workers > 1: potongan ditulis bersamaan di
+    process terpisah. Progress dilaporkan di rentang start..end. Return list mode.
+    """
+    if workers > 1:
+        return _cut_parts_parallel(cuts, progress, workers, start, end)
+    return _cut_parts_serial(cuts, progress, start, end)
+
+
+def get_next_video(video):
+    """
+    Cari video n+1 di folder yang sama, misal: "TVRI_SB_061119_0052.mp4" -> _0053.
+    Satu query lewat index (folder_name, sequence). Return (judul, Video atau None)
+    """
+    sequence = video.sequence if video.sequence is not None else title_sequence(video.title)
+    if sequence is None:
+        return None, None
+    base_title = video.title.replace('.mp4', '').rsplit('_', 1)[0]
+    next_video_title = f"{base_title}_{sequence + 1:04d}.mp4"
+    if video.folder_name:
+        next_video = Video.objects.filter(folder_name=video.folder_name, sequence=sequence + 1).order_by('pk').first()
+    else:
+        # Data lama tanpa folder_name: cocokkan judul persis
+        next_video = Video.objects.filter(title=next_video_title).first()
+    return (next_video.title if next_video else next_video_title), next_video
+
+
+def merge_video_pair(video, progress=None):
+    """ Menggabungkan video dengan video selanjutnya (berdasarkan urutan nama) """
+    print(f"\n=== MERGE {video.title} ===")
+    next_video_title, next_video = get_next_video(video)
+    print(f"Looking for next video: {next_video_title}")
+
+    if not next_video:
+        print(f"✅ Tidak ada video berikutnya, mengembalikan video asli: {video.title}")
+        return {
+            'message': 'Video asli (tidak ada video berikutnya untuk merge).',
+            'merged_video_url': video.file.url,
+            'is_single_video': True,
+        }
+
+    # Dapatkan path file kedua video
+    path1 = video.file.path
+    path2 = next_video.file.path
+
+    if not os.path.exists(path1):
+        raise VideoProcessingError(f'File video pertama tidak ditemukan: {path1}', status=404)
+    if not os.path.exists(path2):
+        raise VideoProcessingError(f'File video kedua tidak ditemukan: {path2}', status=404)
+
+    logger.info(f"Merging {path1} + {path2}")
+    _report(progress, 0.05)
+
+    # Nama file merge = hash isi input, pasangan yang sama dipakai ulang lintas request
+    key = merge_cache.cache_key(path1, path2)
+    merged_path = merge_cache.cache_path(key)
+    full_merged_path = default_storage.path(merged_path)
+    os.makedirs(os.path.dirname(full_merged_path), exist_ok=True)
+
+    pair_name = f"{video.title.replace('.mp4', '')}_{next_video_title.replace('.mp4', '')}"
+    lock_path = os.path.join(settings.MEDIA_ROOT, 'edited_videos', '.locks', f"{pair_name}.lock")
+
+    # Single-flight: merge kedua untuk pasangan yang sama menunggu merge pertama
+    with file_lock(lock_path):
+        entry = merge_cache.get_entry(key)
+        if entry:
+            print(f"✅ Merge diambil dari cache: {merged_path}")
+            video_n_duration = entry.video_n_duration
+        else:
+            input_mtimes = (os.path.getmtime(path1), os.path.getmtime(path2))
+            # Info stream dari metadata tersimpan, tidak perlu probe ulang
+            metadata1, metadata2 = get_metadata(video), get_metadata(next_video)
+            print(f"📹 Writing merged video file: {full_merged_path}")
+            with atomic_output(full_merged_path) as tmp_merged_path:
+                video_n_duration, merge_mode = merge_video_files(
+                    path1, path2, tmp_merged_path,
+                    progress_logger=_progress_logger(progress, 0.05, 0.95),
+                    info1=to_probe_info(metadata1) if metadata1 else None,
+                    info2=to_probe_info(metadata2) if metadata2 else None,
+                )
+                # Cek trim yang terjadi selama merge, hasil basi tidak di-rename
+                if (os.path.getmtime(path1), os.path.getmtime(path2)) != input_mtimes:
+                    raise VideoProcessingError('Video berubah selama proses merge, silakan muat ulang', status=409)
+            merge_cache.store_entry(key, path1, path2, video_n_duration)
+            print(f"✅ Video merge completed successfully (mode: {merge_mode})")
+
+        # Simpan path dan durasi video n ke model
+        video.merged_video_path = merged_path
+        video.video_n_duration = video_n_duration  # Simpan durasi untuk marker
+        video.save(update_fields=['merged_video_path', 'video_n_duration'])
+        print(f"✅ Video n duration (marker position): {video_n_duration} seconds")
+
+    return {
+        'message': 'Video berhasil digabung.',
+        'merged_video_url': default_storage.url(merged_path),
+        'video_n_duration': video_n_duration,  # Kirim durasi untuk marker di timeline
+        'is_single_video': False,
+    }
+
+
+def _write_trim_parts(video, next_video, next_title, start_time, end_time, progress):
+    """ Tulis bagian trim ke file n (dan remainder ke n+1). Return True jika n+1 ikut ditimpa """
+    # Gunakan merged video jika ada, kalau tidak ada gunakan video asli
+    if video.merged_video_path and default_storage.exists(video.merged_video_path):
+        # Gunakan merged video (n+n+1)
+        source_path = default_storage.path(video.merged_video_path)
+        print(f"Using merged video as source: {source_path}")
+    else:
+        # Fallback ke video asli di raw_videos
+        source_path = os.path.join(settings.MEDIA_ROOT, 'raw_videos', video.folder_name, video.title)
+        print(f"Using raw video as source: {source_path}")
+
+    if not os.path.exists(source_path):
+        raise VideoProcessingError(f'Source video not found: {source_path}', status=404)
+
+    try:
+        source_info = probe_video(source_path)
+    except (OSError, subprocess.CalledProcessError, ValueError) as e:
+        raise VideoProcessingError(f'Tidak bisa membaca source video: {e}', status=500)
+    source_duration = source_info['duration']
+    print(f"Source video duration: {source_duration} seconds")
+
+    # Validasi waktu
+    if end_time > source_duration:
+        end_time = source_duration - 0.01
+        print(f"Adjusted end_time to {end_time}")
+
+    if start_time >= end_time:
+        raise VideoProcessingError('Invalid time range', status=400)
+
+    has_remainder = next_video is not None and end_time < source_duration
+    packets = None
+    if getattr(settings, 'VIDEO_TRIM_MODE', 'smart') == 'smart':
+        try:
+            packets = probe_video_packets(source_path)
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.warning(f"Gagal membaca keyframe, trim dengan re-encode penuh: {e}")
+
+    # BAGIAN 1: Trim video (start_time sampai end_time) → overwrite video n
+    # BAGIAN 2: Remainder (end_time sampai akhir) → overwrite video n+1
+    parts = [(start_time, end_time, video.file.path)]
+    if has_remainder:
+        parts.append((end_time, source_duration, next_video.file.path))
+    else:
+        if not next_video:
+            print(f"ℹ️ No next video found ({next_title})")
+        if end_time >= source_duration:
+            print("ℹ️ No remainder (trim ends at video end)")
+
+    # Budget thread encoder per job dibagi rata ke bagian yang ditulis bersamaan
+    thread_budget = encoder_thread_budget()
+    workers = parallel_workers(len(parts), thread_budget)
+    cut_options = {
+        'smart': packets is not None,
+        'info': source_info,
+        'packets': packets,
+        'threads': max(1, thread_budget // workers),
+    }
+    for part_start, part_end, output_path in parts:
+        print(f"Writing {part_start:.3f}-{part_end:.3f} to {output_path}")
+
+    # Semua bagian ditulis ke file sementara; n dan n+1 baru diganti jika semuanya berhasil
+    try:
+        with atomic_outputs([output_path for _, _, output_path in parts]) as tmp_paths:
+            cuts = [
+                (source_path, part_start, part_end, tmp_path, cut_options)
+                for (part_start, part_end, _), tmp_path in zip(parts, tmp_paths)
+            ]
+            modes = cut_parts(cuts, workers=workers, progress=progress)
+    except Exception as e:
+        logger.exception(f"Trim gagal untuk {source_path}")
+        raise VideoProcessingError(f'Trim gagal, video tidak diubah: {e}')
+    print(f"✅ Trim parts written (mode: {', '.join(modes)})")
+    return has_remainder
+
+
+def trim_video_pair(video, start_time, end_time, progress=None):
+    """
+    Algoritma Trim Video:
+    1. Yang ditampilkan adalah merge dari video n dan n+1
+    2. Saat trim:
+       - Bagian yang di-keep (start_time sampai end_time) → overwrite video n
+       - Bagian remainder (end_time sampai akhir merge) → overwrite video n+1
+       - VIDEO_TRIM_MODE='smart': GOP utuh di-copy, hanya GOP tepi yang di-encode
+         (fallback ke re-encode penuh jika codec/hasil tidak memungkinkan)
+       - Kedua bagian ditulis bersamaan di process terpisah; file n dan n+1 hanya
+         diganti jika keduanya berhasil
+    3. Hapus merged_video_path dari video n
+    4. Saat next, akan merge video n+1 (baru) dengan video n+2
+    """
+    print(f"\n=== TRIM VIDEO {video.title} ===")
+    print(f"Start time: {start_time}, End time: {end_time}")
+
+    next_title, next_video = get_next_video(video)
+    has_merged_file = bool(video.merged_video_path and default_storage.exists(video.merged_video_path))
+
+    if next_video and not has_merged_file:
+        # Editor memakai merge virtual, cek apakah merge fisik benar-benar dibutuhkan
+        metadata = get_metadata(video)
+        if not metadata:
+            raise VideoProcessingError(f'Tidak bisa membaca video: {video.file.path}', status=404)
+        if start_time <= 0 and abs(end_time - metadata.duration) < NOOP_TRIM_TOLERANCE:
+            # Batas potong sama dengan batas n / n+1 sekarang, tidak ada yang berubah
+            print("ℹ️ Trim tepat di batas video n, tidak ada yang perlu di-encode")
+            return {
+                'message': 'Video trimmed and saved successfully.',
+                'trimmed_video_url': video.file.url,
+            }
+
+        print("Membuat merge fisik n + n+1 untuk sumber trim...")
+        merge_video_pair(video, progress=(lambda value: progress(value * 0.1)) if progress else None)
+        video.refresh_from_db(fields=['merged_video_path', 'video_n_duration'])
+
+    if video.merged_video_path and default_storage.exists(video.merged_video_path):
+        # File merge tidak boleh di-evict dari cache selama dibaca
+        with merge_cache.reading(video.merged_video_path):
+            has_remainder = _write_trim_parts(video, next_video, next_title, start_time, end_time, progress)
+    else:
+        has_remainder = _write_trim_parts(video, next_video, next_title, start_time, end_time, progress)
+
+    remainder_written = has_remainder
+    if remainder_written and next_video.merged_video_path:
+        # Hapus merged_video_path dari video n+1 jika ada
+        print("Clearing merged_video_path from video n+1")
+        next_video.merged_video_path = None
+        next_video.save(update_fields=['merged_video_path'])
+
+    # File n dan n+1 sudah ditimpa, hasil merge yang dibuat dari keduanya sudah basi
+    rewritten = [video.file.path] + ([next_video.file.path] if remainder_written else [])
+    merge_cache.invalidate_sources(rewritten)
+    # Probe ulang sekarang supaya pembukaan editor berikutnya tidak perlu probe
+    get_metadata(video)
+    if remainder_written:
+        get_metadata(next_video)
+    video.refresh_from_db(fields=['merged_video_path'])
+
+    # BAGIAN 3: Hapus merged_video_path dari video n agar next time merge ulang
+    if video.merged_video_path:
+        print("Clearing merged_video_path from video n")
+        video.merged_video_path = None
+        video.save(update_fields=['merged_video_path'])
+
+    print("✅ Trim completed successfully")
+    return {
+        'message': 'Video trimmed and saved successfully.',
+        'trimmed_video_url': video.file.url,
+    }
@@ -0,0 +1,311 @@
+"""
+Edit decision list (EDL): trim non-destruktif yang di-render belakangan.
+
+Trim tidak langsung menimpa file video n dan n+1. Isi tiap video dicatat
+sebagai daftar potongan (EditDecision) dari file sumber yang tidak pernah
+diubah, biasanya raw_videos/<folder>/<title>. Editor memutar potongan ini
+lewat offset waktu (merge virtual), dan file video baru ditulis saat render:
+per video saat dibutuhkan (download, merge fisik) atau sekaligus per folder
+(`python manage.py render_edits`). Trim berulang di satu folder jadi cukup
+satu kali encode per segmen, bukan per trim.
+"""
+import logging
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from . import merge_cache
+from .editing import (
+    NOOP_TRIM_TOLERANCE, VideoProcessingError, cut_parts, encoder_thread_budget, get_next_video, parallel_workers,
+)
+from .locks import atomic_output, file_lock
+from .media_tools import concat_video_files, probe_video, probe_video_packets, try_faststart
+from .metadata import get_metadata
+from .models import EditDecision, Video
+from .proxies import proxy_url
+
+logger = logging.getLogger(__name__)
+
+# Potongan lebih pendek dari ini (detik) diabaikan
+MIN_SEGMENT_DURATION = 0.001
+# Salinan isi video sebelum EDL pertama, jika file video sudah berbeda dari raw
+BASE_DIR = '.edl'
+
+
+def edl_enabled():
+    return getattr(settings, 'VIDEO_TRIM_EDL', False)
+
+
+def _segment(source_path, source_in, source_out):
+    return {'source_path': source_path, 'source_in': source_in, 'source_out': source_out}
+
+
+def segments_duration(segments):
+    return sum(segment['source_out'] - segment['source_in'] for segment in segments)
+
+
+def get_segments(video):
+    """ Potongan penyusun video dari EditDecision, atau None jika video belum pernah di-trim lewat EDL """
+    decisions = list(video.edit_decisions.all())
+    if not decisions:
+        return None
+    return [_segment(d.source_path, d.source_in, d.source_out) for d in decisions]
+
+
+def _base_source(video):
+    """
+    File sumber untuk video yang belum punya EDL. Raw dipakai jika isinya
+    masih sama dengan file video; kalau sudah berbeda (trim destruktif lama),
+    file video di-hardlink ke raw_videos/<folder>/.edl/ supaya render nanti
+    tidak membaca file yang sedang ditimpa.
+    """
+    raw_path = os.path.join('raw_videos', video.folder_name or '', video.title)
+    full_raw_path = os.path.join(settings.MEDIA_ROOT, raw_path)
+    video_path = video.file.path
+    if os.path.exists(full_raw_path) and os.path.getsize(full_raw_path) == os.path.getsize(video_path):
+        return raw_path
+
+    stat = os.stat(video_path)
+    base_path = os.path.join(
+        'raw_videos', video.folder_name or '', BASE_DIR,
+        f"{os.path.splitext(video.title)[0]}_{stat.st_mtime_ns}.mp4",
+    )
+    full_base_path = os.path.join(settings.MEDIA_ROOT, base_path)
+    if not os.path.exists(full_base_path):
+        os.makedirs(os.path.dirname(full_base_path), exist_ok=True)
+        with atomic_output(full_base_path) as tmp_path:
+            try:
+                os.link(video_path, tmp_path)
+            except OSError:
+                shutil.copy2(video_path, tmp_path)
+    return base_path
+
+
+def current_segments(video, for_edit=False):
+    """
+    Isi video sekarang sebagai daftar potongan. Video tanpa EDL = satu potongan
+    utuh; dengan for_edit=True sumbernya file yang tidak akan ditimpa render.
+    """
+    segments = get_segments(video)
+    if segments is not None:
+        return segments
+    metadata = get_metadata(video)
+    if not metadata:
+        raise VideoProcessingError(f'Tidak bisa membaca video: {video.title}', status=404)
+    source_path = _base_source(video) if for_edit else video.file.name
+    return [_segment(source_path, 0.0, metadata.duration)]
+
+
+def slice_segments(segments, start_time, end_time):
+    """ Potongan untuk rentang [start_time, end_time) dari timeline gabungan segments """
+    result = []
+    offset = 0.0
+    for segment in segments:
+        length = segment['source_out'] - segment['source_in']
+        part_start = max(start_time, offset)
+        part_end = min(end_time, offset + length)
+        if part_end - part_start > MIN_SEGMENT_DURATION:
+            result.append(_segment(
+                segment['source_path'],
+                segment['source_in'] + part_start - offset,
+                segment['source_in'] + part_end - offset,
+            ))
+        offset += length
+    return result
+
+
+def _merge_neighbors(video):
+    """ Video n dan n-1, yang file merge-nya ikut berisi video ini (index folder_name, sequence) """
+    if video.sequence is None or not video.folder_name:
+        return Video.objects.filter(pk=video.pk)
+    return Video.objects.filter(folder_name=video.folder_name, sequence__in=[video.sequence, video.sequence - 1])
+
+
+def save_segments(video, segments):
+    """ Ganti EDL video dan tandai perlu render """
+    video.edit_decisions.all().delete()
+    EditDecision.objects.bulk_create([
+        EditDecision(
+            video=video, position=position, source_path=segment['source_path'],
+            source_in=segment['source_in'], source_out=segment['source_out'],
+        )
+        for position, segment in enumerate(segments)
+    ])
+    # File merge yang memuat isi lama video ini sudah tidak sesuai
+    _merge_neighbors(video).update(merged_video_path=None)
+    video.needs_render = True
+    video.merged_video_path = None
+    video.save(update_fields=['needs_render', 'merged_video_path'])
+
+
+def record_trim(video, start_time, end_time):
+    """
+    Trim non-destruktif, aturan sama dengan editing.trim_video_pair:
+    [start_time, end_time) dari gabungan n + n+1 menjadi isi video n, sisanya
+    (end_time sampai akhir) menjadi isi video n+1. Tidak ada encode.
+    """
+    logger.info(f"Trim (EDL) {video.title}: {start_time} - {end_time}")
+
+    next_title, next_video = get_next_video(video)
+    segments_n = current_segments(video, for_edit=True)
+    segments_next = current_segments(next_video, for_edit=True) if next_video else []
+    merged = segments_n + segments_next
+    total_duration = segments_duration(merged)
+
+    if end_time > total_duration:
+        end_time = total_duration - 0.01
+        logger.info(f"Trim (EDL) {video.title}: end_time disesuaikan ke {end_time}")
+    if start_time >= end_time:
+        raise VideoProcessingError('Invalid time range', status=400)
+
+    if start_time <= 0 and abs(end_time - segments_duration(segments_n)) < NOOP_TRIM_TOLERANCE:
+        logger.info(f"Trim (EDL) {video.title} tepat di batas video n, tidak ada yang berubah")
+    else:
+        with transaction.atomic():
+            save_segments(video, slice_segments(merged, start_time, end_time))
+            if next_video and end_time < total_duration:
+                save_segments(next_video, slice_segments(merged, end_time, total_duration))
+            elif not next_video:
+                logger.info(f"Trim (EDL) {video.title}: video berikutnya tidak ada ({next_title})")
+        logger.info(f"EDL tersimpan: {video.edit_decisions.count()} potongan untuk {video.title}")
+
+    return {
+        'message': 'Video trimmed and saved successfully.',
+        'trimmed_video_url': video.file.url,
+        'needs_render': video.needs_render,
+    }
+
+
+def preview_segments(video):
+    """
+    Segmen untuk editor: URL sumber beserta offset mulai/selesai di file
+    tersebut. Proxy resolusi rendah dipakai jika sudah ada (timestamp sama).
+    """
+    segments = []
+    for segment in current_segments(video):
+        url = proxy_url(segment['source_path'])
+        segments.append({
+            'title': video.title,
+            'url': url or default_storage.url(segment['source_path']),
+            'proxy': url is not None,
+            'start': segment['source_in'],
+            'end': segment['source_out'],
+            'duration': segment['source_out'] - segment['source_in'],
+        })
+    return segments
+
+
+def virtual_merge_info(video):
+    """
+    Merge virtual: daftar segmen n dan n+1 beserta durasinya, diputar berurutan
+    oleh editor tanpa encode dan tanpa file baru. Durasi dibaca dari EDL atau
+    metadata tersimpan. Video tanpa n+1 hanya dikembalikan jika punya EDL yang
+    belum di-render. Return None jika tidak bisa (file hilang atau probe gagal).
+
+    Sengaja berupa daftar segmen JSON, bukan playlist HLS/ffconcat: HLS butuh
+    segmen TS/fMP4 yang dipotong di keyframe (berarti remux per potongan),
+    sedangkan titik potong EDL ada di tengah GOP; m3u8 juga tidak diputar
+    Chrome/Firefox tanpa library tambahan dan ffconcat sama sekali tidak
+    diputar browser. Editor cukup memutar file sumber (atau proxy) lewat
+    offset waktu.
+    """
+    _, next_video = get_next_video(video)
+    if not next_video and not video.needs_render:
+        return None
+
+    try:
+        segments_n = preview_segments(video)
+        segments_next = preview_segments(next_video) if next_video else []
+    except VideoProcessingError as e:
+        logger.warning(f"Merge virtual tidak bisa dibuat untuk {video.title}: {e}")
+        return None
+
+    video_n_duration = sum(segment['duration'] for segment in segments_n)
+    return {
+        'mode': 'virtual',
+        'segments': segments_n + segments_next,
+        'video_n_duration': video_n_duration if next_video else None,
+        'total_duration': video_n_duration + sum(segment['duration'] for segment in segments_next),
+        'is_single_video': not next_video,
+    }
+
+
+def render_video(video, progress=None):
+    """ Tulis isi EDL video ke file video (sekali per segmen, setelah semua trim selesai) """
+    video.refresh_from_db(fields=['needs_render'])
+    decisions = list(video.edit_decisions.all())
+    if not video.needs_render or not decisions:
+        return {'message': 'Video sudah ter-render.', 'video_url': video.file.url}
+
+    logger.info(f"Render {video.title} ({len(decisions)} potongan)")
+    output_path = video.file.path
+    lock_path = os.path.join(settings.MEDIA_ROOT, 'edited_videos', '.locks', f"render_{video.title}.lock")
+    smart = getattr(settings, 'VIDEO_TRIM_MODE', 'smart') == 'smart'
+    thread_budget = encoder_thread_budget()
+    workers = parallel_workers(len(decisions), thread_budget)
+
+    with file_lock(lock_path):
+        with atomic_output(output_path) as tmp_output_path:
+            sources = [os.path.join(settings.MEDIA_ROOT, d.source_path) for d in decisions]
+            infos = {path: probe_video(path) for path in set(sources)}
+            first = decisions[0]
+            if (
+                len(decisions) == 1
+                and first.source_in <= MIN_SEGMENT_DURATION
+                and abs(first.source_out - infos[sources[0]]['duration']) <= MIN_SEGMENT_DURATION
+            ):
+                # Potongan = file sumber utuh, cukup disalin
+                shutil.copyfile(sources[0], tmp_output_path)
+                try_faststart(tmp_output_path)
+            else:
+                # Keyframe dibaca sekali per sumber untuk smart cut (copy GOP utuh, encode GOP tepi)
+                packets = {path: probe_video_packets(path) for path in set(sources)} if smart else {}
+                with tempfile.TemporaryDirectory(prefix='render_', dir=os.path.dirname(output_path)) as work_dir:
+                    parts = [os.path.join(work_dir, f"part{index}.mp4") for index in range(len(decisions))]
+                    cuts = [
+                        (source_path, decision.source_in, decision.source_out, part_path, {
+                            'smart': smart,
+                            'info': infos[source_path],
+                            'packets': packets.get(source_path),
+                            'threads': max(1, thread_budget // workers),
+                        })
+                        for decision, source_path, part_path in zip(decisions, sources, parts)
+                    ]
+                    # Potongan ditulis bersamaan di process terpisah (VIDEO_TRIM_PARALLEL), seperti trim
+                    modes = cut_parts(cuts, workers=workers, progress=progress, start=0.0, end=0.9)
+                    logger.info(f"Render {video.title}: {len(parts)} potongan, {workers} process ({', '.join(modes)})")
+                    if len(parts) == 1:
+                        os.replace(parts[0], tmp_output_path)
+                    else:
+                        concat_video_files(parts, tmp_output_path)
+
+        # Trim baru yang tercatat selama render tetap menunggu render berikutnya
+        with transaction.atomic():
+            current_ids = list(video.edit_decisions.values_list('id', flat=True))
+            if current_ids == [d.id for d in decisions]:
+                Video.objects.filter(id=video.id).update(needs_render=False)
+
+    merge_cache.invalidate_sources([output_path])
+    get_metadata(video)
+    logger.info(f"Render selesai: {output_path}")
+    return {'message': 'Video berhasil di-render.', 'video_url': video.file.url}
+
+
+def pending_videos(folder_name=None):
+    videos = Video.objects.filter(needs_render=True).order_by('folder_name', 'title')
+    if folder_name:
+        videos = videos.filter(folder_name=folder_name)
+    return videos
+
+
+def render_pending(folder_name=None):
+    """ Render semua video yang EDL-nya belum ditulis ke file. Return jumlah video """
+    count = 0
+    for video in pending_videos(folder_name):
+        render_video(video)
+        count += 1
+    return count
@@ -0,0 +1,266 @@
+"""
+Pembaca Excel anotasi untuk ingest (upload_file), streaming per baris.
+
+Nilai sel dibaca openpyxl mode read_only (memori tetap kecil berapa pun
+jumlah baris). Hanya hyperlink kolom A (link Drive) yang dibaca sendiri:
+worksheet read_only tidak mem-parse <hyperlinks> sama sekali, sedangkan
+mode biasa memuat seluruh sheet ke memori hanya untuk cell.hyperlink.
+Tabel <hyperlinks> ada setelah <sheetData>, jadi XML sheet aktif (dicari
+dari xl/workbook.xml dan relationship-nya) cukup di-scan sampai
+</sheetData> tanpa mem-parse barisnya, dan hanya ekornya yang dibaca.
+Hasilnya ExcelRow per baris berisi nilai kolom yang sudah dinormalisasi
+beserta link Drive kolom A.
+"""
+import posixpath
+import re
+import zipfile
+from typing import NamedTuple
+from xml.etree import ElementTree
+from xml.sax.saxutils import unescape
+
+import openpyxl
+from openpyxl.utils import column_index_from_string
+
+# Nama field ExcelRow -> judul kolom di Excel
+COLUMNS = {
+    'title': 'Nama Data',
+    'automated_transcript': 'Transkripsi Suara secara Otomatis oleh Sistem',
+    'transcript_alignment': 'Penyelarasan Suara/Teks Transkripsi dan Gerakan Bahasa Isyarat',
+    'sibi_sentence': 'Kalimat yang Diperagakan',
+    'potential_problem': 'Potensi Masalah',
+    'comment': 'Keterangan Annotator',
+    'username': 'Nama Annotator',
+    'alignment': 'Hasil Alignment (NEW)',
+}
+REQUIRED_COLUMNS = ('Nama Data',)
+# Nilai sel yang dianggap kosong (termasuk sisa konversi pandas lama)
+EMPTY_VALUES = ('', 'nan', 'None')
+
+SCAN_CHUNK_SIZE = 1024 * 1024
+CELL_REF_RE = re.compile(r'^\$?([A-Z]+)\$?(\d+)$')
+# Prefix namespace opsional, mis. <x:hyperlink> di file dari tool selain Excel
+SHEET_DATA_END_RE = re.compile(rb'</(?:[\w.-]+:)?sheetData\s*>')
+# Byte terakhir chunk sebelumnya yang ikut di-scan, untuk tag yang terpotong di batas chunk
+TAG_OVERLAP = 64
+HYPERLINK_TAG_RE = re.compile(r'<(?:[\w.-]+:)?hyperlink\b([^>]*)>')
+ATTRIBUTE_RE = re.compile(r'''([\w:.-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')''')
+# Akhiran tipe relationship (namespace-nya beda antara Transitional dan Strict)
+OFFICE_DOCUMENT_REL = '/officeDocument'
+
+
+class ExcelRow(NamedTuple):
+    """ Satu baris data Excel; semua teks sudah di-strip, sel kosong = '' """
+    row: int  # Nomor baris di Excel (header = 1)
+    link: str  # Hyperlink kolom A, atau teks sel A jika tidak ada hyperlink
+    title: str
+    automated_transcript: str
+    transcript_alignment: str
+    sibi_sentence: str
+    potential_problem: str
+    comment: str
+    username: str
+    alignment: object  # Nilai mentah kolom Hasil Alignment (NEW), lihat ingest.parse_is_annotated
+
+
+class MissingColumnError(ValueError):
+    def __init__(self, missing, available):
+        super().__init__(f'Kolom "{", ".join(missing)}" tidak ditemukan. Kolom tersedia: {available}')
+        self.missing = missing
+        self.available = available
+
+
+def _text(value):
+    if value is None:
+        return ''
+    text = str(value).strip()
+    return '' if text in EMPTY_VALUES else text
+
+
+def _local(tag):
+    """ Nama tag tanpa namespace: '{ns}row' -> 'row' """
+    return tag.rpartition('}')[2]
+
+
+def _attribute(element, name):
+    """ Nilai atribut tanpa memedulikan namespace-nya (mis. r:id) """
+    return next((value for key, value in element.items() if _local(key) == name), None)
+
+
+def _part_path(source, target):
+    """ Path member zip untuk target relationship dari part source """
+    if target.startswith('/'):
+        return target.lstrip('/')
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source), target))
+
+
+def _relationships(archive, part):
+    """ rId -> (tipe, target) dari file _rels milik part ('' untuk root package) """
+    directory, filename = posixpath.split(part)
+    rels_member = posixpath.join(directory, '_rels', f'{filename}.rels')
+    relationships = {}
+    try:
+        with archive.open(rels_member) as rels:
+            for _, element in ElementTree.iterparse(rels):
+                if _local(element.tag) == 'Relationship':
+                    relationships[element.get('Id')] = (element.get('Type', ''), element.get('Target', ''))
+    except KeyError:
+        pass
+    return relationships
+
+
+def _active_sheet(archive):
+    """
+    Member zip XML sheet aktif (workbookView activeTab, default sheet pertama,
+    sama dengan workbook.active openpyxl) dari workbook.xml dan rels-nya.
+    """
+    workbook = next(
+        (_part_path('', target) for kind, target in _relationships(archive, '').values()
+         if kind.endswith(OFFICE_DOCUMENT_REL)),
+        'xl/workbook.xml',
+    )
+    with archive.open(workbook) as source:
+        root = ElementTree.parse(source).getroot()
+    sheets = [element for element in root.iter() if _local(element.tag) == 'sheet']
+    view = next((element for element in root.iter() if _local(element.tag) == 'workbookView'), None)
+    active = int(view.get('activeTab', 0)) if view is not None else 0
+    if not sheets:
+        raise KeyError('Workbook tidak punya sheet')
+    sheet = sheets[active] if active < len(sheets) else sheets[0]
+
+    _, target = _relationships(archive, workbook)[_attribute(sheet, 'id')]
+    return _part_path(workbook, target)
+
+
+def _sheet_tail(source, chunk_size=SCAN_CHUNK_SIZE):
+    """
+    Isi XML sheet setelah </sheetData> (tempat <hyperlinks>). Sheet dibaca
+    streaming; sebelum tag itu ketemu hanya TAG_OVERLAP byte terakhir yang
+    disimpan.
+    """
+    buffer = b''
+    tail = None
+    for chunk in iter(lambda: source.read(chunk_size), b''):
+        if tail is not None:
+            tail += chunk
+            continue
+        buffer = buffer[-TAG_OVERLAP:] + chunk
+        match = SHEET_DATA_END_RE.search(buffer)
+        if match:
+            tail = buffer[match.end():]
+    # <sheetData/> kosong: sheet tanpa baris, tidak ada yang perlu di-link
+    return tail or b''
+
+
+def _cell_rows(ref, column):
+    """ Nomor baris di ref (sel atau range, mis. A2 atau A2:A9) yang termasuk kolom column """
+    parts = ref.split(':')
+    cells = [CELL_REF_RE.match(part) for part in parts]
+    if not all(cells):
+        return []
+    start_col, start_row = column_index_from_string(cells[0].group(1)), int(cells[0].group(2))
+    end_col, end_row = column_index_from_string(cells[-1].group(1)), int(cells[-1].group(2))
+    if not start_col <= column <= end_col:
+        return []
+    return range(start_row, end_row + 1)
+
+
+def _hyperlinks(tail, relationships, column=1):
+    """ Nomor baris -> target hyperlink di kolom column (default A), dari ekor XML sheet """
+    links = {}
+    for match in HYPERLINK_TAG_RE.finditer(tail.decode('utf-8')):
+        # Nama atribut tanpa prefix (r:id -> id), nilai masih ter-escape XML
+        attrs = {
+            name.rpartition(':')[2]: unescape(double or single, {'&quot;': '"', '&apos;': "'"})
+            for name, double, single in ATTRIBUTE_RE.findall(match.group(1))
+        }
+        rows = _cell_rows(attrs.get('ref', ''), column)
+        if not rows:
+            continue
+        # Hyperlink eksternal menyimpan URL di file relationship sheet
+        rel_id = attrs.get('id')
+        target = relationships[rel_id][1] if rel_id in relationships else attrs.get('location')
+        if target is None:
+            continue
+        for row in rows:
+            links[row] = target
+    return links
+
+
+def read_links(path):
+    """ Nomor baris -> hyperlink kolom A di sheet aktif; kosong jika tidak terbaca """
+    try:
+        with zipfile.ZipFile(path) as archive:
+            member = _active_sheet(archive)
+            with archive.open(member) as source:
+                tail = _sheet_tail(source)
+            return _hyperlinks(tail, _relationships(archive, member))
+    except (KeyError, UnicodeDecodeError):
+        return {}
+
+
+def _load_workbook(path):
+    """ Workbook read-only, nilai formula = hasil tersimpan. <dimension> diabaikan karena bisa salah """
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    workbook.active.reset_dimensions()
+    return workbook
+
+
+def read_header(path):
+    """ Judul kolom di baris pertama sheet aktif """
+    workbook = _load_workbook(path)
+    try:
+        header = next(workbook.active.iter_rows(max_row=1, values_only=True), ())
+    finally:
+        workbook.close()
+    return [_text(value) for value in header]
+
+
+def iter_rows(path):
+    """
+    Yield ExcelRow untuk setiap baris data sheet aktif (baris kosong dilewati).
+    Raise MissingColumnError jika kolom wajib tidak ada.
+    """
+    links = read_links(path)
+    workbook = _load_workbook(path)
+    try:
+        # Baris yang tidak ada di XML diisi tuple kosong, jadi nomor baris = urutan
+        rows = enumerate(workbook.active.iter_rows(values_only=True), start=1)
+        _, header = next(rows, (1, ()))
+        header = [_text(value) for value in header]
+        missing = [name for name in REQUIRED_COLUMNS if name not in header]
+        if missing:
+            raise MissingColumnError(missing, header)
+        positions = {field: header.index(name) for field, name in COLUMNS.items() if name in header}
+
+        for row_number, values in rows:
+            if not any(_text(value) for value in values):
+                continue
+
+            def cell(field):
+                position = positions.get(field)
+                return values[position] if position is not None and position < len(values) else None
+
+            link = links.get(row_number) or _text(values[0] if values else None)
+            yield ExcelRow(
+                row=row_number,
+                link=link.strip(),
+                title=_text(cell('title')),
+                automated_transcript=_text(cell('automated_transcript')),
+                transcript_alignment=_text(cell('transcript_alignment')),
+                sibi_sentence=_text(cell('sibi_sentence')),
+                potential_problem=_text(cell('potential_problem')),
+                comment=_text(cell('comment')),
+                username=_text(cell('username')),
+                alignment=cell('alignment'),
+            )
+    finally:
+        workbook.close()
+
+
+def estimate_rows(path):
+    """ Perkiraan jumlah baris data dari <dimension> sheet (tanpa membaca isi), untuk progress """
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    try:
+        return max(0, (workbook.active.max_row or 1) - 1)
+    finally:
+        workbook.close()
@@ -0,0 +1,52 @@
+"""
+Ringkasan folder untuk landing page (HTML dan landing_page_data).
+
+Jumlah video dan video yang sudah dianotasi per folder dihitung database
+dengan satu query GROUP BY. Query ini hanya membaca index (folder_name,
+is_annotated, sequence), bukan baris Video beserta kolom teksnya, jadi
+tetap cepat untuk jutaan video.
+"""
+from django.db.models import Count, Q
+
+from .models import Video
+
+
+def format_folder_display(name):
+    """ Format nama folder untuk tampilan yang lebih user-friendly, misal TVRI_SB_061119 -> TVRI - SIBI - 06/11/2019 """
+    try:
+        parts = name.split('_')
+        lembaga = parts[0]
+        jenis = 'SIBI' if parts[1] == 'SB' else parts[1]
+        tanggal_str = parts[2]  # e.g: 290120
+
+        # Formating tanggal
+        day = tanggal_str[0:2]
+        month = tanggal_str[2:4]
+        year = '20' + tanggal_str[4:6]
+        tanggal_format = f"{day}/{month}/{year}"
+
+        return f'{lembaga} - {jenis} - {tanggal_format}'
+    except Exception:
+        return name  # Kalo misalnya format namanya ga sesuai
+
+
+def folder_summaries():
+    """ List dict per folder: name, annotated, total, all_done, display_name (urut nama folder) """
+    rows = (
+        Video.objects
+        .exclude(folder_name__isnull=True).exclude(folder_name='')
+        .values('folder_name')
+        # Hitung folder_name (bukan pk) supaya query cukup membaca index, tanpa lookup ke tabel
+        .annotate(total=Count('folder_name'), annotated=Count('folder_name', filter=Q(is_annotated=True)))
+        .order_by('folder_name')
+    )
+    return [
+        {
+            'name': row['folder_name'],
+            'annotated': row['annotated'],
+            'total': row['total'],
+            'all_done': row['annotated'] == row['total'],
+            'display_name': format_folder_display(row['folder_name']),
+        }
+        for row in rows
+    ]
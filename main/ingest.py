@@ -0,0 +1,506 @@
+"""
+Ingest Excel anotasi (upload_file) sebagai job di worker.
+
+View hanya menyimpan file Excel lalu membuat VideoJob kind=ingest; baris
+diproses di worker (download Drive, buat/update Video) sehingga request
+HTTP langsung selesai. Hasil tiap baris disimpan di IngestRowResult:
+dipakai untuk progress (selesai/skip/gagal, byte, ETA) selama job berjalan
+dan bisa di-download sebagai CSV setelahnya.
+
+Setiap baris di-hash (row_hash) dan hash-nya disimpan di Video.import_hash.
+Pada upload ulang baris dengan hash yang sama dilewati tanpa perbandingan
+dan tanpa write; edit di editor (save_transcript) menghapus import_hash,
+jadi baris itu dibandingkan lagi per kolom dengan nilai di database.
+Job dengan params dry_run hanya membuat laporan diff (baru/berubah/sama/
+tidak ada di Excel) tanpa menyimpan apa pun; lihat views.ingest_commit.
+"""
+import csv
+import hashlib
+import json
+import os
+import re
+import time
+import traceback
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from .drive import download_many, download_url as drive_download_url, extract_file_id
+from .editing import VideoProcessingError
+from .excel import estimate_rows, iter_rows, read_header
+from .media_tools import try_faststart
+from .metadata import probe_and_store
+from .models import IngestRowResult, Video, title_sequence
+from .proxies import schedule_proxies
+from .uploads import link_or_copy
+
+# Hasil baris ditulis ke DB per batch, paling lambat setiap FLUSH_SECONDS
+FLUSH_ROWS = 50
+FLUSH_SECONDS = 1.0
+RESULT_CSV_FIELDS = ['row', 'title', 'status', 'message', 'bytes', 'video_id']
+# Baris dengan file yang sudah ada ditulis ke DB per batch (lihat MetadataBatch)
+BATCH_ROWS = 500
+
+CREATED = IngestRowResult.STATUS_CREATED
+UPDATED = IngestRowResult.STATUS_UPDATED
+SKIPPED = IngestRowResult.STATUS_SKIPPED
+FAILED = IngestRowResult.STATUS_FAILED
+UNCHANGED = IngestRowResult.STATUS_UNCHANGED
+MISSING = IngestRowResult.STATUS_MISSING
+
+
+class IngestLog:
+    """ Penampung hasil per baris; ditulis bulk dan sekaligus memperbarui progress job """
+
+    def __init__(self, job, progress):
+        self.job = job
+        self.progress = progress
+        self.total_rows = 0
+        self.done = 0
+        self.pending = []
+        self.last_flush = time.monotonic()
+
+    def start(self, total_rows):
+        self.total_rows = total_rows
+        params = dict(self.job.params, total_rows=total_rows)
+        type(self.job).objects.filter(id=self.job.id).update(params=params)
+        self.job.params = params
+
+    def add(self, row, title, status, message='', size=0, video=None):
+        self.pending.append(IngestRowResult(
+            job=self.job, row=row, title=title or '', status=status,
+            message=message, bytes=size, video=video,
+        ))
+        self.done += 1
+        if len(self.pending) >= FLUSH_ROWS or time.monotonic() - self.last_flush >= FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            IngestRowResult.objects.bulk_create(self.pending)
+            self.pending = []
+        self.last_flush = time.monotonic()
+        if self.total_rows:
+            self.progress(min(1.0, self.done / self.total_rows))
+
+
+def parse_is_annotated(value):
+    """ Nilai kolom Hasil Alignment (NEW) -> bool (1/ya/sudah/angka > 0 = sudah dianotasi) """
+    if value is None:
+        return False
+    text = str(value).strip().lower()
+    if text in ('1', '1.0', 'true', 'yes', 'ya', 'sudah'):
+        return True
+    if text in ('', '0', '0.0', 'false', 'no', 'tidak', 'belum'):
+        return False
+    try:
+        return float(text) > 0
+    except ValueError:
+        return False
+
+
+def row_hash(fields, username):
+    """ sha256 isi baris yang sudah dinormalisasi (nilai kolom + nama annotator), lihat Video.import_hash """
+    payload = json.dumps(dict(fields, username=username), sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def is_valid_video_file(file_path):
+    """Validasi apakah file adalah video yang valid dan tidak corrupt"""
+    try:
+        if not os.path.exists(file_path):
+            return False
+
+        # Cek ukuran file minimal (100KB untuk video)
+        file_size = os.path.getsize(file_path)
+        if file_size < 100000:  # 100KB minimum
+            print(f"File terlalu kecil: {file_size} bytes")
+            return False
+
+        # Cek ekstensi file
+        if not file_path.lower().endswith(('.mp4', '.avi', '.mov', '.mkv')):
+            print(f"Ekstensi file tidak valid: {file_path}")
+            return False
+
+        print(f"File valid: {file_path} ({file_size} bytes)")
+        return True
+    except Exception as e:
+        print(f"Error validating file {file_path}: {e}")
+        return False
+
+
+class MetadataBatch:
+    """
+    Upsert Video untuk baris yang filenya sudah ada di server, per batch.
+
+    Setiap flush: user dan video (per folder) yang belum dikenal diambil
+    dengan satu query masing-masing, lalu record baru/berubah ditulis dengan
+    bulk_create/bulk_update dalam satu transaksi. Baris yang import_hash-nya
+    sama dengan import terakhir dilewati; baris lain dibandingkan per kolom
+    dan hanya ditulis jika ada kolom yang berbeda. Hasil baris dicatat ke
+    IngestLog setelah commit supaya FK ke video sudah valid.
+
+    Dengan dry_run=True klasifikasinya sama tetapi tidak ada yang ditulis,
+    dan log_missing() mencatat video di folder yang sama yang tidak ada di Excel.
+    """
+
+    def __init__(self, log, batch_size=None, dry_run=False):
+        self.log = log
+        self.batch_size = batch_size or getattr(settings, 'INGEST_BATCH_ROWS', BATCH_ROWS)
+        self.dry_run = dry_run
+        self.users = {}  # username -> User (None jika tidak ada)
+        self.videos = {}  # (folder_name, title) -> [Video, duplikat...]
+        self.loaded_folders = set()
+        self.seen = set()  # (folder_name, title) yang ada di Excel
+        self.rows = []
+        self.count = 0
+
+    def add(self, row, fields, username, relative_path):
+        self.rows.append((row, fields, username, relative_path))
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def load_users(self, usernames):
+        """ Ambil user yang belum dikenal dengan satu query """
+        usernames = {username for username in usernames if username} - self.users.keys()
+        if usernames:
+            found = {user.username: user for user in User.objects.filter(username__in=usernames)}
+            for username in usernames:
+                if username not in found:
+                    print(f"User with username '{username}' not found in database")
+                self.users[username] = found.get(username)
+
+    def load_folders(self, folders):
+        """ Satu query untuk semua video di folder yang belum dimuat; urutan pk = .first() versi lama """
+        folders = set(folders) - self.loaded_folders
+        if folders:
+            for video in Video.objects.filter(folder_name__in=folders).order_by('pk'):
+                self.videos.setdefault((video.folder_name, video.title), []).append(video)
+            self.loaded_folders |= folders
+
+    def flush(self):
+        if not self.rows:
+            return
+        self.load_users(username for _, _, username, _ in self.rows)
+        self.load_folders(fields['folder_name'] for _, fields, _, _ in self.rows)
+        created, updated, changed_fields, duplicates, results = [], {}, set(), [], []
+        suffix = ' (dry run)' if self.dry_run else ''
+
+        for row, fields, username, relative_path in self.rows:
+            user = self.users.get(username)
+            key = (fields['folder_name'], fields['title'])
+            self.seen.add(key)
+            existing = self.videos.get(key)
+            if existing and len(existing) > 1:
+                print(f"⚠️ WARNING: Ditemukan {len(existing)} video duplikat dengan nama {fields['title']}")
+                # Hapus duplikasi, sisakan yang pertama
+                duplicates.extend(video.pk for video in existing[1:])
+                del existing[1:]
+
+            if not existing:
+                # File ada di local tapi tidak ada record di database
+                # bulk_create tidak memanggil Video.save, sequence diisi di sini
+                video = Video(file=relative_path, annotated_by=user, sequence=title_sequence(fields['title']), **fields)
+                self.videos[key] = [video]
+                created.append(video)
+                results.append((row, fields['title'], CREATED, f'File sudah ada di server{suffix}', video))
+                self.count += 1
+                continue
+
+            video = existing[0]
+            if not video._state.adding and video.import_hash == fields['import_hash']:
+                # Hash sama dengan import terakhir dan kolomnya tidak diubah sejak itu
+                # (edit di editor menghapus import_hash): tanpa perbandingan dan write
+                results.append((row, fields['title'], UNCHANGED, 'Tidak berubah sejak import terakhir', video))
+                continue
+
+            # Update metadata dari Excel meskipun file sudah ada, dibandingkan dengan nilai di database
+            values = dict(fields, annotated_by_id=user.pk) if user else fields
+            changes = [
+                name for name, value in values.items() if name != 'import_hash' and getattr(video, name) != value
+            ]
+            if video._state.adding:
+                # Record baru dari baris sebelumnya di batch yang sama
+                for name in changes + ['import_hash']:
+                    setattr(video, name, values[name])
+                results.append((row, fields['title'], CREATED, f'File sudah ada di server{suffix}', video))
+                self.count += 1
+                continue
+
+            columns = sorted('annotated_by' if name == 'annotated_by_id' else name for name in changes)
+            if not columns:
+                # Isi sama dengan database (mis. diedit lalu dikembalikan): tidak ditulis
+                results.append((row, fields['title'], UNCHANGED, 'Metadata sudah sama', video))
+                continue
+            # bulk_update hanya untuk record dan kolom yang berubah, hash ikut disimpan
+            for name in changes + ['import_hash']:
+                setattr(video, name, values[name])
+            updated[video.pk] = video
+            changed_fields.update(columns + ['import_hash'])
+            results.append((row, fields['title'], UPDATED, f'Metadata diperbarui: {", ".join(columns)}{suffix}', video))
+            self.count += 1
+
+        if self.dry_run:
+            if duplicates:
+                print(f"Dry run: {len(duplicates)} duplikasi video akan dihapus")
+        else:
+            with transaction.atomic():
+                if duplicates:
+                    print(f"Menghapus {len(duplicates)} duplikasi video")
+                    Video.objects.filter(pk__in=duplicates).delete()
+                Video.objects.bulk_create(created, batch_size=self.batch_size)
+                if updated:
+                    Video.objects.bulk_update(updated.values(), sorted(changed_fields), batch_size=self.batch_size)
+            for video in created:
+                probe_and_store(video)
+            schedule_proxies(created)
+        print(f"✅ Batch metadata{suffix}: {len(created)} dibuat, {len(updated)} diperbarui")
+
+        for row, title, status, message, video in results:
+            # Video baru pada dry run tidak pernah disimpan
+            self.log.add(row, title, status, message, video=None if video._state.adding else video)
+        self.rows = []
+
+    def log_missing(self):
+        """ Video di folder yang ada di Excel tetapi judulnya tidak ada di Excel """
+        for (folder_name, title), videos in sorted(self.videos.items()):
+            if (folder_name, title) not in self.seen and not videos[0]._state.adding:
+                self.log.add(0, title, MISSING, 'Ada di database, tidak ada di Excel', video=videos[0])
+
+
+def run_ingest(job, progress):
+    """ Handler job ingest: proses semua baris Excel di job.params['excel_path'] """
+    # Job yang diulang (worker mati) mulai dari awal, log lama dibuang
+    job.ingest_rows.all().delete()
+    log = IngestLog(job, progress)
+    file_path = default_storage.path(job.params['excel_path'])
+
+    # Satu kali baca: nilai sel per baris (streaming) + hyperlink kolom A
+    columns = read_header(file_path)
+    print(f"Kolom Excel: {columns}")
+    if 'Nama Data' not in columns:
+        print("ERROR: Kolom 'Nama Data' tidak ditemukan!")
+        raise VideoProcessingError(f'Kolom "Nama Data" tidak ditemukan. Kolom tersedia: {columns}', status=400)
+
+    # Dry run: semua baris diklasifikasi (baru/berubah/sama/hilang) tanpa write dan tanpa download
+    dry_run = bool(job.params.get('dry_run'))
+    count = 0
+    batch = MetadataBatch(log, dry_run=dry_run)
+    download_tasks = []
+    queued_paths = set()
+    log.start(estimate_rows(file_path))
+    print(f"Perkiraan baris data: {log.total_rows}")
+
+    for record in iter_rows(file_path):
+        row_number = record.row
+        link = record.link
+        video_title_raw = record.title
+        try:
+            # Validasi dan normalisasi link
+            if not link:
+                print(f"[SKIP] Baris {row_number}: Link kosong atau invalid. Link: '{link}'")
+                log.add(row_number, video_title_raw, SKIPPED, 'Link kosong atau invalid')
+                continue
+
+            # Coba normalisasi link jika tidak lengkap
+            if 'drive.google.com' not in link:
+                # Jika hanya file ID, buat URL lengkap
+                if re.match(r'^[a-zA-Z0-9_-]{25,}$', link.strip()):
+                    link = f"https://drive.google.com/file/d/{link.strip()}/view"
+                else:
+                    print(f"[SKIP] Baris {row_number}: Bukan link Google Drive atau file ID. Link: '{link}'")
+                    log.add(row_number, video_title_raw, SKIPPED, f'Bukan link Google Drive atau file ID: {link}')
+                    continue
+
+            if not video_title_raw:
+                print(f"[SKIP] Baris {row_number}: Video title kosong atau invalid. Title: '{video_title_raw}'")
+                log.add(row_number, video_title_raw, SKIPPED, 'Nama Data kosong atau invalid')
+                continue
+
+            video_title = f"{video_title_raw}.mp4"
+            folder_name = "_".join(video_title_raw.split("_")[:-1])
+            fields = {
+                'title': video_title,
+                'folder_name': folder_name,
+                'automated_transcript': record.automated_transcript,
+                'transcript_alignment': record.transcript_alignment,
+                'sibi_sentence': record.sibi_sentence,
+                'potential_problem': record.potential_problem,
+                'comment': record.comment,
+                'is_annotated': parse_is_annotated(record.alignment),
+            }
+            fields['import_hash'] = row_hash(fields, record.username)
+
+            # Ambil file ID dari link - Support berbagai format Google Drive
+            file_id = extract_file_id(link)
+            if not file_id:
+                print(f"[SKIP] Baris {row_number}: Gagal ekstrak file ID dari link: {link}")
+                print("Supported formats:")
+                print("- https://drive.google.com/file/d/FILE_ID/view")
+                print("- https://drive.google.com/open?id=FILE_ID")
+                print("- https://drive.google.com/file/d/FILE_ID")
+                log.add(row_number, video_title, SKIPPED, f'Gagal ekstrak file ID dari link: {link}')
+                continue
+
+            # Siapkan path untuk file sebelum melakukan pengecekan
+            videos_dir = os.path.join('videos', folder_name)
+            raw_dir = os.path.join('raw_videos', folder_name)
+            final_video_path = os.path.join(videos_dir, video_title)
+            raw_video_path = os.path.join(raw_dir, video_title)
+
+            # Path absolut untuk pengecekan file di local storage
+            final_full_path = os.path.join(settings.MEDIA_ROOT, final_video_path)
+            raw_full_path = os.path.join(settings.MEDIA_ROOT, raw_video_path)
+
+            # File sudah ada di local storage: tidak perlu download, record ditulis per batch
+            if is_valid_video_file(final_full_path):
+                batch.add(row_number, fields, record.username, final_video_path)
+                continue
+            if is_valid_video_file(raw_full_path):
+                batch.add(row_number, fields, record.username, raw_video_path)
+                continue
+
+            if final_full_path in queued_paths:
+                print(f"[SKIP] Baris {row_number}: {video_title} sudah ada di baris sebelumnya")
+                log.add(row_number, video_title, SKIPPED, 'Duplikat baris sebelumnya')
+                continue
+            queued_paths.add(final_full_path)
+            batch.seen.add((folder_name, video_title))
+            if dry_run:
+                log.add(row_number, video_title, CREATED, 'Akan didownload dari Google Drive (dry run)')
+                continue
+
+            # Download dijalankan paralel setelah semua baris dibaca
+            print(f"Baris {row_number}: download {video_title} dari {drive_download_url(file_id)}")
+            os.makedirs(os.path.join(settings.MEDIA_ROOT, raw_dir), exist_ok=True)
+            os.makedirs(os.path.join(settings.MEDIA_ROOT, videos_dir), exist_ok=True)
+            download_tasks.append({
+                'row': row_number,
+                'file_id': file_id,
+                'target_path': final_full_path,
+                'raw_path': raw_full_path,
+                'username': record.username,
+                'fields': dict(fields, file=final_video_path),
+            })
+
+        except Exception as e:
+            print(f"[ERROR] Baris {row_number}: {str(e)}")
+            traceback.print_exc()
+            log.add(row_number, '', FAILED, str(e))
+
+    batch.flush()
+    count += batch.count
+    print(f"📁 {batch.count} baris dengan file yang sudah ada di server")
+    if dry_run:
+        return finish_dry_run(job, log, batch)
+
+    # Download Drive paralel (stream ke file sementara lalu rename), tulis DB di thread ini
+    print(f"\n=== DOWNLOAD {len(download_tasks)} video dari Google Drive ===")
+    batch.load_users(task['username'] for task in download_tasks)
+    last_report = [0.0]
+
+    def report_progress(state):
+        if state.done == state.total or time.monotonic() - last_report[0] >= 5:
+            last_report[0] = time.monotonic()
+            print(f"📥 Download: {state.summary()}")
+
+    for task, result, error in download_many(download_tasks, progress=report_progress):
+        title = task['fields']['title']
+        if error:
+            print(f"[SKIP] Baris {task['row']}: {error}")
+            log.add(task['row'], title, FAILED, str(error))
+            continue
+        size, content_hash = result
+        try:
+            # Video Drive sering menaruh moov di akhir file, pindahkan ke depan sebelum dipakai editor
+            if try_faststart(task['target_path']):
+                print(f"⏩ Fast-start: {title}")
+            link_or_copy(task['target_path'], task['raw_path'])
+            video_obj = Video.objects.create(
+                content_hash=content_hash, annotated_by=batch.users.get(task['username']), **task['fields'],
+            )
+            probe_and_store(video_obj)
+            schedule_proxies([video_obj])
+            print(f"✅ SUCCESS: Video {video_obj.title} berhasil diproses dan disimpan (ID: {video_obj.id}, {size:,} bytes)")
+            log.add(task['row'], title, CREATED, 'Didownload dari Google Drive', size=size, video=video_obj)
+            count += 1
+        except Exception as e:
+            print(f"[ERROR] Baris {task['row']}: {str(e)}")
+            log.add(task['row'], title, FAILED, str(e), size=size)
+    log.flush()
+
+    # Perkiraan dari dimensi sheet diganti jumlah baris sebenarnya
+    log.start(log.done)
+    log.flush()
+
+    print("\n=== SUMMARY ===")
+    print(f"Total baris diproses: {log.done}")
+    print(f"Video berhasil diupload: {count}")
+    summary = ingest_counts(job)
+    summary['message'] = (
+        f'Upload selesai. {count} video diproses dari {log.done} baris '
+        f'({summary[UNCHANGED]} tidak berubah).'
+    )
+    return summary
+
+
+def finish_dry_run(job, log, batch):
+    """ Tutup job dry run: catat video yang tidak ada di Excel lalu kembalikan laporan diff """
+    log.flush()
+    log.start(log.done)
+    batch.log_missing()
+    log.flush()
+
+    summary = ingest_counts(job)
+    diff = ingest_diff(summary)
+    summary['dry_run'] = True
+    summary['diff'] = diff
+    summary['message'] = (
+        f"Dry run selesai, belum ada yang disimpan: {diff['added']} baru, {diff['changed']} berubah, "
+        f"{diff['unchanged']} tidak berubah, {diff['missing']} tidak ada di Excel."
+    )
+    print(f"\n=== DRY RUN === {summary['message']}")
+    return summary
+
+
+def ingest_diff(counts):
+    """ Ringkasan diff dari ingest_counts: added/changed/unchanged/missing """
+    return {
+        'added': counts[CREATED],
+        'changed': counts[UPDATED],
+        'unchanged': counts[UNCHANGED],
+        'missing': counts[MISSING],
+    }
+
+
+def ingest_counts(job):
+    """ Jumlah baris per status dan total byte yang didownload """
+    counts = dict.fromkeys((CREATED, UPDATED, UNCHANGED, SKIPPED, FAILED, MISSING), 0)
+    for row in job.ingest_rows.values('status').annotate(n=Count('id')):
+        counts[row['status']] = row['n']
+    counts['bytes'] = job.ingest_rows.aggregate(total=Sum('bytes'))['total'] or 0
+    return counts
+
+
+def ingest_progress(job):
+    """ Progress job ingest untuk dipoll halaman upload: baris selesai/skip/gagal, byte, ETA """
+    data = ingest_counts(job)
+    total_rows = job.params.get('total_rows')
+    done = data[CREATED] + data[UPDATED] + data[UNCHANGED] + data[SKIPPED] + data[FAILED]
+    data.update({'total_rows': total_rows, 'done_rows': done, 'eta_seconds': None})
+    if job.status == job.STATUS_RUNNING and job.started_at and total_rows and done:
+        elapsed = (timezone.now() - job.started_at).total_seconds()
+        data['eta_seconds'] = round(elapsed / done * (total_rows - done), 1)
+    return data
+
+
+def write_result_csv(job, output):
+    """ Log hasil per baris sebagai CSV ke file-like output """
+    writer = csv.writer(output)
+    writer.writerow(RESULT_CSV_FIELDS)
+    for row in job.ingest_rows.order_by('row').values_list('row', 'title', 'status', 'message', 'bytes', 'video_id'):
+        writer.writerow(row)
@@ -0,0 +1,295 @@
+"""
+Antrian job berbasis database untuk proses encode merge/trim.
+
+View hanya membuat VideoJob dan langsung mengembalikan job id. Encode,
+ingest Excel (ingest.py), arsip folder (archives.py), dan proxy editor
+(proxies.py) dijalankan oleh worker (`python manage.py run_video_worker`)
+di process pool, sehingga worker HTTP tidak pernah menunggu encode
+selesai. Tidak butuh broker eksternal: klaim job memakai UPDATE bersyarat
+yang aman di SQLite maupun Postgres.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from . import edl
+from .archives import build_folder_archive
+from .editing import VideoProcessingError, get_next_video, merge_video_pair, trim_video_pair
+from .ingest import run_ingest
+from .models import EditDecision, VideoJob
+from .proxies import build_video_proxies, merge_proxy_pair, schedule_proxies
+
+logger = logging.getLogger(__name__)
+
+# Update progress ke DB hanya jika naik minimal sebesar ini
+PROGRESS_STEP = 0.02
+
+
+def _run_merge(job, progress):
+    if job.params.get('proxy'):
+        # Merge proxy untuk editor; jika proxy tidak bisa di-concat, merge file asli
+        result = merge_proxy_pair(job.video)
+        if result:
+            return result
+    # Merge fisik membaca file video, EDL yang belum di-render ditulis dulu
+    _, next_video = get_next_video(job.video)
+    for video in (job.video, next_video):
+        if video and video.needs_render:
+            edl.render_video(video)
+    return merge_video_pair(job.video, progress=progress)
+
+
+def _run_trim(job, progress):
+    result = trim_video_pair(
+        job.video,
+        job.params['start_time'],
+        job.params['end_time'],
+        progress=progress,
+    )
+    # File asli n dan n+1 berubah, proxy lama tidak berlaku lagi
+    _, next_video = get_next_video(job.video)
+    schedule_proxies([video for video in (job.video, next_video) if video], user=job.created_by)
+    return result
+
+
+def _run_render(job, progress):
+    return edl.render_video(job.video, progress=progress)
+
+
+def _run_archive(job, progress):
+    folder_name = job.params['folder_name']
+    # Arsip harus berisi hasil trim, EDL yang belum di-render ditulis dulu
+    edl.render_pending(folder_name)
+    return build_folder_archive(folder_name, progress=progress)
+
+
+def _run_proxy(job, progress):
+    return build_video_proxies(job.video, progress=progress)
+
+
+JOB_HANDLERS = {
+    VideoJob.KIND_MERGE: _run_merge,
+    VideoJob.KIND_TRIM: _run_trim,
+    VideoJob.KIND_RENDER: _run_render,
+    VideoJob.KIND_INGEST: run_ingest,
+    VideoJob.KIND_ARCHIVE: _run_archive,
+    VideoJob.KIND_PROXY: _run_proxy,
+}
+
+# Job yang cukup satu aktif per video; job kedua memakai job yang sudah ada
+DEDUPLICATED_KINDS = (VideoJob.KIND_MERGE, VideoJob.KIND_RENDER, VideoJob.KIND_PROXY)
+
+
+def enqueue_job(kind, video, params=None, user=None, priority=0, speculative=False):
+    """ Membuat job baru, atau mengembalikan job merge/render/proxy (atau arsip folder) yang masih aktif untuk target yang sama """
+    if kind in DEDUPLICATED_KINDS:
+        active_job = get_active_job(kind, video, proxy=bool((params or {}).get('proxy')))
+        if active_job:
+            return active_job
+    if kind == VideoJob.KIND_ARCHIVE:
+        active_job = get_active_archive_job(params['folder_name'])
+        if active_job:
+            return active_job
+
+    job = VideoJob.objects.create(
+        kind=kind,
+        video=video,
+        params=params or {},
+        priority=priority,
+        is_speculative=speculative,
+        created_by=user if user and user.is_authenticated else None,
+    )
+    if getattr(settings, 'VIDEO_JOBS_INLINE', False):
+        # Mode development tanpa worker: jalankan langsung di request
+        run_job(job.id)
+        job.refresh_from_db()
+    return job
+
+
+def enqueue_render_jobs(videos, user=None):
+    """
+    Job render untuk setiap video dengan trim EDL yang belum ditulis ke file,
+    satu job aktif per video (job yang sudah antri dipakai ulang). Dibuat
+    dengan satu bulk insert, jadi aman untuk ribuan video. Return list job.
+    """
+    videos = list(videos)
+    active = {
+        job.video_id: job
+        for job in VideoJob.objects.filter(
+            kind=VideoJob.KIND_RENDER, video__in=videos, status__in=VideoJob.ACTIVE_STATUSES,
+        ).order_by('-created_at')
+    }
+    created_by = user if user and user.is_authenticated else None
+    new_jobs = VideoJob.objects.bulk_create([
+        VideoJob(kind=VideoJob.KIND_RENDER, video=video, created_by=created_by)
+        for video in videos if video.id not in active
+    ])
+    if new_jobs and getattr(settings, 'VIDEO_JOBS_INLINE', False):
+        for job in new_jobs:
+            run_job(job.id)
+            job.refresh_from_db()
+    return list(active.values()) + new_jobs
+
+
+def failed_render_job(videos):
+    """
+    Job render gagal untuk EDL video saat ini, atau None: job render terakhir
+    video itu gagal dan dibuat setelah trim terakhir. Render ulang (mis. dari
+    render_folder) atau trim baru menghapus status gagal ini.
+    """
+    latest_edit = EditDecision.objects.filter(video=OuterRef('video')).order_by('-created_at').values('created_at')[:1]
+    latest_render = VideoJob.objects.filter(
+        kind=VideoJob.KIND_RENDER, video=OuterRef('video'),
+    ).order_by('-created_at', '-id').values('id')[:1]
+    return (
+        VideoJob.objects.filter(kind=VideoJob.KIND_RENDER, video__in=list(videos), status=VideoJob.STATUS_FAILED)
+        .annotate(latest_edit=Subquery(latest_edit), latest_render=Subquery(latest_render))
+        .filter(created_at__gte=F('latest_edit'), id=F('latest_render'))
+        .select_related('video')
+        .order_by('-created_at')
+        .first()
+    )
+
+
+def get_active_job(kind, video, proxy=False):
+    jobs = VideoJob.objects.filter(kind=kind, video=video, status__in=VideoJob.ACTIVE_STATUSES)
+    if kind == VideoJob.KIND_MERGE and not proxy:
+        # Merge proxy tidak menghasilkan file resolusi penuh; sebaliknya merge
+        # file asli juga cukup untuk permintaan merge proxy
+        jobs = jobs.exclude(params__has_key='proxy')
+    return jobs.order_by('created_at').first()
+
+
+def get_active_merge_job(video, proxy=False):
+    return get_active_job(VideoJob.KIND_MERGE, video, proxy=proxy)
+
+
+def get_active_archive_job(folder_name):
+    return VideoJob.objects.filter(
+        kind=VideoJob.KIND_ARCHIVE, params__folder_name=folder_name, status__in=VideoJob.ACTIVE_STATUSES,
+    ).order_by('created_at').first()
+
+
+def claim_next_job(allow_speculative=True):
+    """ Mengambil satu job queued (prioritas tertinggi) dan menandainya running secara atomik """
+    queued = VideoJob.objects.filter(status=VideoJob.STATUS_QUEUED)
+    if not allow_speculative:
+        queued = queued.filter(is_speculative=False)
+    while True:
+        candidate = (
+            queued.order_by('-priority', 'created_at')
+            .values_list('id', flat=True)
+            .first()
+        )
+        if candidate is None:
+            return None
+        now = timezone.now()
+        claimed = VideoJob.objects.filter(id=candidate, status=VideoJob.STATUS_QUEUED).update(
+            status=VideoJob.STATUS_RUNNING,
+            started_at=now,
+            heartbeat_at=now,
+        )
+        if claimed:
+            return candidate
+        # Sudah diklaim worker lain atau dibatalkan, coba job berikutnya
+
+
+def heartbeat_jobs(job_ids):
+    """ Tandai job yang masih dikerjakan worker ini """
+    return VideoJob.objects.filter(id__in=job_ids, status=VideoJob.STATUS_RUNNING).update(heartbeat_at=timezone.now())
+
+
+def requeue_stale_jobs(max_age_seconds):
+    """ Kembalikan job running tanpa heartbeat selama max_age_seconds (worker mati) ke antrian """
+    cutoff = timezone.now() - timedelta(seconds=max_age_seconds)
+    return VideoJob.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+        status=VideoJob.STATUS_RUNNING,
+    ).update(status=VideoJob.STATUS_QUEUED, started_at=None, heartbeat_at=None, progress=0.0)
+
+
+def requeue_job(job_id):
+    """ Kembalikan job yang sudah diklaim tetapi belum sempat dijalankan ke antrian """
+    return VideoJob.objects.filter(id=job_id, status=VideoJob.STATUS_RUNNING).update(
+        status=VideoJob.STATUS_QUEUED, started_at=None, heartbeat_at=None, progress=0.0,
+    )
+
+
+def fail_job(job_id, error):
+    """ Tandai job running gagal, misal karena process encode mati di tengah jalan """
+    return VideoJob.objects.filter(id=job_id, status=VideoJob.STATUS_RUNNING).update(
+        status=VideoJob.STATUS_FAILED, error=error, finished_at=timezone.now(),
+    )
+
+
+def run_job(job_id):
+    """
+    Menjalankan satu job; dipanggil di process worker (job sudah diklaim)
+    atau langsung untuk VIDEO_JOBS_INLINE (job masih queued, diklaim di sini).
+    Status akhir hanya ditulis selama klaim ini masih berlaku: job yang sudah
+    dikembalikan ke antrian (requeue_stale_jobs) dan diklaim worker lain,
+    atau dibatalkan, tidak ditimpa oleh run yang lama.
+    """
+    job = VideoJob.objects.select_related('video').get(id=job_id)
+    if job.status == VideoJob.STATUS_QUEUED:
+        now = timezone.now()
+        claimed = VideoJob.objects.filter(id=job_id, status=VideoJob.STATUS_QUEUED).update(
+            status=VideoJob.STATUS_RUNNING, started_at=now, heartbeat_at=now,
+        )
+        if not claimed:
+            return False
+        job.status, job.started_at = VideoJob.STATUS_RUNNING, now
+    if job.status != VideoJob.STATUS_RUNNING:
+        return False
+    # Klaim ini: started_at berganti setiap kali job diklaim ulang
+    claim = VideoJob.objects.filter(id=job_id, status=VideoJob.STATUS_RUNNING, started_at=job.started_at)
+    handler = JOB_HANDLERS[job.kind]
+    last_progress = [job.progress]
+
+    def progress(value):
+        if value - last_progress[0] >= PROGRESS_STEP:
+            last_progress[0] = value
+            claim.update(progress=value)
+
+    def finish(**fields):
+        if not claim.update(finished_at=timezone.now(), **fields):
+            logger.warning(f"Job {job_id} sudah diklaim ulang atau dibatalkan, hasil run ini diabaikan")
+            return False
+        return True
+
+    try:
+        result = handler(job, progress)
+    except VideoProcessingError as e:
+        logger.warning(f"Job {job_id} gagal: {e}")
+        finish(status=VideoJob.STATUS_FAILED, error=str(e))
+        return False
+    except Exception as e:
+        traceback.print_exc()
+        finish(status=VideoJob.STATUS_FAILED, error=str(e))
+        return False
+
+    return finish(status=VideoJob.STATUS_DONE, progress=1.0, result=result)
+
+
+def run_job_in_worker(job_id):
+    """ Entry point untuk process pool """
+    try:
+        return run_job(job_id)
+    finally:
+        connections.close_all()
+
+
+def job_to_dict(job):
+    return {
+        'job_id': str(job.id),
+        'kind': job.kind,
+        'status': job.status,
+        'progress': round(job.progress, 3),
+        'result': job.result,
+        'error': job.error,
+    }
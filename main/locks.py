@@ -0,0 +1,91 @@
+"""
+Lock berbasis file dan penulisan file atomik untuk proses video.
+
+file_lock dipakai sebagai single-flight: proses kedua yang ingin membuat
+output yang sama menunggu proses pertama selesai lalu memakai hasilnya.
+Lock berlaku antar thread maupun antar process (worker, gunicorn).
+"""
+import os
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class LockBusy(Exception):
+    """ Lock sedang dipegang proses lain (file_lock dengan blocking=False) """
+
+
+@contextmanager
+def file_lock(lock_path, shared=False, blocking=True):
+    """
+    Lock pada lock_path, menunggu sampai lock dilepas pemegangnya. shared=True:
+    beberapa pembaca boleh memegang bersamaan, tetapi tidak bersamaan dengan
+    lock eksklusif. blocking=False: raise LockBusy alih-alih menunggu.
+    """
+    os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+    with open(lock_path, 'a+') as lock_file:
+        fd = lock_file.fileno()
+        if fcntl:
+            flags = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+            try:
+                fcntl.flock(fd, flags if blocking else flags | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise LockBusy(lock_path)
+        else:
+            # msvcrt tidak punya lock bersama, pembaca memakai lock eksklusif
+            while True:
+                try:
+                    lock_file.seek(0)
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                    break
+                except OSError:
+                    if not blocking:
+                        raise LockBusy(lock_path)
+                    time.sleep(0.1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def atomic_output(final_path):
+    """
+    Memberikan path sementara di folder yang sama dengan final_path.
+    Jika blok selesai tanpa error, file di-rename (atomik) ke final_path,
+    sehingga pembaca tidak pernah melihat file yang setengah ditulis.
+    """
+    with atomic_outputs([final_path]) as (tmp_path,):
+        yield tmp_path
+
+
+@contextmanager
+def atomic_outputs(final_paths):
+    """
+    Seperti atomic_output untuk beberapa file sekaligus: semua file baru
+    di-rename hanya jika blok selesai tanpa error. Jika gagal, tidak ada
+    satu pun file tujuan yang berubah.
+    """
+    tmp_paths = []
+    for final_path in final_paths:
+        directory, filename = os.path.split(final_path)
+        base, ext = os.path.splitext(filename)
+        tmp_paths.append(os.path.join(directory, f".{base}.{uuid.uuid4().hex[:8]}.tmp{ext}"))
+    try:
+        yield tmp_paths
+        for tmp_path, final_path in zip(tmp_paths, final_paths):
+            os.replace(tmp_path, final_path)
+    finally:
+        for tmp_path in tmp_paths:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
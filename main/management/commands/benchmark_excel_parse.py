@@ -0,0 +1,103 @@
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import openpyxl
+from django.core.management.base import BaseCommand
+from openpyxl.cell import WriteOnlyCell
+
+from main.excel import COLUMNS, iter_rows
+
+
+class Command(BaseCommand):
+    help = "Membandingkan parser Excel ingest lama (pandas + openpyxl penuh) dengan pembaca streaming"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=50000, help="Jumlah baris sheet sintetis")
+        parser.add_argument('--runs', type=int, default=3, help="Jumlah pengulangan per parser")
+
+    def make_sheet(self, path, rows):
+        """ Sheet seperti Excel anotasi: link Drive di hyperlink kolom A + kolom metadata """
+        wb = openpyxl.Workbook(write_only=True)
+        ws = wb.create_sheet()
+        ws.append(['Link'] + list(COLUMNS.values()))
+        for number in range(1, rows + 1):
+            file_id = f"{number:033d}"
+            link = WriteOnlyCell(ws, value=f"video {number}")
+            link.hyperlink = f"https://drive.google.com/file/d/{file_id}/view"
+            ws.append([
+                link,
+                f"TVRI_SB_061119_{number:04d}",
+                f"transkripsi otomatis baris {number} " * 3,
+                f"penyelarasan {number}",
+                f"kalimat yang diperagakan nomor {number}",
+                '' if number % 3 else 'gerakan terpotong',
+                f"keterangan {number}",
+                'annotator',
+                number % 2,
+            ])
+        wb.save(path)
+
+    def parse_legacy(self, path):
+        """ Cara lama upload_file: pandas untuk nilai, openpyxl penuh untuk hyperlink, lalu iterrows """
+        import pandas as pd
+
+        df = pd.read_excel(path, engine='openpyxl')
+        ws = openpyxl.load_workbook(path).active
+        links = []
+        for row in ws.iter_rows(min_row=2):
+            cell = row[0]
+            links.append(cell.hyperlink.target if cell.hyperlink else str(cell.value or '').strip())
+        count = 0
+        for idx, row in df.iterrows():
+            if links[idx] and str(row.get('Nama Data')).strip():
+                count += 1
+        return count
+
+    def parse_streaming(self, path):
+        return sum(1 for record in iter_rows(path) if record.link and record.title)
+
+    def measure(self, parser, path, runs):
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            count = parser(path)
+            timings.append(time.perf_counter() - started)
+        # Peak memori diukur terpisah, tracemalloc memperlambat parsing
+        tracemalloc.start()
+        parser(path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return count, timings, peak
+
+    def handle(self, *args, **options):
+        parsers = [('streaming', self.parse_streaming)]
+        try:
+            import pandas  # noqa: F401
+            parsers.insert(0, ('legacy', self.parse_legacy))
+        except ImportError:
+            self.stderr.write("pandas tidak terpasang, parser lama dilewati")
+
+        with tempfile.TemporaryDirectory(prefix='benchmark_excel_') as work_dir:
+            path = os.path.join(work_dir, 'sheet.xlsx')
+            self.stdout.write(f"Membuat sheet sintetis {options['rows']} baris ...")
+            self.make_sheet(path, options['rows'])
+            self.stdout.write(f"Ukuran file: {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+
+            results = {}
+            for name, parser in parsers:
+                count, timings, peak = self.measure(parser, path, options['runs'])
+                results[name] = (statistics.median(timings), peak)
+                self.stdout.write(
+                    f"{name:>9}: median {statistics.median(timings):.2f}s "
+                    f"(min {min(timings):.2f}s), peak memori {peak / 1024 / 1024:.1f} MB, {count} baris valid"
+                )
+
+            if 'legacy' in results:
+                speedup = results['legacy'][0] / results['streaming'][0]
+                memory = results['legacy'][1] / max(results['streaming'][1], 1)
+                self.stdout.write(self.style.SUCCESS(
+                    f"Streaming {speedup:.1f}x lebih cepat, memori {memory:.0f}x lebih kecil"
+                ))
@@ -0,0 +1,81 @@
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from main.media_tools import (
+    SmartCutUnavailable, count_video_packets, get_ffmpeg_binary, probe_video, probe_video_packets,
+    reencode_cut, smart_cut,
+)
+
+
+class Command(BaseCommand):
+    help = "Membandingkan waktu trim smart cut vs re-encode penuh pada klip sintetis"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=20.0, help="Durasi klip sintetis (detik)")
+        parser.add_argument('--size', default='1280x720', help="Resolusi klip sintetis")
+        parser.add_argument('--fps', type=int, default=25)
+        parser.add_argument('--gop', type=int, default=50, help="Jarak keyframe (frame)")
+        parser.add_argument('--runs', type=int, default=3, help="Jumlah pengulangan per mode")
+
+    def make_clip(self, path, options):
+        """ Klip uji: testsrc2 + sine, h264/aac seperti hasil upload """
+        subprocess.run(
+            [
+                get_ffmpeg_binary(), '-y', '-v', 'error',
+                '-f', 'lavfi', '-i', f"testsrc2=size={options['size']}:rate={options['fps']}",
+                '-f', 'lavfi', '-i', 'sine=frequency=440:sample_rate=44100',
+                '-t', str(options['duration']),
+                '-c:v', 'libx264', '-preset', 'veryfast', '-g', str(options['gop']), '-pix_fmt', 'yuv420p',
+                '-c:a', 'aac', '-ac', '2',
+                path,
+            ],
+            capture_output=True, text=True, check=True,
+        )
+
+    def handle(self, *args, **options):
+        duration = options['duration']
+        # Potongan seperti trim biasa: buang sedikit di awal, potong di tengah
+        cuts = [
+            ('keep', duration * 0.03, duration * 0.47),
+            ('remainder', duration * 0.47, duration),
+        ]
+
+        with tempfile.TemporaryDirectory(prefix='benchmark_trim_') as work_dir:
+            source_path = os.path.join(work_dir, 'source.mp4')
+            self.stdout.write(f"Membuat klip sintetis {options['size']} {duration}s ...")
+            self.make_clip(source_path, options)
+            info = probe_video(source_path)
+
+            results = {}
+            for mode in ('reencode', 'smart'):
+                timings = []
+                for run in range(options['runs']):
+                    started = time.perf_counter()
+                    frames = []
+                    for name, start_time, end_time in cuts:
+                        output_path = os.path.join(work_dir, f"{mode}_{name}_{run}.mp4")
+                        if mode == 'smart':
+                            try:
+                                # Probe packet termasuk dalam waktu, sama seperti saat trim
+                                smart_cut(source_path, start_time, end_time, output_path,
+                                          info=info, packets=probe_video_packets(source_path))
+                            except SmartCutUnavailable as e:
+                                self.stderr.write(f"Smart cut tidak dipakai ({name}): {e}")
+                                reencode_cut(source_path, start_time, end_time, output_path, progress_logger=None)
+                        else:
+                            reencode_cut(source_path, start_time, end_time, output_path, progress_logger=None)
+                        frames.append(count_video_packets(output_path))
+                    timings.append(time.perf_counter() - started)
+                results[mode] = timings
+                self.stdout.write(
+                    f"{mode:>8}: median {statistics.median(timings):.2f}s "
+                    f"(min {min(timings):.2f}s, max {max(timings):.2f}s), frame keep/remainder {frames}"
+                )
+
+            speedup = statistics.median(results['reencode']) / statistics.median(results['smart'])
+            self.stdout.write(self.style.SUCCESS(f"Smart cut {speedup:.1f}x lebih cepat"))
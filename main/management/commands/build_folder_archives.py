@@ -0,0 +1,83 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main import archives
+from main.edl import render_pending
+from main.folders import folder_summaries
+from main.models import FolderArchive
+
+
+class Command(BaseCommand):
+    help = "Membangun ulang arsip ZIP folder yang basi, eviction LRU, dan hapus file arsip yatim"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--folder', action='append', default=None,
+            help="Folder yang diarsipkan (boleh berulang), default semua folder yang selesai dianotasi",
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help="Arsipkan semua folder, termasuk yang belum selesai dianotasi",
+        )
+        parser.add_argument(
+            '--max-mb', type=int, default=None,
+            help="Batas ukuran arsip (MB), default FOLDER_ARCHIVE_MAX_BYTES",
+        )
+
+    def handle(self, *args, **options):
+        folders = options['folder']
+        if folders is None:
+            folders = [
+                summary['name'] for summary in folder_summaries()
+                if options['all'] or summary['all_done']
+            ]
+
+        for folder_name in folders:
+            render_pending(folder_name)
+            result = archives.build_folder_archive(folder_name)
+            if result.get('over_budget'):
+                status = "lebih besar dari budget, dilewati"
+            elif result['skipped']:
+                status = "tidak berubah"
+            else:
+                status = f"dibangun ({result['size_bytes'] / 1024 / 1024:.1f} MB)"
+            self.stdout.write(f"{folder_name}: {result['file_count']} video, {status}")
+
+        max_bytes = options['max_mb'] * 1024 * 1024 if options['max_mb'] is not None else None
+        evicted_files, evicted_bytes = archives.enforce_budget(max_bytes=max_bytes)
+        self.stdout.write(f"Eviction LRU: {evicted_files} arsip ({evicted_bytes / 1024 / 1024:.1f} MB)")
+
+        orphan_files, orphan_bytes = self.remove_orphans()
+        self.stdout.write(f"File yatim: {orphan_files} file ({orphan_bytes / 1024 / 1024:.1f} MB)")
+        self.stdout.write(
+            f"Arsip: {FolderArchive.objects.count()} folder, {archives.total_size() / 1024 / 1024:.1f} MB "
+            f"/ {getattr(settings, 'FOLDER_ARCHIVE_MAX_BYTES', 0) / 1024 / 1024:.0f} MB"
+        )
+
+    def remove_orphans(self):
+        archive_dir = os.path.join(settings.MEDIA_ROOT, archives.ARCHIVE_DIR)
+        if not os.path.isdir(archive_dir):
+            return 0, 0
+
+        referenced = set(FolderArchive.objects.values_list('path', flat=True))
+        # File sementara yang lebih muda dari ini mungkin masih sedang ditulis
+        tmp_cutoff = time.time() - 24 * 3600
+
+        count = 0
+        total = 0
+        for filename in os.listdir(archive_dir):
+            full_path = os.path.join(archive_dir, filename)
+            if not os.path.isfile(full_path):
+                continue
+            if filename.startswith('.'):
+                if os.path.getmtime(full_path) > tmp_cutoff:
+                    continue
+            elif os.path.join(archives.ARCHIVE_DIR, filename) in referenced:
+                continue
+            count += 1
+            total += os.path.getsize(full_path)
+            os.remove(full_path)
+        return count, total
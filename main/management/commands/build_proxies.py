@@ -0,0 +1,90 @@
+import os
+import subprocess
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main import proxies
+from main.models import Video
+
+
+class Command(BaseCommand):
+    help = "Membuat proxy resolusi rendah untuk editor yang belum ada, dan hapus proxy yang sudah tidak dipakai"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--folder', action='append', default=None,
+            help="Folder yang diproses (boleh berulang), default semua folder",
+        )
+        parser.add_argument(
+            '--gc', action='store_true',
+            help="Hapus file proxy yang sumbernya sudah berubah atau hilang",
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Hanya hitung proxy yang belum ada (dan yang akan dihapus dengan --gc)",
+        )
+
+    def handle(self, *args, **options):
+        if not proxies.proxies_enabled():
+            self.stdout.write(self.style.WARNING("VIDEO_PROXY_ENABLED=False, proxy tidak dipakai editor"))
+
+        videos = Video.objects.order_by('folder_name', 'sequence', 'title')
+        if options['folder']:
+            videos = videos.filter(folder_name__in=options['folder'])
+
+        checked = built = failed = missing = 0
+        for video in videos.iterator(chunk_size=500):
+            checked += 1
+            sources = proxies.missing_sources(video)
+            if options['dry_run']:
+                missing += len(sources)
+                continue
+            for source in sources:
+                try:
+                    _, created = proxies.build_proxy(source)
+                    built += int(created)
+                except (OSError, subprocess.CalledProcessError) as e:
+                    failed += 1
+                    stderr = getattr(e, 'stderr', '') or ''
+                    self.stderr.write(f"❌ {source}: {e} {stderr.strip()}")
+            if checked % 100 == 0:
+                self.stdout.write(f"... {checked} video diperiksa, {built} proxy dibuat")
+
+        if options['dry_run']:
+            self.stdout.write(f"{checked} video diperiksa, {missing} proxy belum ada")
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Selesai: {checked} video diperiksa, {built} proxy dibuat, {failed} gagal"
+            ))
+
+        if options['gc']:
+            # Referensi dihitung dari semua video, bukan hanya --folder
+            count, total = self.remove_orphans(proxies.referenced_proxies(), options['dry_run'])
+            verb = "akan dihapus" if options['dry_run'] else "dihapus"
+            self.stdout.write(f"Proxy yatim: {count} file ({total / 1024 / 1024:.1f} MB) {verb}")
+
+    def remove_orphans(self, referenced, dry_run=False):
+        proxy_dir = os.path.join(settings.MEDIA_ROOT, proxies.PROXY_DIR)
+        if not os.path.isdir(proxy_dir):
+            return 0, 0
+        # File sementara yang lebih muda dari ini mungkin masih sedang ditulis
+        tmp_cutoff = time.time() - 24 * 3600
+
+        count = 0
+        total = 0
+        for filename in os.listdir(proxy_dir):
+            full_path = os.path.join(proxy_dir, filename)
+            if not os.path.isfile(full_path):
+                continue
+            if filename.startswith('.'):
+                if os.path.getmtime(full_path) > tmp_cutoff:
+                    continue
+            elif os.path.join(proxies.PROXY_DIR, filename) in referenced:
+                continue
+            count += 1
+            total += os.path.getsize(full_path)
+            if not dry_run:
+                os.remove(full_path)
+        return count, total
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from main.uploads import cleanup_sessions
+
+
+class Command(BaseCommand):
+    help = "Menghapus sesi upload resumable yang ditinggalkan beserta file .part-nya"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=float, default=48,
+            help="Sesi yang tidak menerima chunk selama ini (jam) dihapus",
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Hanya tampilkan yang akan dihapus",
+        )
+
+    def handle(self, *args, **options):
+        count, total = cleanup_sessions(options['hours'], dry_run=options['dry_run'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{count} sesi upload dihapus ({total / 1024 / 1024:.1f} MB file sementara)"
+        ))
+        if options['dry_run']:
+            self.stdout.write("(dry run, tidak ada file yang dihapus)")
@@ -0,0 +1,85 @@
+import os
+import struct
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main import merge_cache
+from main.media_tools import ensure_faststart, moov_before_mdat
+from main.uploads import link_or_copy
+
+# Folder di MEDIA_ROOT yang berisi video yang diputar editor
+VIDEO_DIRS = ('videos', 'raw_videos', 'edited_videos')
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.m4v')
+
+
+class Command(BaseCommand):
+    help = "Memindahkan atom moov ke depan (fast-start) untuk video yang sudah ada, tanpa re-encode"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dir', action='append', choices=VIDEO_DIRS, default=None,
+            help="Folder yang diperiksa (boleh berulang), default videos, raw_videos, dan edited_videos",
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Hanya hitung file yang belum fast-start",
+        )
+
+    def iter_files(self, directories):
+        for directory in directories:
+            for root, dirs, files in os.walk(os.path.join(settings.MEDIA_ROOT, directory)):
+                dirs[:] = sorted(d for d in dirs if d not in ('.locks', '.uploads'))
+                for filename in sorted(files):
+                    # Nama diawali titik: file sementara yang mungkin sedang ditulis
+                    if not filename.startswith('.') and filename.lower().endswith(VIDEO_EXTENSIONS):
+                        yield os.path.join(root, filename)
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        checked = fixed = skipped = failed = 0
+        # videos/ dan raw_videos/ sering hardlink ke file yang sama: cukup ditulis ulang sekali
+        rewritten = {}
+
+        for path in self.iter_files(options['dir'] or VIDEO_DIRS):
+            checked += 1
+            try:
+                stat = os.stat(path)
+                inode = (stat.st_dev, stat.st_ino)
+                if inode in rewritten:
+                    if not dry_run:
+                        link_or_copy(rewritten[inode], path)
+                        merge_cache.invalidate_sources([path])
+                    fixed += 1
+                    continue
+                if dry_run:
+                    status = moov_before_mdat(path)
+                    if status is False:
+                        fixed += 1
+                        self.stdout.write(f"moov di belakang: {os.path.relpath(path, settings.MEDIA_ROOT)}")
+                    elif status is None:
+                        skipped += 1
+                    continue
+                if ensure_faststart(path):
+                    fixed += 1
+                    if stat.st_nlink > 1:
+                        # Inode lama masih dipakai path lain, jadi nomornya belum bisa dipakai ulang
+                        rewritten[inode] = path
+                    # Key cache merge memakai mtime, entry lama dari file ini tidak akan terpakai lagi
+                    merge_cache.invalidate_sources([path])
+                elif moov_before_mdat(path) is None:
+                    skipped += 1
+            except (OSError, subprocess.CalledProcessError, struct.error) as e:
+                failed += 1
+                stderr = getattr(e, 'stderr', '') or ''
+                self.stderr.write(f"❌ {os.path.relpath(path, settings.MEDIA_ROOT)}: {e} {stderr.strip()}")
+
+            if checked % 500 == 0:
+                self.stdout.write(f"... {checked} file diperiksa, {fixed} diperbaiki")
+
+        verb = "perlu diperbaiki" if dry_run else "diperbaiki"
+        self.stdout.write(self.style.SUCCESS(
+            f"Selesai: {checked} file diperiksa, {fixed} {verb}, "
+            f"{checked - fixed - skipped - failed} sudah fast-start, {skipped} bukan MP4/MOV, {failed} gagal"
+        ))
@@ -0,0 +1,73 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main import merge_cache
+from main.models import MergedVideoCache, Video
+
+
+class Command(BaseCommand):
+    help = "Membersihkan edited_videos: eviction LRU cache merge dan hapus file merge yatim"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-mb', type=int, default=None,
+            help="Batas ukuran cache merge (MB), default MERGED_CACHE_MAX_BYTES",
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Hanya tampilkan yang akan dihapus",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        max_bytes = options['max_mb'] * 1024 * 1024 if options['max_mb'] is not None else None
+
+        evicted_files, evicted_bytes = merge_cache.enforce_budget(max_bytes=max_bytes, dry_run=dry_run)
+        self.stdout.write(f"Eviction LRU: {evicted_files} file ({evicted_bytes / 1024 / 1024:.1f} MB)")
+
+        # File merge lama (sebelum cache) atau sisa tulis sementara yang tidak dipakai lagi
+        orphan_files, orphan_bytes = self.remove_orphans(dry_run)
+        self.stdout.write(f"File yatim: {orphan_files} file ({orphan_bytes / 1024 / 1024:.1f} MB)")
+
+        stats = merge_cache.cache_stats()
+        hit_ratio = f"{stats['hit_ratio'] * 100:.1f}%" if stats['hit_ratio'] is not None else '-'
+        self.stdout.write(
+            f"Cache: {stats['entries']} file, {stats['total_bytes'] / 1024 / 1024:.1f} MB "
+            f"/ {stats['max_bytes'] / 1024 / 1024:.0f} MB, hit ratio {hit_ratio}, "
+            f"total evicted {stats['evicted_bytes'] / 1024 / 1024:.1f} MB"
+        )
+        if dry_run:
+            self.stdout.write("(dry run, tidak ada file yang dihapus)")
+
+    def remove_orphans(self, dry_run):
+        edited_dir = os.path.join(settings.MEDIA_ROOT, 'edited_videos')
+        if not os.path.isdir(edited_dir):
+            return 0, 0
+
+        referenced = set(
+            Video.objects.exclude(merged_video_path__isnull=True).values_list('merged_video_path', flat=True)
+        )
+        referenced.update(MergedVideoCache.objects.values_list('path', flat=True))
+        # File sementara yang lebih muda dari ini mungkin masih sedang ditulis
+        tmp_cutoff = time.time() - 24 * 3600
+
+        count = 0
+        total = 0
+        for root, dirs, files in os.walk(edited_dir):
+            dirs[:] = [d for d in dirs if d != '.locks']
+            for filename in files:
+                full_path = os.path.join(root, filename)
+                relative_path = os.path.relpath(full_path, settings.MEDIA_ROOT)
+                if filename.startswith('.'):
+                    if os.path.getmtime(full_path) > tmp_cutoff:
+                        continue
+                elif relative_path in referenced:
+                    continue
+                count += 1
+                total += os.path.getsize(full_path)
+                if not dry_run:
+                    os.remove(full_path)
+        return count, total
@@ -0,0 +1,56 @@
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+
+from main.metadata import is_fresh, probe_file, store_metadata
+from main.models import Video, VideoMetadata
+
+
+class Command(BaseCommand):
+    help = "Mengisi metadata media (durasi, fps, codec, keyframe) untuk video yang sudah ada"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 4,
+            help="Jumlah ffprobe yang berjalan paralel",
+        )
+        parser.add_argument('--folder', help="Hanya video di folder ini")
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Probe ulang walaupun metadata masih berlaku",
+        )
+
+    def handle(self, *args, **options):
+        videos = Video.objects.all().order_by('folder_name', 'title')
+        if options['folder']:
+            videos = videos.filter(folder_name=options['folder'])
+
+        existing = {metadata.video_id: metadata for metadata in VideoMetadata.objects.all()}
+        pending = []
+        for video in videos:
+            metadata = existing.get(video.id)
+            if options['force'] or not metadata or not is_fresh(metadata, video.file.path):
+                pending.append(video)
+
+        self.stdout.write(f"{len(pending)} video perlu di-probe ({videos.count() - len(pending)} sudah terbaru)")
+
+        probed = failed = 0
+        # ffprobe berjalan di subprocess, thread cukup untuk paralel; tulis DB tetap di thread utama
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as executor:
+            futures = {executor.submit(probe_file, video.file.path): video for video in pending}
+            for future in as_completed(futures):
+                video = futures[future]
+                try:
+                    store_metadata(video, future.result())
+                    probed += 1
+                except (OSError, subprocess.CalledProcessError, ValueError) as e:
+                    failed += 1
+                    self.stderr.write(f"❌ {video.title}: {e}")
+
+                done = probed + failed
+                if done % 100 == 0:
+                    self.stdout.write(f"... {done}/{len(pending)}")
+
+        self.stdout.write(self.style.SUCCESS(f"Selesai: {probed} video di-probe, {failed} gagal"))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+
+from main.edl import pending_videos, render_video
+from main.jobs import enqueue_job
+from main.models import VideoJob
+
+
+class Command(BaseCommand):
+    help = "Menulis trim EDL yang belum di-render ke file video, satu kali per segmen"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--folder', help="Hanya video di folder ini")
+        parser.add_argument(
+            '--enqueue', action='store_true',
+            help="Masukkan ke antrian worker alih-alih render langsung",
+        )
+
+    def handle(self, *args, **options):
+        videos = list(pending_videos(options['folder']))
+        self.stdout.write(f"{len(videos)} video perlu di-render")
+
+        if options['enqueue']:
+            for video in videos:
+                enqueue_job(VideoJob.KIND_RENDER, video)
+            self.stdout.write(self.style.SUCCESS(f"{len(videos)} job render masuk antrian"))
+            return
+
+        failed = 0
+        for video in videos:
+            try:
+                render_video(video)
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"❌ {video.title}: {e}")
+        self.stdout.write(self.style.SUCCESS(f"Selesai: {len(videos) - failed} video di-render, {failed} gagal"))
@@ -0,0 +1,104 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from main.jobs import claim_next_job, fail_job, heartbeat_jobs, requeue_job, requeue_stale_jobs, run_job_in_worker
+
+
+class Command(BaseCommand):
+    help = "Menjalankan worker yang memproses antrian job merge/trim video"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int,
+            default=getattr(settings, 'VIDEO_WORKER_PROCESSES', 2),
+            help="Jumlah process encode yang berjalan bersamaan",
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help="Jeda (detik) antar pengecekan job baru",
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Proses job yang ada lalu berhenti",
+        )
+
+    def make_pool(self, processes):
+        # fork: child mewarisi setup Django dari process ini
+        return ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('fork'))
+
+    def handle(self, *args, **options):
+        processes = max(1, options['processes'])
+        poll_interval = options['poll_interval']
+        heartbeat_interval = getattr(settings, 'VIDEO_JOB_HEARTBEAT_SECONDS', 10)
+        stale_seconds = getattr(settings, 'VIDEO_JOB_STALE_SECONDS', 120)
+
+        self.stdout.write(f"Video worker berjalan dengan {processes} process")
+        running = {}
+        last_heartbeat = 0.0
+        broken = False
+        pool = self.make_pool(processes)
+        try:
+            while True:
+                if time.monotonic() - last_heartbeat >= heartbeat_interval:
+                    last_heartbeat = time.monotonic()
+                    heartbeat_jobs(list(running.values()))
+                    # Job milik worker lain yang mati (tanpa heartbeat) dikembalikan ke antrian
+                    stale = requeue_stale_jobs(stale_seconds)
+                    if stale:
+                        self.stdout.write(f"{stale} job running yang terbengkalai dikembalikan ke antrian")
+
+                while len(running) < processes:
+                    # Job spekulatif (prefetch) tidak boleh memakai slot terakhir,
+                    # supaya merge/trim dari user tidak ikut mengantri
+                    allow_speculative = processes == 1 or len(running) + 1 < processes
+                    job_id = claim_next_job(allow_speculative=allow_speculative)
+                    if job_id is None:
+                        break
+                    # Koneksi DB tidak boleh dipakai bersama oleh process hasil fork
+                    connections.close_all()
+                    try:
+                        running[pool.submit(run_job_in_worker, job_id)] = job_id
+                    except BrokenProcessPool:
+                        # Job belum sempat jalan: kembalikan ke antrian, pool dibuat ulang di bawah
+                        requeue_job(job_id)
+                        broken = True
+                        break
+                    self.stdout.write(f"Job {job_id} dimulai")
+
+                if not running and not broken:
+                    if options['once']:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                done, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id = running.pop(future)
+                    try:
+                        ok = future.result()
+                    except Exception as e:
+                        # Process encode mati (crash, OOM kill): job tidak akan selesai sendiri
+                        ok = False
+                        broken = broken or isinstance(e, BrokenProcessPool)
+                        self.stderr.write(f"Job {job_id} crash: {e!r}")
+                        fail_job(job_id, f"Job crash di process worker: {e!r}")
+                    self.stdout.write(f"Job {job_id} {'selesai' if ok else 'gagal'}")
+
+                if broken:
+                    # Pool yang rusak menolak semua submit berikutnya, ganti dengan pool baru
+                    self.stderr.write("Process pool rusak, membuat pool baru")
+                    for job_id in running.values():
+                        fail_job(job_id, "Process worker berhenti tiba-tiba")
+                    running.clear()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = self.make_pool(processes)
+                    broken = False
+                    continue
+        finally:
+            pool.shutdown(wait=True)
@@ -0,0 +1,240 @@
+"""
+Pengiriman file media dan download besar dengan dukungan HTTP Range.
+
+serve_file dipakai oleh URL /media/ (video di editor, hasil merge),
+download_video, dan arsip folder. File dikirim dengan Content-Length,
+Accept-Ranges, ETag (ukuran + mtime) dan Last-Modified:
+
+- If-None-Match / If-Modified-Since yang cocok dijawab 304 tanpa isi,
+  If-Match / If-Unmodified-Since yang gagal dijawab 412.
+- Range satu rentang (bytes=a-b, a-, -n) dijawab 206 berisi potongan itu
+  saja, sehingga seek di timeline editor hanya mengambil byte yang perlu.
+  Beberapa rentang sekaligus dijawab 206 multipart/byteranges.
+- If-Range yang tidak cocok dengan ETag/Last-Modified membuat file dikirim
+  utuh (file sudah berganti, misal karena trim, sejak potongan sebelumnya).
+
+File utuh dan satu rentang dikirim lewat FileResponse, jadi server WSGI
+yang wsgi.file_wrapper-nya memakai sendfile (gunicorn) mengirimnya
+langsung dari page cache tanpa menyalin ke Python; runserver membacanya
+per MEDIA_BLOCK_SIZE.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+import uuid
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden, HttpResponseNotAllowed, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+COPY_CHUNK_SIZE = 1024 * 1024
+# Ukuran baca per iterasi jika server tidak memakai sendfile
+MEDIA_BLOCK_SIZE = 256 * 1024
+RANGE_SPEC_RE = re.compile(r'^(\d*)-(\d*)$')
+# Request dengan rentang lebih banyak dari ini dijawab file utuh
+MAX_RANGES = 16
+# Folder di MEDIA_ROOT yang tidak pernah dilayani lewat MEDIA_URL
+PRIVATE_DIRS = {'.locks', '.uploads'}
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_ranges(header, size):
+    """
+    List (start, end) inklusif, urut dan sudah digabung, untuk header Range.
+    None jika header tidak ada atau tidak valid (file dikirim utuh). Raise
+    RangeNotSatisfiable jika tidak ada rentang yang berada di dalam file.
+    """
+    header = (header or '').strip()
+    if not header.startswith('bytes='):
+        return None
+    specs = [spec.strip() for spec in header[len('bytes='):].split(',') if spec.strip()]
+    if not specs or len(specs) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for spec in specs:
+        match = RANGE_SPEC_RE.match(spec)
+        if not match or match.group(1) == match.group(2) == '':
+            return None
+        first, last = match.groups()
+        if first == '':
+            # bytes=-n: n byte terakhir
+            length = int(last)
+            if length > 0 and size > 0:
+                ranges.append((max(size - length, 0), size - 1))
+            continue
+        start = int(first)
+        end = int(last) if last else size - 1
+        if last and end < start:
+            return None
+        if start < size:
+            ranges.append((start, min(end, size - 1)))
+    if not ranges:
+        raise RangeNotSatisfiable
+
+    # Rentang yang tumpang tindih atau bersebelahan dikirim sebagai satu bagian
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class FileRange:
+    """
+    File-like yang hanya membaca length byte mulai dari start. fileno()
+    diteruskan supaya sendfile di server WSGI mengirim langsung dari offset
+    file (panjangnya dibatasi Content-Length).
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        if size <= 0:
+            return b''
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def _iter_multipart(file, ranges, headers, boundary, chunk_size=COPY_CHUNK_SIZE):
+    with file:
+        for (start, end), header in zip(ranges, headers):
+            yield header
+            file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                data = file.read(min(chunk_size, remaining))
+                if not data:
+                    return
+                remaining -= len(data)
+                yield data
+            yield b'\r\n'
+        yield f'--{boundary}--\r\n'.encode()
+
+
+def file_etag(stat):
+    """ ETag dari ukuran dan mtime: berubah setiap kali file ditimpa (trim, render, upload ulang) """
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def _if_range_matches(if_range, etag, mtime):
+    if if_range.startswith('"'):
+        return if_range == etag
+    if if_range.startswith('W/'):
+        # If-Range hanya boleh memakai ETag kuat
+        return False
+    return parse_http_date_safe(if_range) == mtime
+
+
+def serve_file(request, path, content_type=None, filename=None):
+    """
+    Response GET/HEAD untuk file di path: 200 utuh, 206 satu atau beberapa
+    rentang, 304/412 dari header kondisional, atau 416. filename membuat
+    browser menyimpan file (Content-Disposition attachment).
+    """
+    stat = os.stat(path)
+    size = stat.st_size
+    mtime = int(stat.st_mtime)
+    etag = file_etag(stat)
+    if content_type is None:
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+    def finish(response):
+        response['Accept-Ranges'] = 'bytes'
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(mtime)
+        # Video bisa ditimpa di URL yang sama, browser wajib revalidasi (murah: 304)
+        response['Cache-Control'] = 'no-cache'
+        if filename:
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    conditional = get_conditional_response(request, etag=etag, last_modified=mtime)
+    if conditional is not None:
+        return finish(conditional)
+
+    ranges = None
+    if_range = request.headers.get('If-Range')
+    if not if_range or _if_range_matches(if_range.strip(), etag, mtime):
+        try:
+            ranges = parse_ranges(request.headers.get('Range'), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return finish(response)
+
+    head = request.method == 'HEAD'
+    if ranges is None or len(ranges) == 1:
+        start, end = ranges[0] if ranges else (0, size - 1)
+        length = end - start + 1
+        status = 206 if ranges else 200
+        if head:
+            response = HttpResponse(status=status, content_type=content_type)
+        else:
+            # FileResponse: sendfile lewat wsgi.file_wrapper jika server mendukung
+            response = FileResponse(FileRange(open(path, 'rb'), start, length), status=status, content_type=content_type)
+            response.block_size = MEDIA_BLOCK_SIZE
+        if ranges:
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    else:
+        boundary = uuid.uuid4().hex
+        headers = [
+            f'--{boundary}\r\nContent-Type: {content_type}\r\nContent-Range: bytes {start}-{end}/{size}\r\n\r\n'.encode()
+            for start, end in ranges
+        ]
+        length = sum(len(header) + end - start + 1 + 2 for header, (start, end) in zip(headers, ranges))
+        length += len(f'--{boundary}--\r\n')
+        multipart_type = f'multipart/byteranges; boundary={boundary}'
+        if head:
+            response = HttpResponse(status=206, content_type=multipart_type)
+        else:
+            response = StreamingHttpResponse(
+                _iter_multipart(open(path, 'rb'), ranges, headers, boundary), status=206, content_type=multipart_type,
+            )
+    response['Content-Length'] = str(length)
+    return finish(response)
+
+
+def serve_media(request, path):
+    """
+    View untuk MEDIA_URL: file di MEDIA_ROOT dengan Range dan ETag (pengganti
+    django.views.static.serve). Hanya untuk user yang login: video, arsip
+    folder, dan file sementara bukan konten publik.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    if not request.user.is_authenticated:
+        # 403, bukan redirect ke login: file dimuat lewat <video> atau download
+        return HttpResponseForbidden('Login diperlukan')
+    path = posixpath.normpath(path).lstrip('/')
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('File tidak ditemukan')
+    # File sementara atomic_output (nama diawali titik), lock, dan upload yang belum selesai
+    # tidak dilayani; folder .edl tetap dilayani karena editor memutar sumber EDL dari sana
+    parts = path.split('/')
+    if parts[-1].startswith('.') or PRIVATE_DIRS.intersection(parts) or not os.path.isfile(full_path):
+        raise Http404('File tidak ditemukan')
+    return serve_file(request, full_path)
@@ -0,0 +1,488 @@
+"""
+Helper ffmpeg/ffprobe untuk proses merge video.
+
+Merge n + n+1 dilakukan dengan concat demuxer ffmpeg (stream copy, tanpa
+re-encode) jika kedua segmen punya stream yang kompatibel. Kalau tidak
+kompatibel, fallback ke re-encode dengan moviepy seperti sebelumnya.
+
+Semua output ditulis fast-start (atom moov di depan mdat), supaya browser
+bisa mulai memutar setelah membaca awal file, tanpa mengambil ujung file
+lebih dulu. File dari luar (Drive, upload) dinormalisasi dengan
+ensure_faststart: stream copy, tanpa re-encode.
+"""
+import json
+import logging
+import os
+import struct
+import subprocess
+import tempfile
+
+import proglog
+from django.conf import settings
+
+from .locks import atomic_output
+
+logger = logging.getLogger(__name__)
+
+# Argumen muxer mp4 agar moov ditulis di depan (ffmpeg menggeser moov setelah selesai menulis)
+FASTSTART_ARGS = ['-movflags', '+faststart']
+
+
+def get_ffmpeg_binary():
+    return getattr(settings, 'FFMPEG_BINARY', 'ffmpeg')
+
+
+def get_ffprobe_binary():
+    return getattr(settings, 'FFPROBE_BINARY', 'ffprobe')
+
+
+class EncodeProgressLogger(proglog.ProgressBarLogger):
+    """ Logger moviepy yang meneruskan progress encode frame ke callback """
+
+    def __init__(self, callback, start=0.0, end=1.0):
+        super().__init__()
+        self.on_progress = callback
+        self.start = start
+        self.end = end
+
+    def bars_callback(self, bar, attr, value, old_value=None):
+        if bar != 'frame_index' or attr != 'index':
+            return
+        total = self.bars[bar].get('total') or 0
+        if total:
+            fraction = min(1.0, (value + 1) / total)
+            self.on_progress(self.start + (self.end - self.start) * fraction)
+
+
+def probe_video(path):
+    """ Membaca informasi stream dan durasi video dengan ffprobe """
+    result = subprocess.run(
+        [
+            get_ffprobe_binary(), '-v', 'error',
+            '-show_format', '-show_streams',
+            '-of', 'json', path,
+        ],
+        capture_output=True, text=True, check=True,
+    )
+    data = json.loads(result.stdout)
+
+    video_stream = next((s for s in data.get('streams', []) if s.get('codec_type') == 'video'), None)
+    audio_stream = next((s for s in data.get('streams', []) if s.get('codec_type') == 'audio'), None)
+
+    format_info = data.get('format', {})
+    info = {
+        'duration': float(format_info.get('duration') or 0),
+        'bit_rate': int(format_info['bit_rate']) if format_info.get('bit_rate') else None,
+        'video': None,
+        'audio': None,
+    }
+    if video_stream:
+        info['video'] = {
+            'codec': video_stream.get('codec_name'),
+            'profile': video_stream.get('profile'),
+            'level': video_stream.get('level'),
+            'width': video_stream.get('width'),
+            'height': video_stream.get('height'),
+            'pix_fmt': video_stream.get('pix_fmt'),
+            'fps': video_stream.get('r_frame_rate'),
+            'time_base': video_stream.get('time_base'),
+        }
+    if audio_stream:
+        info['audio'] = {
+            'codec': audio_stream.get('codec_name'),
+            'sample_rate': int(audio_stream['sample_rate']) if audio_stream.get('sample_rate') else None,
+            'channels': audio_stream.get('channels'),
+            'channel_layout': audio_stream.get('channel_layout'),
+        }
+    return info
+
+
+def probe_video_packets(path):
+    """ Daftar (pts_time, is_keyframe) setiap frame video, urut waktu, dibaca tanpa decode """
+    result = subprocess.run(
+        [
+            get_ffprobe_binary(), '-v', 'error',
+            '-select_streams', 'v:0',
+            '-show_entries', 'packet=pts_time,flags',
+            '-of', 'csv=print_section=0', path,
+        ],
+        capture_output=True, text=True, check=True,
+    )
+    packets = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(',')
+        if pts_time not in ('', 'N/A'):
+            packets.append((float(pts_time), 'K' in flags))
+    return sorted(packets)
+
+
+def probe_keyframes(path):
+    """ Waktu (detik) setiap keyframe video """
+    return [pts_time for pts_time, is_keyframe in probe_video_packets(path) if is_keyframe]
+
+
+def streams_compatible(info1, info2):
+    """ Cek apakah dua video bisa digabung dengan stream copy """
+    if not info1['video'] or not info2['video']:
+        return False
+    # Codec, resolusi, fps, dan layout audio harus sama persis
+    return info1['video'] == info2['video'] and info1['audio'] == info2['audio']
+
+
+def moov_before_mdat(path):
+    """
+    Cek urutan atom top-level MP4/MOV tanpa membaca isi stream. True jika
+    moov ada sebelum mdat (fast-start), False jika mdat lebih dulu, None
+    jika bukan file MP4/MOV.
+    """
+    with open(path, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        offset = 0
+        while offset + 8 <= file_size:
+            f.seek(offset)
+            box_size, box_type = struct.unpack('>I4s', f.read(8))
+            if box_size == 1:
+                # Ukuran 64-bit di 8 byte berikutnya
+                box_size = struct.unpack('>Q', f.read(8))[0]
+            elif box_size == 0:
+                # Atom terakhir, sampai akhir file
+                box_size = file_size - offset
+            if box_type == b'moov':
+                return True
+            if box_type == b'mdat':
+                return False
+            if box_size < 8:
+                return None
+            offset += box_size
+    return None
+
+
+def faststart_copy(source_path, output_path):
+    """ Tulis ulang container dengan moov di depan (stream copy, tanpa re-encode) """
+    subprocess.run(
+        [
+            get_ffmpeg_binary(), '-y', '-v', 'error',
+            '-i', source_path,
+            '-map', '0', '-c', 'copy', *FASTSTART_ARGS,
+            output_path,
+        ],
+        capture_output=True, text=True, check=True,
+    )
+
+
+def ensure_faststart(path):
+    """
+    Pindahkan moov ke depan jika belum. File diganti secara atomik (mtime
+    ikut berubah, jadi ETag dan key cache merge ikut berganti). Return True
+    jika file ditulis ulang, False jika sudah fast-start atau bukan MP4/MOV.
+    """
+    if moov_before_mdat(path) is not False:
+        return False
+    with atomic_output(path) as tmp_path:
+        faststart_copy(path, tmp_path)
+    return True
+
+
+def try_faststart(path):
+    """ ensure_faststart untuk ingest: file yang gagal di-remux dibiarkan apa adanya (tetap bisa diputar) """
+    try:
+        return ensure_faststart(path)
+    except (OSError, subprocess.CalledProcessError, struct.error) as e:
+        stderr = getattr(e, 'stderr', '') or ''
+        logger.warning(f"Fast-start gagal untuk {path}: {e} {stderr.strip()}")
+        return False
+
+
+def concat_stream_copy(paths, output_path, durations=None):
+    """
+    Menggabungkan video dengan concat demuxer ffmpeg tanpa re-encode.
+    durations (sejajar dengan paths, opsional) menentukan posisi mulai file
+    berikutnya, misal agar timeline proxy sama persis dengan file asli.
+    """
+    list_fd, list_path = tempfile.mkstemp(suffix='.txt', prefix='concat_')
+    try:
+        with os.fdopen(list_fd, 'w') as list_file:
+            for index, path in enumerate(paths):
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                list_file.write(f"file '{escaped}'\n")
+                if durations and durations[index]:
+                    list_file.write(f"duration {durations[index]:.6f}\n")
+
+        subprocess.run(
+            [
+                get_ffmpeg_binary(), '-y', '-v', 'error',
+                '-f', 'concat', '-safe', '0', '-i', list_path,
+                '-c', 'copy', '-map', '0', *FASTSTART_ARGS,
+                output_path,
+            ],
+            capture_output=True, text=True, check=True,
+        )
+    finally:
+        os.remove(list_path)
+
+
+def encode_proxy(source_path, output_path, height, crf, threads=None):
+    """
+    Rendisi kecil untuk editor: tinggi maksimal height (tidak diperbesar),
+    libx264 CRF crf, keyframe tiap detik agar seek cepat, audio AAC mono,
+    fast-start. Timestamp mengikuti file asli, jadi titik potong di proxy
+    berlaku untuk file asli.
+    """
+    args = [
+        get_ffmpeg_binary(), '-y', '-v', 'error',
+        '-i', source_path,
+        '-map', '0:v:0', '-map', '0:a:0?',
+        '-vf', f"scale=-2:'2*trunc(min(ih,{int(height)})/2)'",
+        '-c:v', 'libx264', '-preset', 'veryfast', '-crf', str(crf), '-pix_fmt', 'yuv420p',
+        '-force_key_frames', 'expr:gte(t,n_forced*1)',
+        '-c:a', 'aac', '-b:a', '64k', '-ac', '1',
+    ]
+    if threads:
+        args += ['-threads', str(threads)]
+    subprocess.run([*args, *FASTSTART_ARGS, output_path], capture_output=True, text=True, check=True)
+
+
+class SmartCutUnavailable(Exception):
+    """ Smart cut tidak bisa dipakai untuk file/rentang ini, pakai re-encode penuh """
+
+
+# Codec yang bisa di-encode ulang dengan parameter sama untuk potongan tepi
+SMART_CUT_VIDEO_CODECS = {'h264'}
+SMART_CUT_AUDIO_CODECS = {'aac', None}
+# Kualitas encode GOP tepi (libx264 CRF), cukup tinggi agar tidak terlihat beda
+SMART_CUT_CRF = 18
+X264_PROFILES = {
+    'Constrained Baseline': 'baseline',
+    'Baseline': 'baseline',
+    'Main': 'main',
+    'High': 'high',
+}
+
+
+def _edge_encode_args(info, threads=None):
+    """ Argumen encode GOP tepi agar streamnya sama dengan bagian yang di-copy """
+    video_info = info['video']
+    args = ['-c:v', 'libx264', '-preset', 'veryfast', '-crf', str(SMART_CUT_CRF)]
+    if threads:
+        args += ['-threads', str(threads)]
+    if video_info.get('pix_fmt'):
+        args += ['-pix_fmt', video_info['pix_fmt']]
+    if video_info.get('profile') in X264_PROFILES:
+        args += ['-profile:v', X264_PROFILES[video_info['profile']]]
+    if (video_info.get('level') or 0) > 0:
+        # level ffprobe h264 = level x 10, misal 40 -> 4.0
+        args += ['-level:v', f"{video_info['level'] / 10:.1f}"]
+    audio_info = info['audio']
+    if audio_info:
+        args += ['-c:a', 'aac']
+        if audio_info.get('sample_rate'):
+            args += ['-ar', str(audio_info['sample_rate'])]
+        if audio_info.get('channels'):
+            args += ['-ac', str(audio_info['channels'])]
+    return args
+
+
+def plan_smart_cut(packets, start_time, end_time):
+    """
+    Membagi rentang [start_time, end_time) menjadi GOP tepi dan GOP utuh.
+    Return (copy_start, copy_end): bagian tengah yang bisa di-copy, dimulai
+    dan diakhiri di keyframe. Raise SmartCutUnavailable jika tidak ada GOP utuh.
+    """
+    inside = [t for t, is_keyframe in packets if is_keyframe and start_time - 1e-6 <= t <= end_time + 1e-6]
+    if len(inside) < 2:
+        raise SmartCutUnavailable('Tidak ada GOP utuh di dalam rentang trim')
+    return inside[0], inside[-1]
+
+
+def count_video_packets(path):
+    """ Jumlah frame (packet) video tanpa decode """
+    result = subprocess.run(
+        [
+            get_ffprobe_binary(), '-v', 'error',
+            '-select_streams', 'v:0', '-count_packets',
+            '-show_entries', 'stream=nb_read_packets',
+            '-of', 'csv=p=0', path,
+        ],
+        capture_output=True, text=True, check=True,
+    )
+    return int(result.stdout.strip())
+
+
+def decode_errors(path):
+    """ Decode seluruh file tanpa output. Return pesan error ffmpeg, string kosong jika bersih """
+    result = subprocess.run(
+        [get_ffmpeg_binary(), '-v', 'error', '-i', path, '-f', 'null', '-'],
+        capture_output=True, text=True,
+    )
+    errors = result.stderr.strip()
+    if result.returncode and not errors:
+        errors = f"ffmpeg keluar dengan kode {result.returncode}"
+    return errors
+
+
+def smart_cut(source_path, start_time, end_time, output_path, info=None, packets=None, threads=None):
+    """
+    Trim dengan stream copy untuk GOP utuh dan re-encode hanya GOP tepi.
+
+    Bagian [start, k1) dan [k2, end) di-encode ulang (akurat per frame),
+    bagian [k1, k2) di-copy apa adanya. Setiap bagian dibatasi jumlah frame,
+    lalu disambung dengan concat demuxer (SPS/PPS hasil encode ulang ikut
+    dibawa in-band oleh auto_convert). GOP tepi di-encode dengan profile dan
+    level sumber, dan hasilnya di-decode penuh sebelum dipakai karena
+    decoder bisa menolak campuran SPS/PPS encode ulang dan hasil copy.
+    Return jumlah frame hasil. Raise SmartCutUnavailable jika codec tidak
+    didukung, jumlah frame meleset, atau hasilnya gagal di-decode.
+    """
+    info = info or probe_video(source_path)
+    if not info['video'] or info['video']['codec'] not in SMART_CUT_VIDEO_CODECS:
+        raise SmartCutUnavailable(f"Codec video tidak didukung: {info['video']}")
+    if (info['audio'] or {}).get('codec') not in SMART_CUT_AUDIO_CODECS:
+        raise SmartCutUnavailable(f"Codec audio tidak didukung: {info['audio']}")
+
+    if packets is None:
+        packets = probe_video_packets(source_path)
+    copy_start, copy_end = plan_smart_cut(packets, start_time, end_time)
+
+    def frames_between(part_start, part_end):
+        return sum(1 for t, _ in packets if part_start - 1e-6 <= t < part_end - 1e-6)
+
+    ffmpeg = get_ffmpeg_binary()
+    edge_args = _edge_encode_args(info, threads)
+    plan = [
+        (start_time, copy_start, edge_args),
+        (copy_start, copy_end, ['-c', 'copy']),
+        (copy_end, end_time, edge_args),
+    ]
+    summary = ", ".join(
+        f"{'copy' if args is not edge_args else 'encode'} {part_start:.3f}-{part_end:.3f}"
+        for part_start, part_end, args in plan
+    )
+    logger.info(f"Smart cut {os.path.basename(source_path)}: {summary}")
+
+    expected_frames = 0
+    with tempfile.TemporaryDirectory(prefix='smartcut_') as work_dir:
+        parts = []
+        for part_start, part_end, codec_args in plan:
+            frames = frames_between(part_start, part_end)
+            if frames <= 0:
+                continue
+            part_path = os.path.join(work_dir, f"part{len(parts)}.mp4")
+            # Seek sebelum -i: encode -> akurat per frame, copy -> mulai tepat di keyframe.
+            # -frames:v membatasi video (copy dengan -t saja ikut membawa GOP berikutnya)
+            subprocess.run(
+                [
+                    ffmpeg, '-y', '-v', 'error',
+                    '-ss', f"{part_start:.6f}", '-i', source_path,
+                    '-frames:v', str(frames), '-t', f"{part_end - part_start:.6f}",
+                    '-map', '0:v:0', '-map', '0:a:0?',
+                    *codec_args,
+                    part_path,
+                ],
+                capture_output=True, text=True, check=True,
+            )
+            parts.append(part_path)
+            expected_frames += frames
+
+        concat_stream_copy(parts, output_path)
+
+    # Validasi hasil: jumlah frame harus persis, kalau tidak pakai re-encode penuh
+    output_frames = count_video_packets(output_path)
+    if output_frames != expected_frames:
+        raise SmartCutUnavailable(f"Smart cut menghasilkan {output_frames} frame, seharusnya {expected_frames}")
+    errors = decode_errors(output_path)
+    if errors:
+        raise SmartCutUnavailable(f"Hasil smart cut gagal di-decode: {errors[:500]}")
+    return output_frames
+
+
+def reencode_cut(source_path, start_time, end_time, output_path, progress_logger='bar', threads=None):
+    """ Trim dengan moviepy, seluruh rentang di-encode ulang (libx264/aac) """
+    from moviepy.video.io.VideoFileClip import VideoFileClip
+
+    # Clip sendiri per pemanggilan, close() tidak boleh menutup reader milik bagian lain
+    source_clip = VideoFileClip(source_path)
+    try:
+        part_clip = source_clip.subclipped(start_time, min(end_time, source_clip.duration))
+        part_clip.write_videofile(
+            output_path, codec="libx264", audio_codec="aac", threads=threads, ffmpeg_params=FASTSTART_ARGS,
+            # File audio sementara di folder output, bukan di working directory
+            temp_audiofile_path=os.path.dirname(output_path) or '.',
+            logger=progress_logger,
+        )
+        part_clip.close()
+    finally:
+        source_clip.close()
+
+
+def cut_video(source_path, start_time, end_time, output_path, smart=True, info=None, packets=None,
+              threads=None, progress_logger='bar'):
+    """
+    Menulis rentang [start_time, end_time) dari source_path ke output_path.
+    Smart cut jika diizinkan dan memungkinkan, kalau tidak re-encode penuh.
+    Tidak memakai database, aman dijalankan di process lain. Return mode yang dipakai.
+    """
+    if smart:
+        try:
+            smart_cut(source_path, start_time, end_time, output_path,
+                      info=info, packets=packets, threads=threads)
+            return 'smart'
+        except (SmartCutUnavailable, subprocess.CalledProcessError, OSError) as e:
+            stderr = getattr(e, 'stderr', '') or ''
+            logger.warning(f"Smart cut tidak dipakai untuk {os.path.basename(source_path)}, re-encode penuh: {e} {stderr.strip()}")
+    reencode_cut(source_path, start_time, end_time, output_path, progress_logger=progress_logger, threads=threads)
+    return 'reencode'
+
+
+def concat_reencode(paths, output_path, progress_logger='bar'):
+    """ Menggabungkan video dengan moviepy (re-encode libx264) """
+    from moviepy import concatenate_videoclips
+    from moviepy.video.io.VideoFileClip import VideoFileClip
+
+    clips = [VideoFileClip(path) for path in paths]
+    try:
+        merged_clip = concatenate_videoclips(clips)
+        merged_clip.write_videofile(output_path, codec="libx264", ffmpeg_params=FASTSTART_ARGS, logger=progress_logger)
+        merged_clip.close()
+        return [clip.duration for clip in clips]
+    finally:
+        for clip in clips:
+            clip.close()
+
+
+def concat_video_files(paths, output_path, progress_logger='bar', infos=None):
+    """
+    Menggabungkan beberapa video berurutan ke output_path: stream copy jika
+    semua stream kompatibel, kalau tidak re-encode. infos (hasil probe_video,
+    sejajar dengan paths) bisa diberikan agar tidak probe ulang.
+    Return (durations, mode): durasi tiap input dan mode 'copy' atau 'reencode'.
+    """
+    infos = list(infos or [None] * len(paths))
+    try:
+        infos = [info or probe_video(path) for path, info in zip(paths, infos)]
+    except (OSError, subprocess.CalledProcessError, ValueError) as e:
+        logger.warning(f"ffprobe gagal, fallback ke re-encode: {e}")
+        infos = None
+
+    if infos and all(streams_compatible(infos[0], info) for info in infos[1:]):
+        try:
+            concat_stream_copy(paths, output_path)
+            # Concat demuxer menggeser timestamp tiap input sebesar durasi container sebelumnya
+            return [info['duration'] for info in infos], 'copy'
+        except (OSError, subprocess.CalledProcessError) as e:
+            stderr = getattr(e, 'stderr', '') or ''
+            logger.warning(f"Stream copy gagal, fallback ke re-encode: {e} {stderr.strip()}")
+    elif infos:
+        logger.info(f"Stream tidak kompatibel, re-encode: {infos}")
+
+    return concat_reencode(paths, output_path, progress_logger), 'reencode'
+
+
+def merge_video_files(path1, path2, output_path, progress_logger='bar', info1=None, info2=None):
+    """
+    Menggabungkan video n dan n+1 ke output_path.
+    info1/info2 (hasil probe_video) bisa diberikan agar tidak probe ulang.
+    Return (video_n_duration, mode) dengan mode 'copy' atau 'reencode'.
+    """
+    durations, mode = concat_video_files([path1, path2], output_path, progress_logger, infos=[info1, info2])
+    # Marker tepat di durasi video n
+    return durations[0], mode
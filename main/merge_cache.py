@@ -0,0 +1,179 @@
+"""
+Cache file hasil merge yang dialamatkan dengan hash input.
+
+Key cache adalah hash dari path, ukuran, dan mtime kedua segmen, sehingga
+pasangan yang sama dipakai ulang lintas request, dan pasangan yang sudah
+di-trim (mtime berubah) otomatis mendapat key baru. Total ukuran cache
+dibatasi MERGED_CACHE_MAX_BYTES dengan eviction LRU berdasarkan
+last_accessed_at; file yang sedang dibaca trim tidak ikut di-evict. Lihat
+juga `python manage.py gc_merged_videos`.
+"""
+import hashlib
+import logging
+import os
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .locks import LockBusy, file_lock
+from .models import MergedVideoCache, StatCounter, Video, VideoJob
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.path.join('edited_videos', 'cache')
+# Naikkan jika format output merge berubah, supaya cache lama tidak dipakai
+CACHE_VERSION = '1'
+COUNTER_NAMES = ('hit', 'miss', 'evicted_files', 'evicted_bytes')
+
+
+def cache_key(path1, path2):
+    digest = hashlib.sha256(CACHE_VERSION.encode())
+    for path in (path1, path2):
+        stat = os.stat(path)
+        digest.update(f"|{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()
+
+
+def cache_path(key):
+    return os.path.join(CACHE_DIR, f"{key}.mp4")
+
+
+def get_entry(key, count_miss=True):
+    """ Ambil entry cache yang filenya masih ada, dan catat hit/miss """
+    entry = MergedVideoCache.objects.filter(key=key).first()
+    if entry and os.path.exists(os.path.join(settings.MEDIA_ROOT, entry.path)):
+        MergedVideoCache.objects.filter(id=entry.id).update(
+            hits=F('hits') + 1, last_accessed_at=timezone.now(),
+        )
+        StatCounter.increment('merge_cache.hit')
+        return entry
+    if entry:
+        # File hilang dari disk, entry tidak berguna lagi
+        entry.delete()
+    if count_miss:
+        StatCounter.increment('merge_cache.miss')
+    return None
+
+
+def store_entry(key, path1, path2, video_n_duration):
+    full_path = os.path.join(settings.MEDIA_ROOT, cache_path(key))
+    entry, _ = MergedVideoCache.objects.update_or_create(
+        key=key,
+        defaults={
+            'path': cache_path(key),
+            'source_n_path': os.path.abspath(path1),
+            'source_next_path': os.path.abspath(path2),
+            'video_n_duration': video_n_duration,
+            'size_bytes': os.path.getsize(full_path),
+            'last_accessed_at': timezone.now(),
+        },
+    )
+    enforce_budget(keep_ids={entry.id})
+    return entry
+
+
+def entry_lock_path(path):
+    """ Lock per file cache: dipegang bersama oleh pembaca (trim), eksklusif saat eviction """
+    return os.path.join(settings.MEDIA_ROOT, 'edited_videos', '.locks', f"cache_{os.path.basename(path)}.lock")
+
+
+@contextmanager
+def reading(path):
+    """ Tahan file cache path (relatif MEDIA_ROOT) agar tidak di-evict selama dibaca """
+    with file_lock(entry_lock_path(path), shared=True):
+        yield
+
+
+def _busy_paths():
+    """ File merge yang akan dibaca trim yang masih antri/berjalan """
+    return set(Video.objects.filter(
+        jobs__kind=VideoJob.KIND_TRIM, jobs__status__in=VideoJob.ACTIVE_STATUSES,
+    ).exclude(merged_video_path=None).values_list('merged_video_path', flat=True))
+
+
+def _delete_entries(entries):
+    deleted_files = 0
+    deleted_bytes = 0
+    for entry in entries:
+        full_path = os.path.join(settings.MEDIA_ROOT, entry.path)
+        if os.path.exists(full_path):
+            os.remove(full_path)
+        # Video yang menunjuk ke file ini harus merge ulang
+        Video.objects.filter(merged_video_path=entry.path).update(merged_video_path=None)
+        deleted_files += 1
+        deleted_bytes += entry.size_bytes
+        entry.delete()
+    return deleted_files, deleted_bytes
+
+
+def total_size():
+    return MergedVideoCache.objects.aggregate(total=Sum('size_bytes'))['total'] or 0
+
+
+def enforce_budget(max_bytes=None, keep_ids=(), dry_run=False):
+    """
+    Hapus entry paling lama tidak diakses sampai total ukuran <= max_bytes.
+    File merge yang akan dibaca job trim aktif, atau sedang dibaca (lock
+    reading), dilewati.
+    """
+    if max_bytes is None:
+        max_bytes = getattr(settings, 'MERGED_CACHE_MAX_BYTES', 0)
+    if not max_bytes:
+        return 0, 0
+
+    excess = total_size() - max_bytes
+    if excess <= 0:
+        return 0, 0
+    busy = _busy_paths()
+    candidates = MergedVideoCache.objects.exclude(id__in=keep_ids).exclude(path__in=busy).order_by('last_accessed_at')
+
+    if dry_run:
+        victims = []
+        for entry in candidates:
+            victims.append(entry)
+            excess -= entry.size_bytes
+            if excess <= 0:
+                break
+        return len(victims), sum(entry.size_bytes for entry in victims)
+
+    evicted_files = evicted_bytes = 0
+    for entry in candidates:
+        try:
+            # Entry yang sedang dibaca trim dilewati, bukan ditunggu
+            with file_lock(entry_lock_path(entry.path), blocking=False):
+                files, size = _delete_entries([entry])
+        except LockBusy:
+            continue
+        evicted_files += files
+        evicted_bytes += size
+        excess -= size
+        if excess <= 0:
+            break
+
+    if evicted_files:
+        StatCounter.increment('merge_cache.evicted_files', evicted_files)
+        StatCounter.increment('merge_cache.evicted_bytes', evicted_bytes)
+        logger.info(f"Merge cache: {evicted_files} file ({evicted_bytes} bytes) di-evict")
+    return evicted_files, evicted_bytes
+
+
+def invalidate_sources(paths):
+    """ Hapus entry yang dibuat dari file yang baru saja ditimpa (mis. karena trim) """
+    paths = [os.path.abspath(path) for path in paths]
+    stale = list(
+        MergedVideoCache.objects.filter(source_n_path__in=paths)
+        | MergedVideoCache.objects.filter(source_next_path__in=paths)
+    )
+    return _delete_entries(stale)
+
+
+def cache_stats():
+    stats = StatCounter.values_for('merge_cache.', COUNTER_NAMES)
+    lookups = stats['hit'] + stats['miss']
+    stats['hit_ratio'] = round(stats['hit'] / lookups, 3) if lookups else None
+    stats['entries'] = MergedVideoCache.objects.count()
+    stats['total_bytes'] = total_size()
+    stats['max_bytes'] = getattr(settings, 'MERGED_CACHE_MAX_BYTES', 0)
+    return stats
@@ -0,0 +1,97 @@
+"""
+Metadata media (durasi, fps, resolusi, codec, keyframe) yang disimpan di DB.
+
+Metadata di-probe sekali saat ingest lalu dibaca dari VideoMetadata, sehingga
+membuka editor tidak perlu decode file. Ukuran dan mtime file ikut disimpan;
+jika file berubah (mis. ditimpa trim), metadata di-probe ulang saat dibaca.
+Library lama bisa diisi dengan `python manage.py probe_videos`.
+"""
+import logging
+import os
+import subprocess
+
+from .media_tools import probe_keyframes, probe_video
+from .models import VideoMetadata
+
+logger = logging.getLogger(__name__)
+
+
+def probe_file(path):
+    """ Probe lengkap satu file, hasilnya siap disimpan ke VideoMetadata """
+    stat = os.stat(path)
+    info = probe_video(path)
+    video_info = info['video'] or {}
+    audio_info = info['audio'] or {}
+    return {
+        'duration': info['duration'],
+        'width': video_info.get('width'),
+        'height': video_info.get('height'),
+        'fps': video_info.get('fps'),
+        'time_base': video_info.get('time_base'),
+        'video_codec': video_info.get('codec'),
+        'video_profile': video_info.get('profile'),
+        'pix_fmt': video_info.get('pix_fmt'),
+        'audio_codec': audio_info.get('codec'),
+        'audio_sample_rate': audio_info.get('sample_rate'),
+        'audio_channels': audio_info.get('channels'),
+        'audio_channel_layout': audio_info.get('channel_layout'),
+        'bit_rate': info['bit_rate'],
+        'size_bytes': stat.st_size,
+        'file_mtime': stat.st_mtime,
+        'keyframes': probe_keyframes(path) if info['video'] else [],
+    }
+
+
+def store_metadata(video, values):
+    metadata, _ = VideoMetadata.objects.update_or_create(video=video, defaults=values)
+    return metadata
+
+
+def probe_and_store(video):
+    """ Probe file video lalu simpan hasilnya. Return None jika probe gagal """
+    try:
+        values = probe_file(video.file.path)
+    except (OSError, subprocess.CalledProcessError, ValueError) as e:
+        logger.warning(f"Probe metadata gagal untuk {video.title}: {e}")
+        return None
+    return store_metadata(video, values)
+
+
+def is_fresh(metadata, path):
+    """ Metadata masih berlaku jika ukuran dan mtime file belum berubah """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    return metadata.size_bytes == stat.st_size and metadata.file_mtime == stat.st_mtime
+
+
+def get_metadata(video):
+    """ Metadata tersimpan untuk video, di-probe ulang jika belum ada atau file sudah berubah """
+    metadata = VideoMetadata.objects.filter(video=video).first()
+    if metadata and is_fresh(metadata, video.file.path):
+        return metadata
+    return probe_and_store(video)
+
+
+def to_probe_info(metadata):
+    """ Bentuk dict yang sama dengan media_tools.probe_video, untuk merge_video_files """
+    return {
+        'duration': metadata.duration,
+        'bit_rate': metadata.bit_rate,
+        'video': {
+            'codec': metadata.video_codec,
+            'profile': metadata.video_profile,
+            'width': metadata.width,
+            'height': metadata.height,
+            'pix_fmt': metadata.pix_fmt,
+            'fps': metadata.fps,
+            'time_base': metadata.time_base,
+        } if metadata.video_codec else None,
+        'audio': {
+            'codec': metadata.audio_codec,
+            'sample_rate': metadata.audio_sample_rate,
+            'channels': metadata.audio_channels,
+            'channel_layout': metadata.audio_channel_layout,
+        } if metadata.audio_codec else None,
+    }
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_videojob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrefetchCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='videojob',
+            name='main_videoj_status_b1fc50_idx',
+        ),
+        migrations.AddField(
+            model_name='videojob',
+            name='consumed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='videojob',
+            name='is_speculative',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='videojob',
+            name='priority',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='videojob',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='queued', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='videojob',
+            index=models.Index(fields=['status', '-priority', 'created_at'], name='main_videoj_status_bb5f17_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:33
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def prefix_prefetch_counters(apps, schema_editor):
+    StatCounter = apps.get_model('main', 'StatCounter')
+    for counter in StatCounter.objects.filter(name__in=['hit', 'late', 'miss', 'cancelled']):
+        counter.name = f"prefetch.{counter.name}"
+        counter.save(update_fields=['name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_videojob_priority_prefetchcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MergedVideoCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('path', models.CharField(max_length=255)),
+                ('source_n_path', models.CharField(db_index=True, max_length=500)),
+                ('source_next_path', models.CharField(db_index=True, max_length=500)),
+                ('video_n_duration', models.FloatField(blank=True, null=True)),
+                ('size_bytes', models.BigIntegerField(default=0)),
+                ('hits', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_accessed_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RenameModel(
+            old_name='PrefetchCounter',
+            new_name='StatCounter',
+        ),
+        migrations.RunPython(prefix_prefetch_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_statcounter_mergedvideocache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VideoMetadata',
+            fields=[
+                ('video', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='metadata', serialize=False, to='main.video')),
+                ('duration', models.FloatField()),
+                ('width', models.PositiveIntegerField(blank=True, null=True)),
+                ('height', models.PositiveIntegerField(blank=True, null=True)),
+                ('fps', models.CharField(blank=True, max_length=20, null=True)),
+                ('time_base', models.CharField(blank=True, max_length=20, null=True)),
+                ('video_codec', models.CharField(blank=True, max_length=50, null=True)),
+                ('video_profile', models.CharField(blank=True, max_length=50, null=True)),
+                ('pix_fmt', models.CharField(blank=True, max_length=30, null=True)),
+                ('audio_codec', models.CharField(blank=True, max_length=50, null=True)),
+                ('audio_sample_rate', models.PositiveIntegerField(blank=True, null=True)),
+                ('audio_channels', models.PositiveIntegerField(blank=True, null=True)),
+                ('audio_channel_layout', models.CharField(blank=True, max_length=50, null=True)),
+                ('bit_rate', models.BigIntegerField(blank=True, null=True)),
+                ('size_bytes', models.BigIntegerField()),
+                ('file_mtime', models.FloatField()),
+                ('keyframes', models.JSONField(blank=True, default=list)),
+                ('probed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
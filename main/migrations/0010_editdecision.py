@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_videometadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='needs_render',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AlterField(
+            model_name='videojob',
+            name='kind',
+            field=models.CharField(choices=[('merge', 'Merge'), ('trim', 'Trim'), ('render', 'Render')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='EditDecision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveIntegerField()),
+                ('source_path', models.CharField(max_length=500)),
+                ('source_in', models.FloatField()),
+                ('source_out', models.FloatField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='edit_decisions', to='main.video')),
+            ],
+            options={
+                'ordering': ['video', 'position'],
+                'constraints': [models.UniqueConstraint(fields=('video', 'position'), name='unique_edit_decision_position')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0012_uploadsession_uploadchunk'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='videojob',
+            name='kind',
+            field=models.CharField(choices=[('merge', 'Merge'), ('trim', 'Trim'), ('render', 'Render'), ('ingest', 'Ingest Excel')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='videojob',
+            name='video',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='main.video'),
+        ),
+        migrations.CreateModel(
+            name='IngestRowResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row', models.PositiveIntegerField()),
+                ('title', models.CharField(blank=True, max_length=255)),
+                ('status', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('skipped', 'Skipped'), ('failed', 'Failed')], max_length=20)),
+                ('message', models.TextField(blank=True)),
+                ('bytes', models.BigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingest_rows', to='main.videojob')),
+                ('video', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='main.video')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['job', 'row'], name='main_ingest_job_id_cb0953_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0013_ingest_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='import_hash',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AlterField(
+            model_name='ingestrowresult',
+            name='status',
+            field=models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('skipped', 'Skipped'), ('failed', 'Failed'), ('unchanged', 'Unchanged'), ('missing', 'Missing')], max_length=20),
+        ),
+    ]
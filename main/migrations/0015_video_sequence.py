@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:26
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_sequence(apps, schema_editor):
+    """ Isi sequence dari judul untuk video yang sudah ada (sama dengan models.title_sequence) """
+    Video = apps.get_model('main', 'Video')
+    pattern = re.compile(r'_(\d+)(?:\.\w+)?$')
+    batch = []
+    for video in Video.objects.only('id', 'title').iterator(chunk_size=2000):
+        match = pattern.search(video.title or '')
+        if match:
+            video.sequence = int(match.group(1))
+            batch.append(video)
+        if len(batch) >= 1000:
+            Video.objects.bulk_update(batch, ['sequence'])
+            batch = []
+    if batch:
+        Video.objects.bulk_update(batch, ['sequence'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0014_video_import_hash'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='sequence',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='video',
+            index=models.Index(fields=['folder_name', 'sequence'], name='video_folder_sequence_idx'),
+        ),
+        migrations.RunPython(backfill_sequence, migrations.RunPython.noop),
+    ]
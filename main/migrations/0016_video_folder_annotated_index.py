@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0015_video_sequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='video',
+            index=models.Index(fields=['folder_name', 'is_annotated', 'sequence'], name='video_folder_annotated_idx'),
+        ),
+    ]
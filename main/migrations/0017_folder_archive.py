@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:35
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0016_video_folder_annotated_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FolderArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('folder_name', models.CharField(max_length=255, unique=True)),
+                ('path', models.CharField(max_length=255)),
+                ('signature', models.CharField(max_length=64)),
+                ('size_bytes', models.BigIntegerField(default=0)),
+                ('file_count', models.IntegerField(default=0)),
+                ('hits', models.IntegerField(default=0)),
+                ('built_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_accessed_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='videojob',
+            name='kind',
+            field=models.CharField(choices=[('merge', 'Merge'), ('trim', 'Trim'), ('render', 'Render'), ('ingest', 'Ingest Excel'), ('archive', 'Arsip folder')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0017_folder_archive'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='videojob',
+            name='kind',
+            field=models.CharField(choices=[('merge', 'Merge'), ('trim', 'Trim'), ('render', 'Render'), ('ingest', 'Ingest Excel'), ('archive', 'Arsip folder'), ('proxy', 'Proxy editor')], max_length=20),
+        ),
+    ]
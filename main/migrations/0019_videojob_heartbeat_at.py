@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0018_videojob_proxy_kind'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='videojob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
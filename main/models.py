@@ -1,7 +1,19 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
+import re
 import uuid
 
+# Nomor urut di akhir judul segmen, misal TVRI_SB_061119_0052.mp4 -> 52
+TITLE_SEQUENCE_RE = re.compile(r'_(\d+)(?:\.\w+)?$')
+
+
+def title_sequence(title):
+    """ Nomor urut segmen dari judul video, atau None jika judul tidak berakhiran _<angka> """
+    match = TITLE_SEQUENCE_RE.search(title or '')
+    return int(match.group(1)) if match else None
+
+
 class Video(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=255)
@@ -20,7 +32,259 @@ class Video(models.Model):
 
     merged_video_path = models.CharField(max_length=255, blank=True, null=True)
     video_n_duration = models.FloatField(blank=True, null=True)  # Durasi video n untuk marker timeline
+    needs_render = models.BooleanField(default=False, db_index=True)  # EditDecision belum ditulis ke file
+    content_hash = models.CharField(max_length=64, blank=True, null=True, db_index=True)  # sha256 file saat upload
+    import_hash = models.CharField(max_length=64, blank=True, null=True)  # sha256 isi baris Excel saat ingest terakhir
+    sequence = models.PositiveIntegerField(blank=True, null=True)  # Dari judul (title_sequence), diisi saat save
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['folder_name', 'sequence'], name='video_folder_sequence_idx'),
+            models.Index(fields=['folder_name', 'is_annotated', 'sequence'], name='video_folder_annotated_idx'),
+        ]
+
     def __str__(self):
         return self.title
+
+    def save(self, *args, **kwargs):
+        self.sequence = title_sequence(self.title)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'title' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'sequence'}
+        super().save(*args, **kwargs)
+
+
+class EditDecision(models.Model):
+    """
+    Satu potongan sumber yang menyusun video setelah trim (lihat edl.py).
+    Isi video = potongan-potongan ini diputar berurutan sesuai position.
+    """
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='edit_decisions')
+    position = models.PositiveIntegerField()
+    source_path = models.CharField(max_length=500)  # Relatif MEDIA_ROOT, misal raw_videos/<folder>/<title>
+    source_in = models.FloatField()  # Detik di file sumber
+    source_out = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['video', 'position']
+        constraints = [
+            models.UniqueConstraint(fields=['video', 'position'], name='unique_edit_decision_position'),
+        ]
+
+    def __str__(self):
+        return f"{self.video_id} #{self.position}: {self.source_path} {self.source_in}-{self.source_out}"
+
+
+class VideoMetadata(models.Model):
+    """ Hasil probe ffprobe untuk file video, diisi saat ingest (lihat metadata.py) """
+    video = models.OneToOneField(Video, on_delete=models.CASCADE, primary_key=True, related_name='metadata')
+    duration = models.FloatField()
+    width = models.PositiveIntegerField(blank=True, null=True)
+    height = models.PositiveIntegerField(blank=True, null=True)
+    fps = models.CharField(max_length=20, blank=True, null=True)  # r_frame_rate ffprobe, misal "25/1"
+    time_base = models.CharField(max_length=20, blank=True, null=True)
+    video_codec = models.CharField(max_length=50, blank=True, null=True)
+    video_profile = models.CharField(max_length=50, blank=True, null=True)
+    pix_fmt = models.CharField(max_length=30, blank=True, null=True)
+    audio_codec = models.CharField(max_length=50, blank=True, null=True)
+    audio_sample_rate = models.PositiveIntegerField(blank=True, null=True)
+    audio_channels = models.PositiveIntegerField(blank=True, null=True)
+    audio_channel_layout = models.CharField(max_length=50, blank=True, null=True)
+    bit_rate = models.BigIntegerField(blank=True, null=True)
+    size_bytes = models.BigIntegerField()
+    file_mtime = models.FloatField()
+    keyframes = models.JSONField(default=list, blank=True)  # Waktu keyframe (detik)
+    probed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Metadata {self.video_id}"
+
+
+class VideoJob(models.Model):
+    """ Antrian proses encode (merge/trim/render/proxy), ingest Excel, dan arsip folder yang dijalankan oleh worker """
+    KIND_MERGE = 'merge'
+    KIND_TRIM = 'trim'
+    KIND_RENDER = 'render'
+    KIND_INGEST = 'ingest'
+    KIND_ARCHIVE = 'archive'
+    KIND_PROXY = 'proxy'
+    KIND_CHOICES = [
+        (KIND_MERGE, 'Merge'),
+        (KIND_TRIM, 'Trim'),
+        (KIND_RENDER, 'Render'),
+        (KIND_INGEST, 'Ingest Excel'),
+        (KIND_ARCHIVE, 'Arsip folder'),
+        (KIND_PROXY, 'Proxy editor'),
+    ]
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+        (STATUS_CANCELLED, 'Cancelled'),
+    ]
+    ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='jobs', null=True, blank=True)  # Kosong untuk job ingest dan arsip
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    progress = models.FloatField(default=0.0)
+    priority = models.IntegerField(default=0)  # Lebih besar diproses lebih dulu
+    is_speculative = models.BooleanField(default=False)  # Pre-merge untuk segmen berikutnya
+    consumed_at = models.DateTimeField(blank=True, null=True)  # Saat hasil prefetch dipakai user
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    heartbeat_at = models.DateTimeField(blank=True, null=True)  # Diperbarui worker selama job berjalan
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', '-priority', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.video_id} ({self.status})"
+
+
+class StatCounter(models.Model):
+    """ Counter statistik global (hit/miss prefetch, cache merge, dll) """
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+    @classmethod
+    def increment(cls, name, amount=1):
+        cls.objects.get_or_create(name=name)
+        cls.objects.filter(name=name).update(value=models.F('value') + amount)
+
+    @classmethod
+    def values_for(cls, prefix, names):
+        values = dict(cls.objects.filter(name__startswith=prefix).values_list('name', 'value'))
+        return {name: values.get(f"{prefix}{name}", 0) for name in names}
+
+
+class MergedVideoCache(models.Model):
+    """ File hasil merge n + n+1, dialamatkan dengan hash input (lihat merge_cache.py) """
+    key = models.CharField(max_length=64, unique=True)
+    path = models.CharField(max_length=255)  # Relatif terhadap MEDIA_ROOT
+    source_n_path = models.CharField(max_length=500, db_index=True)
+    source_next_path = models.CharField(max_length=500, db_index=True)
+    video_n_duration = models.FloatField(blank=True, null=True)
+    size_bytes = models.BigIntegerField(default=0)
+    hits = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_accessed_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return self.path
+
+
+class FolderArchive(models.Model):
+    """ ZIP satu folder yang disimpan di disk untuk download (lihat archives.py) """
+    folder_name = models.CharField(max_length=255, unique=True)
+    path = models.CharField(max_length=255)  # Relatif terhadap MEDIA_ROOT
+    signature = models.CharField(max_length=64)  # Hash nama, ukuran, dan mtime file anggota saat dibuat
+    size_bytes = models.BigIntegerField(default=0)
+    file_count = models.IntegerField(default=0)
+    hits = models.IntegerField(default=0)
+    built_at = models.DateTimeField(default=timezone.now)
+    last_accessed_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return self.path
+
+
+class UploadSession(models.Model):
+    """
+    Upload video resumable (lihat uploads.py): file dikirim per chunk ke satu
+    file .part di MEDIA_ROOT, lalu di-finalize menjadi Video.
+    """
+    STATUS_UPLOADING = 'uploading'
+    STATUS_COMPLETE = 'complete'
+    STATUS_CHOICES = [
+        (STATUS_UPLOADING, 'Uploading'),
+        (STATUS_COMPLETE, 'Complete'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    folder_name = models.CharField(max_length=255)
+    video_title = models.CharField(max_length=255)
+    filename = models.CharField(max_length=255, blank=True, null=True)  # Nama file asli di sisi client
+    size = models.BigIntegerField()  # Total byte
+    chunk_size = models.IntegerField()
+    sha256 = models.CharField(max_length=64, blank=True, null=True)  # Checksum dari client, dicek saat finalize
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_UPLOADING)
+    video = models.ForeignKey(Video, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_sessions')
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.folder_name}/{self.video_title} ({self.status})"
+
+    @property
+    def chunk_count(self):
+        return max(1, -(-self.size // self.chunk_size))
+
+
+class UploadChunk(models.Model):
+    """ Chunk yang sudah diterima utuh; satu baris per chunk supaya PATCH paralel tidak saling menimpa """
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='chunks')
+    index = models.PositiveIntegerField()
+    size = models.IntegerField()
+    received_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'index'], name='unique_upload_chunk_index'),
+        ]
+
+
+class IngestRowResult(models.Model):
+    """ Hasil satu baris Excel pada job ingest (lihat ingest.py), bisa di-download sebagai CSV """
+    STATUS_CREATED = 'created'
+    STATUS_UPDATED = 'updated'
+    STATUS_SKIPPED = 'skipped'
+    STATUS_FAILED = 'failed'
+    STATUS_UNCHANGED = 'unchanged'  # Isi baris sama dengan import terakhir, tidak ditulis
+    STATUS_MISSING = 'missing'  # Dry run: video ada di database tapi tidak ada di Excel (row = 0)
+    STATUS_CHOICES = [
+        (STATUS_CREATED, 'Created'),
+        (STATUS_UPDATED, 'Updated'),
+        (STATUS_SKIPPED, 'Skipped'),
+        (STATUS_FAILED, 'Failed'),
+        (STATUS_UNCHANGED, 'Unchanged'),
+        (STATUS_MISSING, 'Missing'),
+    ]
+
+    job = models.ForeignKey(VideoJob, on_delete=models.CASCADE, related_name='ingest_rows')
+    row = models.PositiveIntegerField()  # Nomor baris di Excel (header = 1)
+    title = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    message = models.TextField(blank=True)
+    bytes = models.BigIntegerField(default=0)  # Byte yang didownload untuk baris ini
+    video = models.ForeignKey(Video, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['job', 'row']),
+        ]
+
+    def __str__(self):
+        return f"{self.row}: {self.status}"
@@ -0,0 +1,161 @@
+"""
+Pre-merge spekulatif untuk segmen berikutnya.
+
+Saat annotator membuka video n, langkah berikutnya hampir selalu video
+belum-dianotasi setelahnya di folder yang sama. Merge untuk K video itu
+dimasukkan ke antrian dengan prioritas rendah, sehingga saat "Selanjutnya"
+ditekan merged_video_path biasanya sudah terisi. Dengan merge virtual
+(default) yang disiapkan adalah proxy n dan n+1 video tersebut.
+
+Counter di StatCounter (prefix "prefetch."):
+- hit: merge hasil prefetch (merge virtual: proxy n dan n+1) sudah siap saat dibuka
+- late: prefetch masih antri/berjalan saat dibuka (job dinaikkan prioritasnya)
+- miss: tidak ada prefetch, merge/proxy dibuat saat dibuka
+- cancelled: prefetch dibatalkan karena trim mengubah rantai video
+"""
+import logging
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .editing import get_next_video
+from .jobs import enqueue_job, get_active_merge_job
+from .models import StatCounter, Video, VideoJob
+from .proxies import proxies_enabled, proxies_ready, schedule_proxies
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_PRIORITY = -10
+COUNTER_NAMES = ('hit', 'late', 'miss', 'cancelled')
+
+
+def record_event(name, amount=1):
+    StatCounter.increment(f"prefetch.{name}", amount)
+
+
+def schedule_prefetch(video, user=None):
+    """
+    Siapkan K video belum-dianotasi berikutnya di antrian prioritas rendah:
+    file merge untuk merge fisik, atau proxy segmen untuk merge virtual.
+    """
+    count = getattr(settings, 'VIDEO_PREFETCH_COUNT', 0)
+    if count <= 0 or getattr(settings, 'VIDEO_JOBS_INLINE', False):
+        return []
+    if video.sequence is None:
+        return []
+
+    # Index (folder_name, is_annotated, sequence)
+    candidates = Video.objects.filter(
+        folder_name=video.folder_name, is_annotated=False, sequence__gt=video.sequence,
+    ).order_by('sequence')[:count]
+
+    if getattr(settings, 'VIDEO_VIRTUAL_MERGE', False):
+        return _prefetch_proxies(candidates, user)
+
+    scheduled = []
+    for candidate in candidates:
+        if candidate.merged_video_path:
+            continue
+        _, next_video = get_next_video(candidate)
+        if not next_video:
+            continue
+        job = enqueue_job(
+            VideoJob.KIND_MERGE, candidate, user=user,
+            priority=PREFETCH_PRIORITY, speculative=True,
+        )
+        scheduled.append(job)
+    if scheduled:
+        logger.info(f"Prefetch merge untuk {[job.video.title for job in scheduled]}")
+    return scheduled
+
+
+def _prefetch_proxies(candidates, user=None):
+    """
+    Merge virtual tidak butuh file merge: yang disiapkan adalah proxy n dan
+    n+1 setiap kandidat, supaya editor langsung memutar proxy saat dibuka.
+    Tanpa proxy (VIDEO_PROXY_ENABLED=False) editor memutar file sumber yang
+    sudah ada di disk, jadi tidak ada yang perlu disiapkan.
+    """
+    videos = {}
+    for candidate in candidates:
+        _, next_video = get_next_video(candidate)
+        for item in (candidate, next_video):
+            if item:
+                videos[item.pk] = item
+    scheduled = schedule_proxies(list(videos.values()), user=user, priority=PREFETCH_PRIORITY)
+    if scheduled:
+        logger.info(f"Prefetch proxy untuk {[job.video.title for job in scheduled]}")
+    return scheduled
+
+
+def enqueue_interactive_merge(video, user=None, proxy=False):
+    """
+    Merge yang diminta user: pakai prefetch yang sedang berjalan jika ada.
+    proxy=True: merge dari proxy untuk diputar editor (lihat proxies.merge_proxy_pair)
+    """
+    active_job = get_active_merge_job(video, proxy=proxy)
+    if active_job:
+        if active_job.is_speculative and active_job.consumed_at is None:
+            # Naikkan prioritas supaya tidak menunggu di belakang prefetch lain
+            VideoJob.objects.filter(id=active_job.id).update(priority=0, consumed_at=timezone.now())
+            record_event('late')
+        return active_job
+
+    record_event('miss')
+    return enqueue_job(VideoJob.KIND_MERGE, video, params={'proxy': True} if proxy else None, user=user)
+
+
+def record_prefetch_hit(video):
+    """ Tandai hasil prefetch yang dipakai user (hanya dihitung sekali per job) """
+    consumed = VideoJob.objects.filter(
+        kind=VideoJob.KIND_MERGE, video=video, is_speculative=True,
+        status=VideoJob.STATUS_DONE, consumed_at__isnull=True,
+    ).update(consumed_at=timezone.now())
+    if consumed:
+        record_event('hit')
+
+
+def record_proxy_prefetch(videos):
+    """
+    Hit/late/miss untuk merge virtual, yang diputar dari proxy video n dan
+    n+1 (videos): hit jika semua proxy sudah siap, late jika prefetch proxy
+    masih antri/berjalan (dinaikkan prioritasnya), miss jika belum ada.
+    Tidak dihitung jika proxy nonaktif (tidak ada yang di-prefetch).
+    """
+    if not proxies_enabled():
+        return None
+    if proxies_ready(videos):
+        event = 'hit'
+    elif VideoJob.objects.filter(
+        kind=VideoJob.KIND_PROXY, video__in=videos, is_speculative=True,
+        priority=PREFETCH_PRIORITY, status__in=VideoJob.ACTIVE_STATUSES,
+    ).update(priority=0, consumed_at=timezone.now()):
+        event = 'late'
+    else:
+        event = 'miss'
+    record_event(event)
+    return event
+
+
+def cancel_prefetch(videos):
+    """ Batalkan prefetch (merge, atau proxy untuk merge virtual) yang belum berjalan untuk video yang rantainya berubah karena trim """
+    cancelled = VideoJob.objects.filter(
+        Q(kind=VideoJob.KIND_MERGE) | Q(kind=VideoJob.KIND_PROXY, priority=PREFETCH_PRIORITY),
+        video__in=videos, is_speculative=True,
+        status=VideoJob.STATUS_QUEUED, consumed_at__isnull=True,
+    ).update(status=VideoJob.STATUS_CANCELLED, finished_at=timezone.now())
+    if cancelled:
+        record_event('cancelled', cancelled)
+    return cancelled
+
+
+def prefetch_stats():
+    stats = StatCounter.values_for('prefetch.', COUNTER_NAMES)
+    requests_total = stats['hit'] + stats['late'] + stats['miss']
+    stats['hit_ratio'] = round(stats['hit'] / requests_total, 3) if requests_total else None
+    stats['prefetch_count'] = getattr(settings, 'VIDEO_PREFETCH_COUNT', 0)
+    stats['pending'] = VideoJob.objects.filter(
+        is_speculative=True, status__in=VideoJob.ACTIVE_STATUSES,
+    ).count()
+    return stats
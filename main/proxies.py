@@ -0,0 +1,269 @@
+"""
+Proxy resolusi rendah untuk editor.
+
+Annotator memutar, seek, dan merge video n + n+1 dari proxy kecil
+(VIDEO_PROXY_HEIGHT, default 360p, bitrate rendah) alih-alih file siaran
+resolusi penuh. Proxy dibuat per file sumber oleh worker (job KIND_PROXY,
+prioritas rendah) saat ingest, dan dialamatkan dengan identitas file
+sumber (inode, ukuran, mtime): videos/ dan raw_videos/ yang hardlink
+memakai proxy yang sama, dan file yang ditimpa trim otomatis mendapat
+proxy baru.
+
+Timestamp proxy sama dengan file asli, jadi titik potong yang dipilih di
+editor langsung berlaku untuk file asli. Trim EDL dicatat terhadap sumber
+resolusi penuh dan file baru ditulis saat render (download, merge fisik,
+atau `python manage.py render_edits`); trim destruktif (VIDEO_TRIM_EDL=False)
+juga selalu memotong file asli. Selama proxy belum ada, editor memutar file
+asli seperti sebelumnya. Lihat juga `python manage.py build_proxies`.
+"""
+import hashlib
+import logging
+import os
+import subprocess
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from . import merge_cache
+from .editing import encoder_thread_budget, get_next_video
+from .locks import atomic_output, file_lock
+from .media_tools import concat_stream_copy, encode_proxy, probe_video, streams_compatible
+from .metadata import get_metadata, is_fresh
+from .models import Video, VideoJob, VideoMetadata
+
+logger = logging.getLogger(__name__)
+
+PROXY_DIR = 'proxies'
+# Naikkan jika parameter encode proxy berubah, supaya proxy lama dibuat ulang
+PROXY_VERSION = '1'
+# Di bawah prefetch merge (-10): proxy tidak boleh menunda job interaktif
+PROXY_PRIORITY = -20
+
+
+def proxies_enabled():
+    return getattr(settings, 'VIDEO_PROXY_ENABLED', False)
+
+
+def _proxy_params():
+    return getattr(settings, 'VIDEO_PROXY_HEIGHT', 360), getattr(settings, 'VIDEO_PROXY_CRF', 30)
+
+
+def proxy_path(source_name):
+    """ Path proxy (relatif MEDIA_ROOT) untuk file sumber source_name (relatif MEDIA_ROOT) """
+    stat = os.stat(os.path.join(settings.MEDIA_ROOT, source_name))
+    height, crf = _proxy_params()
+    key = hashlib.sha256(
+        f"{PROXY_VERSION}|{height}|{crf}|{stat.st_dev}|{stat.st_ino}|{stat.st_size}|{stat.st_mtime_ns}".encode()
+    ).hexdigest()
+    return os.path.join(PROXY_DIR, f"{key}.mp4")
+
+
+def get_proxy(source_name):
+    """ Path proxy jika sudah ada, None jika belum, sumber hilang, atau proxy nonaktif """
+    if not proxies_enabled():
+        return None
+    try:
+        path = proxy_path(source_name)
+    except OSError:
+        return None
+    return path if os.path.exists(os.path.join(settings.MEDIA_ROOT, path)) else None
+
+
+def proxy_url(source_name):
+    path = get_proxy(source_name)
+    return default_storage.url(path) if path else None
+
+
+def video_sources(video):
+    """ File yang diputar editor untuk video: sumber potongan EDL, atau file video itu sendiri """
+    sources = video.edit_decisions.values_list('source_path', flat=True)
+    return list(dict.fromkeys(sources)) or [video.file.name]
+
+
+def missing_sources(video):
+    """ Sumber video yang filenya ada tetapi proxy-nya belum dibuat """
+    return [
+        source for source in video_sources(video)
+        if get_proxy(source) is None and os.path.exists(os.path.join(settings.MEDIA_ROOT, source))
+    ]
+
+
+def proxies_ready(videos):
+    """ True jika semua sumber setiap video sudah punya proxy """
+    return proxies_enabled() and all(
+        get_proxy(source) for video in videos for source in video_sources(video)
+    )
+
+
+def build_proxy(source_name, threads=None):
+    """ Buat proxy untuk source_name jika belum ada. Return (path proxy, True jika baru dibuat) """
+    relative_path = proxy_path(source_name)
+    full_path = os.path.join(settings.MEDIA_ROOT, relative_path)
+    if os.path.exists(full_path):
+        return relative_path, False
+
+    lock_path = os.path.join(settings.MEDIA_ROOT, PROXY_DIR, '.locks', f"{os.path.basename(relative_path)}.lock")
+    # Single-flight: proxy yang sama tidak di-encode dua kali bersamaan
+    with file_lock(lock_path):
+        if os.path.exists(full_path):
+            return relative_path, False
+        height, crf = _proxy_params()
+        with atomic_output(full_path) as tmp_path:
+            encode_proxy(os.path.join(settings.MEDIA_ROOT, source_name), tmp_path, height, crf, threads=threads)
+    logger.info(f"Proxy {source_name}: {os.path.getsize(full_path) / 1024 / 1024:.1f} MB")
+    return relative_path, True
+
+
+def build_video_proxies(video, progress=None):
+    """ Buat proxy untuk semua sumber video yang belum punya proxy (handler job KIND_PROXY) """
+    sources = missing_sources(video)
+    threads = encoder_thread_budget()
+    built = 0
+    for index, source in enumerate(sources):
+        _, created = build_proxy(source, threads=threads)
+        built += int(created)
+        if progress:
+            progress((index + 1) / len(sources))
+    return {'message': f'{built} proxy dibuat.', 'built': built}
+
+
+def schedule_proxies(videos, user=None, priority=PROXY_PRIORITY):
+    """
+    Masukkan job proxy (prioritas rendah) untuk video yang proxy-nya belum
+    ada dan belum diantrikan. Return list job baru.
+    """
+    if not proxies_enabled() or getattr(settings, 'VIDEO_JOBS_INLINE', False):
+        # Tanpa worker proxy tidak dibuat di request; pakai `manage.py build_proxies`
+        return []
+    videos = [video for video in videos if missing_sources(video)]
+    if not videos:
+        return []
+
+    active = VideoJob.objects.filter(
+        kind=VideoJob.KIND_PROXY, video__in=videos, status__in=VideoJob.ACTIVE_STATUSES,
+    )
+    queued = set(active.values_list('video_id', flat=True))
+    # Job yang sudah antri dinaikkan ke prioritas yang diminta (mis. prefetch segmen berikutnya)
+    active.filter(status=VideoJob.STATUS_QUEUED, priority__lt=priority).update(priority=priority)
+    created_by = user if user and user.is_authenticated else None
+    # Spekulatif: worker selalu menyisakan satu slot untuk merge/trim interaktif
+    jobs = VideoJob.objects.bulk_create([
+        VideoJob(
+            kind=VideoJob.KIND_PROXY, video=video, priority=priority,
+            is_speculative=True, created_by=created_by,
+        )
+        for video in videos if video.id not in queued
+    ])
+    return jobs
+
+
+def _proxy_pair(video):
+    """ (video n+1 atau None, path proxy n [dan n+1]) jika pair bisa diputar dari proxy, atau None """
+    _, next_video = get_next_video(video)
+    pair = [v for v in (video, next_video) if v]
+    # Video dengan EDL diputar per potongan (merge virtual), bukan dari file video
+    if any(v.edit_decisions.exists() for v in pair):
+        return None
+    proxies = [get_proxy(v.file.name) for v in pair]
+    if not all(proxies):
+        return None
+    return next_video, proxies
+
+
+def _proxy_merge_info(merged_path, video_n_duration):
+    return {
+        'merged_video_url': default_storage.url(merged_path),
+        'video_n_duration': video_n_duration,
+        'is_single_video': False,
+        'proxy': True,
+    }
+
+
+def _single_proxy_info(path):
+    return {
+        'merged_video_url': default_storage.url(path),
+        'is_single_video': True,
+        'video_n_duration': None,
+        'proxy': True,
+    }
+
+
+def cached_proxy_merge(video):
+    """
+    Merge proxy n + n+1 yang sudah ada di cache (atau proxy n jika tidak ada
+    n+1), tanpa ffprobe/ffmpeg: aman dipanggil di request. Hanya membaca
+    VideoMetadata tersimpan; None jika belum ada, metadata sudah basi, atau
+    merge belum di-cache. Buat lewat job merge dengan params proxy
+    (merge_proxy_pair), yang juga me-probe ulang metadata.
+    """
+    pair = _proxy_pair(video)
+    if pair is None:
+        return None
+    next_video, proxies = pair
+    if not next_video:
+        return _single_proxy_info(proxies[0])
+    metadata = VideoMetadata.objects.filter(video=video).first()
+    if not (metadata and is_fresh(metadata, video.file.path)):
+        return None
+    path1, path2 = (os.path.join(settings.MEDIA_ROOT, path) for path in proxies)
+    try:
+        key = merge_cache.cache_key(path1, path2)
+    except OSError:
+        return None
+    # Miss dicatat oleh merge_proxy_pair di worker, tidak dua kali
+    entry = merge_cache.get_entry(key, count_miss=False)
+    return _proxy_merge_info(entry.path, metadata.duration) if entry else None
+
+
+def merge_proxy_pair(video):
+    """
+    Merge n + n+1 dari proxy untuk diputar editor (stream copy, tanpa encode).
+    n+1 mulai tepat di durasi file asli n, jadi timeline sama dengan merge
+    file asli yang dipakai trim. Return dict seperti merge_video_pair, atau
+    None jika proxy belum lengkap (editor memakai file asli). Menjalankan
+    ffprobe/ffmpeg: dipanggil dari worker (job merge), lihat cached_proxy_merge.
+    """
+    pair = _proxy_pair(video)
+    if pair is None:
+        return None
+    next_video, proxies = pair
+    if not next_video:
+        return _single_proxy_info(proxies[0])
+
+    metadata = get_metadata(video)
+    if not metadata:
+        return None
+    path1, path2 = (os.path.join(settings.MEDIA_ROOT, path) for path in proxies)
+    key = merge_cache.cache_key(path1, path2)
+    merged_path = merge_cache.cache_path(key)
+    full_merged_path = os.path.join(settings.MEDIA_ROOT, merged_path)
+    lock_path = os.path.join(settings.MEDIA_ROOT, 'edited_videos', '.locks', f"proxy_{key}.lock")
+
+    with file_lock(lock_path):
+        if not merge_cache.get_entry(key):
+            try:
+                if not streams_compatible(probe_video(path1), probe_video(path2)):
+                    return None
+                os.makedirs(os.path.dirname(full_merged_path), exist_ok=True)
+                with atomic_output(full_merged_path) as tmp_path:
+                    concat_stream_copy([path1, path2], tmp_path, durations=[metadata.duration, None])
+            except (OSError, subprocess.CalledProcessError, ValueError) as e:
+                logger.warning(f"Merge proxy gagal untuk {video.title}, pakai file asli: {e}")
+                return None
+            merge_cache.store_entry(key, path1, path2, metadata.duration)
+
+    return _proxy_merge_info(merged_path, metadata.duration)
+
+
+def referenced_proxies(videos=None):
+    """ Path proxy yang masih dipakai sumber video saat ini """
+    videos = Video.objects.all() if videos is None else videos
+    paths = set()
+    for video in videos.prefetch_related('edit_decisions').iterator(chunk_size=2000):
+        sources = list(dict.fromkeys(d.source_path for d in video.edit_decisions.all())) or [video.file.name]
+        for source in sources:
+            try:
+                paths.add(proxy_path(source))
+            except OSError:
+                continue
+    return paths
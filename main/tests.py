@@ -1,3 +1,1075 @@
-from django.test import TestCase
+import hashlib
+import io
+import json
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+import unittest
+import zipfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import openpyxl
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from django.utils.http import http_date
+
+from . import merge_cache
+from .archives import build_folder_archive, get_fresh_archive, iter_zip
+from .editing import VideoProcessingError, get_next_video, merge_video_pair
+from .edl import render_video, save_segments, slice_segments
+from .excel import MissingColumnError, estimate_rows, iter_rows, read_header
+from .folders import folder_summaries
+from .jobs import (
+    JOB_HANDLERS, claim_next_job, enqueue_job, fail_job, heartbeat_jobs, requeue_job, requeue_stale_jobs, run_job,
+)
+from .locks import LockBusy, atomic_output, atomic_outputs, file_lock
+from .media import file_etag, serve_file
+from .media_tools import (
+    count_video_packets, cut_video, decode_errors, ensure_faststart, merge_video_files, moov_before_mdat,
+    streams_compatible,
+)
+from .models import IngestRowResult, MergedVideoCache, StatCounter, UploadSession, Video, VideoJob, VideoMetadata
+from .prefetch import PREFETCH_PRIORITY, cancel_prefetch, record_proxy_prefetch
+from .proxies import PROXY_PRIORITY, cached_proxy_merge, proxy_path
+from .transcripts import import_transcripts
+from .uploads import MIN_UPLOAD_CHUNK_SIZE, session_part_path
+
+
+class MediaRootTestCase(TestCase):
+    """ MEDIA_ROOT sementara per test, worker tidak dijalankan inline dan proxy nonaktif """
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root, VIDEO_JOBS_INLINE=False, VIDEO_PROXY_ENABLED=False,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class JobQueueTests(MediaRootTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.video = Video.objects.create(title='TVRI_SB_061119_0051.mp4', folder_name='TVRI_SB_061119')
+
+    def test_claim_highest_priority_first(self):
+        low = enqueue_job(VideoJob.KIND_PROXY, self.video, priority=-20, speculative=True)
+        high = enqueue_job(VideoJob.KIND_TRIM, self.video, params={'start_time': 0, 'end_time': 1})
+
+        self.assertEqual(claim_next_job(), high.id)
+        self.assertEqual(claim_next_job(), low.id)
+        self.assertIsNone(claim_next_job())
+
+        high.refresh_from_db()
+        self.assertEqual(high.status, VideoJob.STATUS_RUNNING)
+        self.assertIsNotNone(high.started_at)
+        self.assertIsNotNone(high.heartbeat_at)
+
+    def test_claim_skips_speculative(self):
+        enqueue_job(VideoJob.KIND_MERGE, self.video, priority=-10, speculative=True)
+        self.assertIsNone(claim_next_job(allow_speculative=False))
+        self.assertIsNotNone(claim_next_job())
+
+    def test_deduplicated_kind_reuses_active_job(self):
+        job = enqueue_job(VideoJob.KIND_RENDER, self.video)
+        self.assertEqual(enqueue_job(VideoJob.KIND_RENDER, self.video).id, job.id)
+        # Merge file asli tidak memakai job merge proxy yang sedang berjalan
+        proxy_job = enqueue_job(VideoJob.KIND_MERGE, self.video, params={'proxy': True})
+        self.assertNotEqual(enqueue_job(VideoJob.KIND_MERGE, self.video).id, proxy_job.id)
+
+    def test_requeue_stale_jobs(self):
+        job = enqueue_job(VideoJob.KIND_RENDER, self.video)
+        claim_next_job()
+        old = timezone.now() - timedelta(seconds=600)
+        VideoJob.objects.filter(id=job.id).update(heartbeat_at=old, progress=0.5)
+
+        self.assertEqual(requeue_stale_jobs(120), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, VideoJob.STATUS_QUEUED)
+        self.assertIsNone(job.started_at)
+        self.assertEqual(job.progress, 0.0)
+        self.assertEqual(claim_next_job(), job.id)
+
+    def test_heartbeat_keeps_job_running(self):
+        job = enqueue_job(VideoJob.KIND_RENDER, self.video)
+        claim_next_job()
+        VideoJob.objects.filter(id=job.id).update(heartbeat_at=timezone.now() - timedelta(seconds=600))
+        self.assertEqual(heartbeat_jobs([job.id]), 1)
+
+        self.assertEqual(requeue_stale_jobs(120), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, VideoJob.STATUS_RUNNING)
+
+    def test_requeue_and_fail_only_touch_running_jobs(self):
+        job = enqueue_job(VideoJob.KIND_RENDER, self.video)
+        self.assertEqual(fail_job(job.id, 'crash'), 0)
+        claim_next_job()
+        self.assertEqual(requeue_job(job.id), 1)
+        self.assertEqual(claim_next_job(), job.id)
+
+        self.assertEqual(fail_job(job.id, 'BrokenProcessPool'), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, VideoJob.STATUS_FAILED)
+        self.assertEqual(job.error, 'BrokenProcessPool')
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(requeue_job(job.id), 0)
+
+
+    def test_late_finish_does_not_overwrite_requeued_job(self):
+        job = enqueue_job(VideoJob.KIND_RENDER, self.video)
+        claim_next_job()
+
+        def slow_render(job, progress):
+            # Worker ini dianggap mati: job dikembalikan ke antrian dan diklaim worker lain
+            VideoJob.objects.filter(id=job.id).update(heartbeat_at=timezone.now() - timedelta(seconds=600))
+            requeue_stale_jobs(120)
+            claim_next_job()
+            return {'message': 'run lama'}
+
+        with mock.patch.dict(JOB_HANDLERS, {VideoJob.KIND_RENDER: slow_render}):
+            self.assertFalse(run_job(job.id))
+        job.refresh_from_db()
+        self.assertEqual(job.status, VideoJob.STATUS_RUNNING)
+        self.assertIsNone(job.result)
+        self.assertIsNone(job.finished_at)
+
+    def test_cancelled_job_is_not_overwritten(self):
+        job = enqueue_job(VideoJob.KIND_RENDER, self.video)
+        claim_next_job()
+
+        def cancelled_render(job, progress):
+            VideoJob.objects.filter(id=job.id).update(status=VideoJob.STATUS_CANCELLED)
+            raise RuntimeError('encode dihentikan')
+
+        with mock.patch.dict(JOB_HANDLERS, {VideoJob.KIND_RENDER: cancelled_render}):
+            self.assertFalse(run_job(job.id))
+        job.refresh_from_db()
+        self.assertEqual(job.status, VideoJob.STATUS_CANCELLED)
+        self.assertIsNone(job.error)
+
+    def test_inline_run_claims_queued_job(self):
+        job = enqueue_job(VideoJob.KIND_RENDER, self.video)
+        with mock.patch.dict(JOB_HANDLERS, {VideoJob.KIND_RENDER: lambda job, progress: {'ok': True}}):
+            self.assertTrue(run_job(job.id))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result), (VideoJob.STATUS_DONE, {'ok': True}))
+
+
+class PrefetchTests(MediaRootTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.videos = []
+        for sequence in (51, 52):
+            title = f'TVRI_SB_061119_00{sequence}.mp4'
+            os.makedirs(os.path.join(self.media_root, 'videos'), exist_ok=True)
+            with open(os.path.join(self.media_root, 'videos', title), 'wb') as f:
+                f.write(b'video')
+            self.videos.append(Video.objects.create(
+                title=title, folder_name='TVRI_SB_061119', file=f'videos/{title}',
+            ))
+
+    def counter(self, name):
+        return StatCounter.values_for('prefetch.', [name])[name]
+
+    def test_cancel_prefetch_includes_proxy_jobs(self):
+        merge = enqueue_job(VideoJob.KIND_MERGE, self.videos[0], priority=PREFETCH_PRIORITY, speculative=True)
+        proxy = enqueue_job(VideoJob.KIND_PROXY, self.videos[1], priority=PREFETCH_PRIORITY, speculative=True)
+        # Proxy untuk video yang sedang dibuka bukan prefetch
+        editor_proxy = enqueue_job(VideoJob.KIND_PROXY, self.videos[0], priority=PROXY_PRIORITY, speculative=True)
+
+        cancel_prefetch(self.videos)
+
+        statuses = dict(VideoJob.objects.values_list('id', 'status'))
+        self.assertEqual(statuses[merge.id], VideoJob.STATUS_CANCELLED)
+        self.assertEqual(statuses[proxy.id], VideoJob.STATUS_CANCELLED)
+        self.assertEqual(statuses[editor_proxy.id], VideoJob.STATUS_QUEUED)
+        self.assertEqual(self.counter('cancelled'), 2)
+
+    def test_virtual_merge_not_counted_without_proxies(self):
+        self.assertIsNone(record_proxy_prefetch(self.videos))
+        self.assertEqual(self.counter('miss'), 0)
+
+    @override_settings(VIDEO_PROXY_ENABLED=True)
+    def test_virtual_merge_miss_late_hit(self):
+        self.assertEqual(record_proxy_prefetch(self.videos), 'miss')
+
+        job = enqueue_job(VideoJob.KIND_PROXY, self.videos[1], priority=PREFETCH_PRIORITY, speculative=True)
+        self.assertEqual(record_proxy_prefetch(self.videos), 'late')
+        job.refresh_from_db()
+        self.assertEqual(job.priority, 0)
+        self.assertIsNotNone(job.consumed_at)
+
+        for video in self.videos:
+            path = os.path.join(self.media_root, proxy_path(video.file.name))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, 'wb').close()
+        self.assertEqual(record_proxy_prefetch(self.videos), 'hit')
+        self.assertEqual([self.counter(name) for name in ('hit', 'late', 'miss')], [1, 1, 1])
+
+
+class CachedProxyMergeTests(MediaRootTestCase):
+
+    def setUp(self):
+        super().setUp()
+        proxy_override = override_settings(VIDEO_PROXY_ENABLED=True)
+        proxy_override.enable()
+        self.addCleanup(proxy_override.disable)
+        os.makedirs(os.path.join(self.media_root, 'videos'))
+        proxies = []
+        for sequence in (51, 52):
+            name = f'videos/TVRI_SB_061119_00{sequence}.mp4'
+            with open(os.path.join(self.media_root, name), 'wb') as f:
+                f.write(b'video')
+            video = Video.objects.create(title=os.path.basename(name), folder_name='TVRI_SB_061119', file=name)
+            proxy = os.path.join(self.media_root, proxy_path(name))
+            os.makedirs(os.path.dirname(proxy), exist_ok=True)
+            open(proxy, 'wb').close()
+            proxies.append(proxy)
+        self.video = Video.objects.get(title='TVRI_SB_061119_0051.mp4')
+        key = merge_cache.cache_key(*proxies)
+        merged = os.path.join(self.media_root, merge_cache.cache_path(key))
+        os.makedirs(os.path.dirname(merged), exist_ok=True)
+        open(merged, 'wb').close()
+        merge_cache.store_entry(key, *proxies, 7.5)
+        stat = os.stat(self.video.file.path)
+        self.metadata = VideoMetadata.objects.create(
+            video=self.video, duration=7.5, size_bytes=stat.st_size, file_mtime=stat.st_mtime,
+        )
+
+    def cached(self):
+        with mock.patch('main.metadata.probe_file', side_effect=AssertionError('ffprobe di request')):
+            return cached_proxy_merge(self.video)
+
+    def test_hit_uses_stored_metadata(self):
+        info = self.cached()
+        self.assertTrue(info['proxy'])
+        self.assertEqual(info['video_n_duration'], 7.5)
+
+    def test_stale_metadata_is_a_miss(self):
+        VideoMetadata.objects.filter(video=self.video).update(file_mtime=0)
+        self.assertIsNone(self.cached())
+        self.metadata.delete()
+        self.assertIsNone(self.cached())
+
+
+class MergedVideoViewTests(MediaRootTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_user('annotator', password='pw'))
+        os.makedirs(os.path.join(self.media_root, 'merged'))
+        with open(os.path.join(self.media_root, 'merged', 'm.mp4'), 'wb') as f:
+            f.write(b'merged')
+        self.video = Video.objects.create(
+            title='TVRI_SB_061119_0051.mp4', folder_name='TVRI_SB_061119',
+            file='videos/TVRI_SB_061119_0051.mp4', merged_video_path='merged/m.mp4',
+        )
+
+    def get(self):
+        with mock.patch('main.metadata.probe_file', side_effect=AssertionError('ffprobe di request')):
+            response = self.client.get(f'/get_merged_video/{self.video.title}/', {'mode': 'merged'})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_duration_from_merge_cache(self):
+        MergedVideoCache.objects.create(
+            key='k', path='merged/m.mp4', source_n_path='a', source_next_path='b', video_n_duration=12.5,
+        )
+        self.assertEqual(self.get()['video_n_duration'], 12.5)
+
+    def test_duration_from_stored_metadata(self):
+        VideoMetadata.objects.create(video=self.video, duration=9.0, size_bytes=1, file_mtime=0)
+        data = self.get()
+        self.assertEqual(data['video_n_duration'], 9.0)
+        self.assertTrue(data['merged_video_url'].endswith('merged/m.mp4'))
+
+    def test_single_video_looks_up_next_once(self):
+        Video.objects.filter(id=self.video.id).update(merged_video_path=None)
+        with mock.patch('main.views.get_next_video', wraps=get_next_video) as lookup:
+            data = self.get()
+        self.assertTrue(data['is_single_video'])
+        lookup.assert_called_once()
+
+
+class ServeFileTests(MediaRootTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.content = bytes(range(256)) * 40
+        self.path = os.path.join(self.media_root, 'clip.mp4')
+        with open(self.path, 'wb') as f:
+            f.write(self.content)
+        self.factory = RequestFactory()
+
+    def serve(self, **headers):
+        return serve_file(self.factory.get('/media/clip.mp4', headers=headers), self.path, 'video/mp4')
+
+    def test_media_url_requires_login(self):
+        os.makedirs(os.path.join(self.media_root, 'archives'))
+        shutil.copy(self.path, os.path.join(self.media_root, 'archives', 'folder.zip'))
+        for url in ('/media/clip.mp4', '/media/archives/folder.zip'):
+            self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_login(User.objects.create_user('annotator', password='pw'))
+        response = self.client.get('/media/archives/folder.zip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+    def test_full_file(self):
+        response = self.serve()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+
+    def test_single_range(self):
+        response = self.serve(Range='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.content)}')
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(b''.join(response.streaming_content), self.content[100:200])
+
+    def test_suffix_range(self):
+        response = self.serve(Range='bytes=-10')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), self.content[-10:])
+
+    def test_multiple_ranges(self):
+        response = self.serve(Range='bytes=0-9,500-509')
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response['Content-Type'].startswith('multipart/byteranges'))
+        body = b''.join(response.streaming_content)
+        self.assertEqual(len(body), int(response['Content-Length']))
+        self.assertIn(self.content[500:510], body)
+
+    def test_unsatisfiable_range(self):
+        response = self.serve(Range=f'bytes={len(self.content)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.content)}')
+
+    def test_not_modified(self):
+        etag = self.serve()['ETag']
+        self.assertEqual(etag, file_etag(os.stat(self.path)))
+        self.assertEqual(self.serve(If_None_Match=etag).status_code, 304)
+        last_modified = http_date(int(os.stat(self.path).st_mtime))
+        self.assertEqual(self.serve(If_Modified_Since=last_modified).status_code, 304)
+
+    def test_stale_if_range_sends_full_file(self):
+        response = self.serve(Range='bytes=0-9', If_Range='"0-0"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Length'], str(len(self.content)))
+
+
+class ResumableUploadTests(MediaRootTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(User.objects.create_user('annotator', password='pw'))
+        self.chunk_size = MIN_UPLOAD_CHUNK_SIZE
+        self.content = os.urandom(self.chunk_size * 2 + 1000)
+        response = self.client.post('/uploads/', json.dumps({
+            'folder_name': 'TVRI_SB_061119', 'video_title': '0051', 'size': len(self.content),
+            'chunk_size': self.chunk_size, 'sha256': hashlib.sha256(self.content).hexdigest(),
+        }), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.url = response['Location']
+        self.upload_id = response.json()['upload_id']
+
+    def send_chunk(self, index, data=None, checksum=None):
+        offset = index * self.chunk_size
+        data = self.content[offset:offset + self.chunk_size] if data is None else data
+        headers = {'Upload-Offset': str(offset)}
+        if checksum:
+            headers['Upload-Checksum'] = checksum
+        return self.client.patch(self.url, data, content_type='application/offset+octet-stream', headers=headers)
+
+    def test_resume_and_finalize(self):
+        self.assertEqual(self.send_chunk(2).status_code, 200)
+        self.assertEqual(self.send_chunk(0).status_code, 200)
+
+        # Koneksi putus: client menanyakan chunk yang belum diterima
+        status = self.client.get(self.url)
+        self.assertEqual(status.json()['missing_chunks'], [1])
+        self.assertEqual(status['Upload-Offset'], str(self.chunk_size))
+        self.assertEqual(self.client.post(f'{self.url}finalize/').status_code, 409)
+
+        self.assertEqual(self.send_chunk(1, checksum='0' * 64).status_code, 400)
+        self.assertEqual(self.client.get(self.url).json()['missing_chunks'], [1])
+        self.assertEqual(self.send_chunk(1).status_code, 200)
+
+        response = self.client.post(f'{self.url}finalize/')
+        self.assertEqual(response.status_code, 200)
+        video = Video.objects.get(id=response.json()['video_id'])
+        with open(video.file.path, 'rb') as f:
+            self.assertEqual(f.read(), self.content)
+        self.assertEqual(video.content_hash, hashlib.sha256(self.content).hexdigest())
+        self.assertFalse(os.path.exists(session_part_path(UploadSession.objects.get(id=self.upload_id))))
+
+        # Finalize diulang mengembalikan video yang sama, chunk baru ditolak
+        self.assertEqual(self.client.post(f'{self.url}finalize/').json()['video_id'], str(video.id))
+        self.assertEqual(self.send_chunk(0).status_code, 409)
+
+    def test_rejects_misaligned_and_short_chunks(self):
+        response = self.client.patch(
+            self.url, b'x' * 10, content_type='application/offset+octet-stream', headers={'Upload-Offset': '5'},
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.send_chunk(0, data=b'x' * 10).status_code, 400)
+        self.assertEqual(self.client.get(self.url).json()['received_chunks'], [])
+
+    def test_finalize_reports_bad_chunk(self):
+        self.send_chunk(0)
+        self.send_chunk(1, data=bytes(self.chunk_size))
+        self.send_chunk(2)
+        response = self.client.post(f'{self.url}finalize/')
+        self.assertEqual(response.status_code, 422)
+        self.assertFalse(Video.objects.exists())
+
+        # Client membandingkan sha256 per chunk dan hanya mengirim ulang chunk yang berbeda
+        data = response.json()
+        local = [
+            hashlib.sha256(self.content[offset:offset + data['chunk_size']]).hexdigest()
+            for offset in range(0, len(self.content), data['chunk_size'])
+        ]
+        bad = [index for index, digest in enumerate(data['chunk_sha256']) if digest != local[index]]
+        self.assertEqual(bad, [1])
+        self.assertEqual(self.send_chunk(1).status_code, 200)
+        self.assertEqual(self.client.post(f'{self.url}finalize/').status_code, 200)
+
+
+class EditDecisionListTests(MediaRootTestCase):
+
+    def setUp(self):
+        super().setUp()
+        os.makedirs(os.path.join(self.media_root, 'videos'))
+        with open(os.path.join(self.media_root, 'videos', 'TVRI_SB_061119_0051.mp4'), 'wb') as f:
+            f.write(b'video')
+        self.video = Video.objects.create(
+            title='TVRI_SB_061119_0051.mp4', folder_name='TVRI_SB_061119', file='videos/TVRI_SB_061119_0051.mp4',
+        )
+        self.segments = [
+            {'source_path': 'raw/n.mp4', 'source_in': 2.0, 'source_out': 12.0},
+            {'source_path': 'raw/n1.mp4', 'source_in': 0.0, 'source_out': 20.0},
+        ]
+
+    def test_slice_across_segments(self):
+        self.assertEqual(slice_segments(self.segments, 5.0, 15.0), [
+            {'source_path': 'raw/n.mp4', 'source_in': 7.0, 'source_out': 12.0},
+            {'source_path': 'raw/n1.mp4', 'source_in': 0.0, 'source_out': 5.0},
+        ])
+        self.assertEqual(slice_segments(self.segments, 10.0, 30.0), [
+            {'source_path': 'raw/n1.mp4', 'source_in': 0.0, 'source_out': 20.0},
+        ])
+        # Sisa yang lebih pendek dari MIN_SEGMENT_DURATION dibuang
+        self.assertEqual(len(slice_segments(self.segments, 0.0, 10.0005)), 1)
+
+    def render(self, during_cut=None):
+        def fake_cut_parts(cuts, **kwargs):
+            for _, _, _, part_path, _ in cuts:
+                open(part_path, 'wb').close()
+            if during_cut:
+                during_cut()
+            return ['smart'] * len(cuts)
+
+        def fake_concat(parts, output_path):
+            with open(output_path, 'wb') as f:
+                f.write(b'rendered')
+
+        with mock.patch('main.edl.probe_video', return_value={'duration': 20.0}), \
+                mock.patch('main.edl.probe_video_packets', return_value=[]), \
+                mock.patch('main.edl.cut_parts', side_effect=fake_cut_parts), \
+                mock.patch('main.edl.concat_video_files', side_effect=fake_concat), \
+                mock.patch('main.edl.get_metadata'):
+            render_video(self.video)
+        self.video.refresh_from_db()
+
+    def test_render_clears_needs_render(self):
+        save_segments(self.video, self.segments)
+        self.render()
+        self.assertFalse(self.video.needs_render)
+        with open(self.video.file.path, 'rb') as f:
+            self.assertEqual(f.read(), b'rendered')
+
+    def test_trim_during_render_keeps_needs_render(self):
+        save_segments(self.video, self.segments)
+        self.render(during_cut=lambda: save_segments(
+            Video.objects.get(id=self.video.id), slice_segments(self.segments, 1.0, 8.0),
+        ))
+        self.assertTrue(self.video.needs_render)
+
+
+class ExcelReaderTests(TestCase):
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+
+    def test_values_and_column_a_links_of_active_sheet(self):
+        workbook = openpyxl.Workbook()
+        workbook.active['A1'] = 'sheet lain'
+        sheet = workbook.create_sheet('anotasi')
+        sheet.append(['Link', 'Nama Data', 'Hasil Alignment (NEW)', 'Keterangan Annotator'])
+        sheet.append(['video 1', 'TVRI_SB_061119_0051', 1, '  oke  '])
+        sheet.append([None, None, None, None])
+        sheet.append(['https://drive.google.com/file/d/TEKS/view', 'TVRI_SB_061119_0052', 0.5, None])
+        sheet['A6'] = 'video 3'
+        sheet['B6'] = 'TVRI_SB_061119_0053'
+        sheet['A2'].hyperlink = 'https://drive.google.com/file/d/A&B/view'
+        sheet['A6'].hyperlink = 'https://drive.google.com/file/d/C/view'
+        workbook.active = 1
+        workbook.save(self.path)
+
+        self.assertEqual(read_header(self.path), ['Link', 'Nama Data', 'Hasil Alignment (NEW)', 'Keterangan Annotator'])
+        self.assertEqual(estimate_rows(self.path), 5)
+        rows = list(iter_rows(self.path))
+        self.assertEqual([(row.row, row.link, row.title) for row in rows], [
+            (2, 'https://drive.google.com/file/d/A&B/view', 'TVRI_SB_061119_0051'),
+            (4, 'https://drive.google.com/file/d/TEKS/view', 'TVRI_SB_061119_0052'),
+            (6, 'https://drive.google.com/file/d/C/view', 'TVRI_SB_061119_0053'),
+        ])
+        self.assertEqual([row.alignment for row in rows], [1, 0.5, None])
+        self.assertEqual(rows[0].comment, 'oke')
+        self.assertEqual(rows[2].username, '')
+
+    def test_missing_required_column(self):
+        workbook = openpyxl.Workbook()
+        workbook.active.append(['Link', 'Judul'])
+        workbook.save(self.path)
+        with self.assertRaises(MissingColumnError):
+            list(iter_rows(self.path))
+
+
+class StreamingZipTests(MediaRootTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.files = {}
+        for name in ('a.mp4', 'b.mp4'):
+            content = os.urandom(3000)
+            with open(os.path.join(self.media_root, name), 'wb') as f:
+                f.write(content)
+            self.files[f'folder/{name}'] = content
+        self.entries = [(os.path.join(self.media_root, name.split('/')[1]), name) for name in self.files]
+
+    def read_zip(self, data):
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.assertIsNone(archive.testzip())
+            return {name: archive.read(name) for name in archive.namelist()}
+
+    def test_streams_in_chunks(self):
+        chunks = list(iter_zip(self.entries + [('/tidak/ada.mp4', 'folder/hilang.mp4')], chunk_size=1024))
+        self.assertGreater(len([chunk for chunk in chunks if chunk]), 6)
+        self.assertEqual(self.read_zip(b''.join(chunks)), self.files)
+
+    def test_zip64_entries_and_directory(self):
+        # Batas Zip64 diperkecil supaya entry di atas batas tidak perlu file 4 GB
+        with mock.patch('zipfile.ZIP64_LIMIT', 1000):
+            data = b''.join(iter_zip(self.entries, chunk_size=1024))
+        # Record end of central directory Zip64
+        self.assertIn(b'PK\x06\x06', data)
+        self.assertEqual(self.read_zip(data), self.files)
+
+
+class FolderArchiveTests(MediaRootTestCase):
+    FOLDER = 'TVRI_SB_061119'
+
+    def setUp(self):
+        super().setUp()
+        os.makedirs(os.path.join(self.media_root, 'videos'))
+        self.add_video(51)
+        self.add_video(52)
+
+    def add_video(self, sequence):
+        name = f'videos/{self.FOLDER}_00{sequence}.mp4'
+        with open(os.path.join(self.media_root, name), 'wb') as f:
+            f.write(os.urandom(500))
+        return Video.objects.create(title=os.path.basename(name), folder_name=self.FOLDER, file=name)
+
+    def test_rebuilt_only_when_folder_changes(self):
+        self.assertIsNone(get_fresh_archive(self.FOLDER))
+        self.assertFalse(build_folder_archive(self.FOLDER)['skipped'])
+        archive = get_fresh_archive(self.FOLDER)
+        self.assertEqual(archive.file_count, 2)
+        self.assertTrue(build_folder_archive(self.FOLDER)['skipped'])
+
+        # Isi video berubah (mis. trim): ukuran/mtime beda, arsip basi
+        video_path = os.path.join(self.media_root, 'videos', f'{self.FOLDER}_0051.mp4')
+        with open(video_path, 'ab') as f:
+            f.write(b'trim')
+        self.assertIsNone(get_fresh_archive(self.FOLDER))
+        self.assertFalse(build_folder_archive(self.FOLDER)['skipped'])
+        self.assertIsNotNone(get_fresh_archive(self.FOLDER))
+
+        # Video baru di folder
+        self.add_video(53)
+        self.assertIsNone(get_fresh_archive(self.FOLDER))
+        self.assertEqual(build_folder_archive(self.FOLDER)['file_count'], 3)
+        archive = get_fresh_archive(self.FOLDER)
+        with zipfile.ZipFile(os.path.join(self.media_root, archive.path)) as zip_file:
+            self.assertEqual(len(zip_file.namelist()), 3)
+        hits = archive.hits
+        archive.refresh_from_db()
+        self.assertEqual(archive.hits, hits + 1)
+
+
+class FolderSummaryTests(TestCase):
+
+    def test_counts_per_folder(self):
+        for sequence, annotated in ((51, True), (52, False), (53, True)):
+            Video.objects.create(title=f'TVRI_SB_061120_00{sequence}.mp4', folder_name='TVRI_SB_061120', is_annotated=annotated)
+        Video.objects.create(title='TVRI_SB_061119_0051.mp4', folder_name='TVRI_SB_061119', is_annotated=True)
+        Video.objects.create(title='tanpa_folder.mp4', folder_name=None)
+        Video.objects.create(title='folder_kosong.mp4', folder_name='')
+
+        with self.assertNumQueries(1):
+            summaries = folder_summaries()
+        self.assertEqual(summaries, [
+            {'name': 'TVRI_SB_061119', 'annotated': 1, 'total': 1, 'all_done': True,
+             'display_name': 'TVRI - SIBI - 06/11/2019'},
+            {'name': 'TVRI_SB_061120', 'annotated': 2, 'total': 3, 'all_done': False,
+             'display_name': 'TVRI - SIBI - 06/11/2020'},
+        ])
+
+
+class TranscriptImportTests(TestCase):
+
+    def setUp(self):
+        for folder in ('TVRI_SB_061119', 'TVRI_SB_061120'):
+            for sequence in (51, 52):
+                Video.objects.create(title=f'{folder}_00{sequence}.mp4', folder_name=folder, transcript='lama')
+        Video.objects.create(title='TVRI_SB_061119_0053.mp4', folder_name='TVRI_SB_061119', transcript='sama')
+
+    def transcript(self, title):
+        return Video.objects.get(title=title).transcript
+
+    def test_sequence_in_several_folders_is_ambiguous(self):
+        result = import_transcripts(io.StringIO('nomor,transkrip\n51,baru\n53,sama\n99,x\nabc,y\n'))
+        self.assertEqual(result['ambiguous_rows'], [2])
+        self.assertEqual(result['not_found_rows'], [4])
+        self.assertEqual(result['invalid_rows'], [5])
+        self.assertEqual((result['updated'], result['unchanged']), (0, 1))
+        self.assertEqual(self.transcript('TVRI_SB_061119_0051.mp4'), 'lama')
+
+    def test_folder_resolves_ambiguity(self):
+        result = import_transcripts(io.StringIO('nomor,transkrip,folder_name\n51,baru,TVRI_SB_061120\n'))
+        self.assertEqual((result['updated'], result['ambiguous']), (1, 0))
+        self.assertEqual(self.transcript('TVRI_SB_061120_0051.mp4'), 'baru')
+        self.assertEqual(self.transcript('TVRI_SB_061119_0051.mp4'), 'lama')
+
+        result = import_transcripts(io.StringIO('nomor,transkrip\n52,dari parameter\n'), folder_name='TVRI_SB_061119')
+        self.assertEqual(result['updated'], 1)
+        self.assertEqual(self.transcript('TVRI_SB_061119_0052.mp4'), 'dari parameter')
+
+
+class IngestDryRunTests(MediaRootTestCase):
+    FOLDER = 'TVRI_SB_061119'
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('annotator', password='pw')
+        for number in (1, 2, 3):
+            path = os.path.join(self.media_root, 'videos', self.FOLDER, f'{self.FOLDER}_{number:04d}.mp4')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(os.urandom(200 * 1024))
+
+    def write_excel(self, numbers):
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.append(['Link', 'Nama Data', 'Keterangan Annotator', 'Nama Annotator', 'Hasil Alignment (NEW)'])
+        for number in numbers:
+            ws.append([f'{number:030d}', f'{self.FOLDER}_{number:04d}', f'keterangan {number}', 'annotator', 1])
+        os.makedirs(os.path.join(self.media_root, 'temp'), exist_ok=True)
+        wb.save(os.path.join(self.media_root, 'temp', 'anotasi.xlsx'))
+
+    def ingest(self, dry_run=False):
+        params = {'excel_path': 'temp/anotasi.xlsx', 'filename': 'anotasi.xlsx'}
+        if dry_run:
+            params['dry_run'] = True
+        job = enqueue_job(VideoJob.KIND_INGEST, None, params=params, user=self.user)
+        run_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.status, VideoJob.STATUS_DONE, job.error)
+        return job
+
+    def test_dry_run_diff(self):
+        self.write_excel([1, 2, 3])
+        self.assertEqual(self.ingest().result['created'], 3)
+        self.assertEqual(Video.objects.filter(folder_name=self.FOLDER).count(), 3)
+        self.assertEqual(self.ingest(dry_run=True).result['diff'], {'added': 0, 'changed': 0, 'unchanged': 3, 'missing': 0})
+
+        # Diubah di editor setelah import: upload ulang harus mendeteksinya sebagai berubah
+        self.client.force_login(self.user)
+        response = self.client.post(
+            f'/save_transcript/{self.FOLDER}_0002.mp4/', json.dumps({'comment': 'diubah di editor'}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        Video.objects.create(title=f'{self.FOLDER}_0099.mp4', folder_name=self.FOLDER, file='x.mp4')
+        self.write_excel([1, 2, 3, 4])
+
+        job = self.ingest(dry_run=True)
+        self.assertEqual(job.result['diff'], {'added': 1, 'changed': 1, 'unchanged': 2, 'missing': 1})
+        statuses = dict(job.ingest_rows.values_list('title', 'status'))
+        self.assertEqual(statuses[f'{self.FOLDER}_0002.mp4'], IngestRowResult.STATUS_UPDATED)
+        self.assertEqual(statuses[f'{self.FOLDER}_0004.mp4'], IngestRowResult.STATUS_CREATED)
+        self.assertEqual(statuses[f'{self.FOLDER}_0099.mp4'], IngestRowResult.STATUS_MISSING)
+        self.assertIn('comment', job.ingest_rows.get(title=f'{self.FOLDER}_0002.mp4').message)
+
+        # Dry run tidak menulis apa pun
+        self.assertEqual(Video.objects.get(title=f'{self.FOLDER}_0002.mp4').comment, 'diubah di editor')
+        self.assertFalse(Video.objects.filter(title=f'{self.FOLDER}_0004.mp4').exists())
+
+    def test_unchanged_rows_are_not_written(self):
+        self.write_excel([1, 2, 3])
+        self.ingest()
+        with mock.patch.object(Video.objects, 'bulk_update') as bulk_update:
+            job = self.ingest()
+        bulk_update.assert_not_called()
+        self.assertEqual(job.result['unchanged'], 3)
+
+        # Hash belum ada (import lama) tetapi isi sama: tetap tidak ditulis
+        Video.objects.update(import_hash=None)
+        with mock.patch.object(Video.objects, 'bulk_update') as bulk_update:
+            self.assertEqual(self.ingest().result['unchanged'], 3)
+        bulk_update.assert_not_called()
+
+
+def probe_info(duration, width=1920, audio_codec='aac'):
+    """ Bentuk hasil media_tools.probe_video """
+    return {
+        'duration': duration,
+        'bit_rate': None,
+        'video': {'codec': 'h264', 'profile': 'High', 'width': width, 'height': 1080, 'pix_fmt': 'yuv420p',
+                  'fps': '25/1', 'time_base': '1/12800'},
+        'audio': {'codec': audio_codec, 'sample_rate': 48000, 'channels': 2, 'channel_layout': 'stereo'},
+    }
+
+
+class MergeVideoFilesTests(TestCase):
+
+    def test_streams_compatible(self):
+        self.assertTrue(streams_compatible(probe_info(10), probe_info(20)))
+        self.assertFalse(streams_compatible(probe_info(10), probe_info(20, width=1280)))
+        self.assertFalse(streams_compatible(probe_info(10), probe_info(20, audio_codec='mp3')))
+        self.assertFalse(streams_compatible(probe_info(10), {**probe_info(20), 'video': None}))
+
+    @mock.patch('main.media_tools.concat_reencode')
+    @mock.patch('main.media_tools.concat_stream_copy')
+    def test_compatible_pair_is_stream_copied(self, stream_copy, reencode):
+        result = merge_video_files('n.mp4', 'n1.mp4', 'out.mp4', info1=probe_info(12.5), info2=probe_info(30))
+        self.assertEqual(result, (12.5, 'copy'))
+        stream_copy.assert_called_once_with(['n.mp4', 'n1.mp4'], 'out.mp4')
+        reencode.assert_not_called()
+
+    @mock.patch('main.media_tools.concat_reencode', return_value=[12.4, 30.0])
+    @mock.patch('main.media_tools.concat_stream_copy')
+    def test_incompatible_pair_is_reencoded(self, stream_copy, reencode):
+        result = merge_video_files('n.mp4', 'n1.mp4', 'out.mp4', info1=probe_info(12.5), info2=probe_info(30, width=1280))
+        self.assertEqual(result, (12.4, 'reencode'))
+        stream_copy.assert_not_called()
+
+    @mock.patch('main.media_tools.concat_reencode', return_value=[12.4, 30.0])
+    @mock.patch('main.media_tools.concat_stream_copy', side_effect=subprocess.CalledProcessError(1, 'ffmpeg'))
+    def test_failed_stream_copy_falls_back_to_reencode(self, stream_copy, reencode):
+        result = merge_video_files('n.mp4', 'n1.mp4', 'out.mp4', info1=probe_info(12.5), info2=probe_info(30))
+        self.assertEqual(result, (12.4, 'reencode'))
+        reencode.assert_called_once()
+
+    @mock.patch('main.media_tools.concat_reencode', return_value=[12.4, 30.0])
+    @mock.patch('main.media_tools.probe_video', side_effect=OSError('ffprobe tidak ada'))
+    def test_probe_failure_falls_back_to_reencode(self, probe_video, reencode):
+        self.assertEqual(merge_video_files('n.mp4', 'n1.mp4', 'out.mp4'), (12.4, 'reencode'))
+
+
+class LockTests(MediaRootTestCase):
+
+    def test_atomic_output_replaces_only_on_success(self):
+        path = os.path.join(self.media_root, 'video.mp4')
+        with open(path, 'wb') as f:
+            f.write(b'lama')
+
+        with self.assertRaises(RuntimeError):
+            with atomic_output(path) as tmp_path:
+                with open(tmp_path, 'wb') as f:
+                    f.write(b'setengah')
+                raise RuntimeError('encode gagal')
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'lama')
+
+        with atomic_output(path) as tmp_path:
+            with open(tmp_path, 'wb') as f:
+                f.write(b'baru')
+            # Pembaca masih melihat file lama selama file baru ditulis
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), b'lama')
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'baru')
+        self.assertEqual(os.listdir(self.media_root), ['video.mp4'])
+
+    def test_atomic_outputs_all_or_nothing(self):
+        paths = [os.path.join(self.media_root, name) for name in ('n.mp4', 'n1.mp4')]
+        with self.assertRaises(RuntimeError):
+            with atomic_outputs(paths) as tmp_paths:
+                for tmp_path in tmp_paths:
+                    open(tmp_path, 'wb').close()
+                raise RuntimeError('bagian kedua gagal')
+        self.assertEqual(os.listdir(self.media_root), [])
+
+    def test_file_lock_exclusive_and_shared(self):
+        lock_path = os.path.join(self.media_root, '.locks', 'pair.lock')
+        with file_lock(lock_path):
+            with self.assertRaises(LockBusy):
+                with file_lock(lock_path, blocking=False):
+                    pass
+        with file_lock(lock_path, shared=True):
+            with file_lock(lock_path, shared=True, blocking=False):
+                with self.assertRaises(LockBusy):
+                    with file_lock(lock_path, blocking=False):
+                        pass
+
+
+class MergeCacheEvictionTests(MediaRootTestCase):
+
+    def setUp(self):
+        super().setUp()
+        os.makedirs(os.path.join(self.media_root, merge_cache.CACHE_DIR))
+        now = timezone.now()
+        self.entries = []
+        for age, name in enumerate(('lama', 'sedang', 'baru')):
+            path = os.path.join(merge_cache.CACHE_DIR, f'{name}.mp4')
+            with open(os.path.join(self.media_root, path), 'wb') as f:
+                f.write(bytes(100))
+            self.entries.append(MergedVideoCache.objects.create(
+                key=name, path=path, source_n_path=name, source_next_path=name, size_bytes=100,
+                last_accessed_at=now - timedelta(hours=3 - age),
+            ))
+
+    def remaining(self):
+        return sorted(MergedVideoCache.objects.values_list('key', flat=True))
+
+    def test_evicts_least_recently_used(self):
+        video = Video.objects.create(title='TVRI_SB_061119_0051.mp4', merged_video_path=self.entries[0].path)
+        self.assertEqual(merge_cache.enforce_budget(max_bytes=200, dry_run=True), (1, 100))
+        self.assertEqual(len(self.remaining()), 3)
+
+        self.assertEqual(merge_cache.enforce_budget(max_bytes=200), (1, 100))
+        self.assertEqual(self.remaining(), ['baru', 'sedang'])
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, self.entries[0].path)))
+        video.refresh_from_db()
+        self.assertIsNone(video.merged_video_path)
+
+    def test_skips_entry_being_read(self):
+        with merge_cache.reading(self.entries[0].path):
+            self.assertEqual(merge_cache.enforce_budget(max_bytes=200), (1, 100))
+        self.assertEqual(self.remaining(), ['baru', 'lama'])
+
+    def test_skips_entry_of_active_trim(self):
+        video = Video.objects.create(title='TVRI_SB_061119_0051.mp4', merged_video_path=self.entries[0].path)
+        enqueue_job(VideoJob.KIND_TRIM, video, params={'start_time': 0, 'end_time': 1})
+        merge_cache.enforce_budget(max_bytes=100, keep_ids={self.entries[2].id})
+        self.assertEqual(self.remaining(), ['baru', 'lama'])
+
+
+class MergeVideoPairTests(MediaRootTestCase):
+
+    def setUp(self):
+        super().setUp()
+        os.makedirs(os.path.join(self.media_root, 'videos'))
+        for sequence in (51, 52):
+            name = f'videos/TVRI_SB_061119_00{sequence}.mp4'
+            with open(os.path.join(self.media_root, name), 'wb') as f:
+                f.write(b'video')
+            Video.objects.create(title=os.path.basename(name), folder_name='TVRI_SB_061119', file=name)
+        self.video = Video.objects.get(title='TVRI_SB_061119_0051.mp4')
+        patcher = mock.patch('main.editing.get_metadata', return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fake_merge(self, path1, path2, output_path, **kwargs):
+        with open(output_path, 'wb') as f:
+            f.write(b'merged')
+        return 12.5, 'copy'
+
+    def test_same_pair_is_merged_once(self):
+        with mock.patch('main.editing.merge_video_files', side_effect=self.fake_merge) as merge:
+            first = merge_video_pair(self.video)
+            second = merge_video_pair(Video.objects.get(id=self.video.id))
+        merge.assert_called_once()
+        self.assertEqual(first['merged_video_url'], second['merged_video_url'])
+        self.assertEqual(second['video_n_duration'], 12.5)
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.video_n_duration, 12.5)
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, self.video.merged_video_path)))
+
+    def test_pair_lock_held_during_merge(self):
+        lock_path = os.path.join(
+            self.media_root, 'edited_videos', '.locks', 'TVRI_SB_061119_0051_TVRI_SB_061119_0052.lock',
+        )
+
+        def merge_while_locked(*args, **kwargs):
+            # Merge kedua untuk pasangan yang sama harus menunggu (di sini: gagal tanpa blocking)
+            with self.assertRaises(LockBusy):
+                with file_lock(lock_path, blocking=False):
+                    pass
+            return self.fake_merge(*args, **kwargs)
+
+        with mock.patch('main.editing.merge_video_files', side_effect=merge_while_locked) as merge:
+            merge_video_pair(self.video)
+        merge.assert_called_once()
+        with file_lock(lock_path, blocking=False):
+            pass
+
+    def test_input_changed_during_merge_is_discarded(self):
+        path1 = self.video.file.path
+
+        def merge_then_trim(*args, **kwargs):
+            result = self.fake_merge(*args, **kwargs)
+            os.utime(path1, ns=(0, 0))
+            return result
+
+        with mock.patch('main.editing.merge_video_files', side_effect=merge_then_trim):
+            with self.assertRaises(VideoProcessingError):
+                merge_video_pair(self.video)
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'edited_videos', 'cache')), [])
+        self.video.refresh_from_db()
+        self.assertIsNone(self.video.merged_video_path)
+
+
+def mp4_box(box_type, payload=b'', large=False):
+    if large:
+        return struct.pack('>I4sQ', 1, box_type, 16 + len(payload)) + payload
+    return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+
+class FaststartTests(MediaRootTestCase):
+
+    def write(self, data):
+        path = os.path.join(self.media_root, 'video.mp4')
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_moov_before_mdat(self):
+        ftyp = mp4_box(b'ftyp', b'isom')
+        self.assertTrue(moov_before_mdat(self.write(ftyp + mp4_box(b'moov', b'x' * 20) + mp4_box(b'mdat', b'y' * 50))))
+        self.assertFalse(moov_before_mdat(self.write(ftyp + mp4_box(b'mdat', b'y' * 50) + mp4_box(b'moov'))))
+        # Ukuran atom 64-bit dan atom terakhir dengan ukuran 0
+        self.assertTrue(moov_before_mdat(self.write(ftyp + mp4_box(b'free', b'z' * 10, large=True) + mp4_box(b'moov'))))
+        self.assertFalse(moov_before_mdat(self.write(ftyp + struct.pack('>I4s', 0, b'mdat') + b'y' * 50)))
+        self.assertIsNone(moov_before_mdat(self.write(b'bukan video mp4')))
+
+    def test_ensure_faststart_rewrites_only_mdat_first(self):
+        def remux(source_path, output_path):
+            with open(output_path, 'wb') as f:
+                f.write(mp4_box(b'moov') + mp4_box(b'mdat'))
+
+        with mock.patch('main.media_tools.faststart_copy', side_effect=remux) as faststart_copy:
+            self.assertFalse(ensure_faststart(self.write(mp4_box(b'moov') + mp4_box(b'mdat'))))
+            self.assertFalse(ensure_faststart(self.write(b'bukan video mp4')))
+            faststart_copy.assert_not_called()
+
+            path = self.write(mp4_box(b'mdat', b'y' * 50) + mp4_box(b'moov'))
+            self.assertTrue(ensure_faststart(path))
+        self.assertTrue(moov_before_mdat(path))
+
+    @unittest.skipUnless(shutil.which('ffmpeg'), 'ffmpeg tidak tersedia')
+    def test_ffmpeg_output_is_made_faststart(self):
+        path = os.path.join(self.media_root, 'video.mp4')
+        # Tanpa +faststart ffmpeg menulis moov di akhir file
+        subprocess.run(
+            ['ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc=duration=1:size=160x120:rate=25', path],
+            check=True, capture_output=True,
+        )
+        self.assertFalse(moov_before_mdat(path))
+        self.assertTrue(ensure_faststart(path))
+        self.assertTrue(moov_before_mdat(path))
+        self.assertEqual(decode_errors(path), '')
+
+
+@unittest.skipUnless(shutil.which('ffmpeg') and shutil.which('ffprobe'), 'ffmpeg tidak tersedia')
+class SmartCutTests(TestCase):
+    """ Klip 4 detik 25 fps dengan keyframe tiap 1 detik """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.work_dir = tempfile.mkdtemp()
+        cls.source = os.path.join(cls.work_dir, 'source.mp4')
+        subprocess.run(
+            [
+                'ffmpeg', '-v', 'error', '-f', 'lavfi', '-i', 'testsrc=duration=4:size=320x240:rate=25',
+                '-f', 'lavfi', '-i', 'sine=duration=4', '-c:v', 'libx264', '-profile:v', 'main',
+                '-g', '25', '-keyint_min', '25', '-sc_threshold', '0', '-pix_fmt', 'yuv420p',
+                '-c:a', 'aac', '-shortest', cls.source,
+            ],
+            check=True, capture_output=True,
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.work_dir, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_mid_gop_cut_decodes(self):
+        output = os.path.join(self.work_dir, 'cut.mp4')
+        self.assertEqual(cut_video(self.source, 0.5, 3.3, output), 'smart')
+        self.assertEqual(count_video_packets(output), 70)
+        self.assertEqual(decode_errors(output), '')
+
+    def test_undecodable_result_falls_back_to_reencode(self):
+        output = os.path.join(self.work_dir, 'fallback.mp4')
+        with mock.patch('main.media_tools.decode_errors', return_value='corrupt'), \
+                mock.patch('main.media_tools.reencode_cut') as reencode_cut:
+            self.assertEqual(cut_video(self.source, 0.5, 3.3, output), 'reencode')
+        reencode_cut.assert_called_once()
+
+
+class NextVideoTests(TestCase):
+
+    def create(self, title, folder_name='TVRI_SB_061119'):
+        return Video.objects.create(title=title, folder_name=folder_name)
+
+    def test_sequence_from_title(self):
+        video = self.create('TVRI_SB_061119_0052.mp4')
+        self.assertEqual(video.sequence, 52)
+        video.title = 'TVRI_SB_061119_0060.mp4'
+        video.save(update_fields=['title'])
+        video.refresh_from_db()
+        self.assertEqual(video.sequence, 60)
+
+    def test_next_in_same_folder(self):
+        video = self.create('TVRI_SB_061119_0052.mp4')
+        self.create('TVRI_SB_061120_0053.mp4', folder_name='TVRI_SB_061120')
+        next_video = self.create('TVRI_SB_061119_0053.mp4')
+        self.create('TVRI_SB_061119_0054.mp4')
+
+        self.assertEqual(get_next_video(video), (next_video.title, next_video))
+
+    def test_last_video_has_no_next(self):
+        video = self.create('TVRI_SB_061119_0052.mp4')
+        self.assertEqual(get_next_video(video), ('TVRI_SB_061119_0053.mp4', None))
+
+    def test_gap_in_sequence_has_no_next(self):
+        video = self.create('TVRI_SB_061119_0052.mp4')
+        self.create('TVRI_SB_061119_0054.mp4')
+        self.assertEqual(get_next_video(video), ('TVRI_SB_061119_0053.mp4', None))
+
+    def test_without_folder_matches_title(self):
+        video = self.create('TVRI_SB_061119_0052.mp4', folder_name=None)
+        next_video = self.create('TVRI_SB_061119_0053.mp4', folder_name=None)
+        self.assertEqual(get_next_video(video)[1], next_video)
+
+    def test_title_without_sequence(self):
+        video = self.create('pembukaan.mp4')
+        self.assertIsNone(video.sequence)
+        self.assertEqual(get_next_video(video), (None, None))
@@ -0,0 +1,103 @@
+"""
+Import transkrip dari CSV (upload_transcript_csv).
+
+Format CSV: baris pertama header, kolom 1 nomor segmen (misal 52 untuk
+TVRI_SB_061119_0052.mp4), kolom 2 transkrip. Folder diambil dari kolom
+header "folder_name" jika ada, atau dari parameter folder_name request.
+Tanpa folder, nomor segmen dicocokkan di semua folder dan baris yang cocok
+di lebih dari satu folder dilaporkan ambigu (tidak ditebak).
+
+CSV dibaca langsung dari upload (tidak disimpan ke transcripts/), semua
+video dicari dengan satu query lewat index (folder_name, sequence), lalu
+transkrip yang berubah ditulis dengan bulk_update dalam satu transaksi.
+"""
+import csv
+
+from django.db import transaction
+
+from .models import Video
+
+BATCH_SIZE = 500
+# Jumlah baris maksimal per jenis masalah yang dikembalikan di response
+MAX_REPORTED_ROWS = 100
+
+
+def _iter_entries(stream):
+    """ Yield (nomor baris, folder atau None, nomor segmen atau None, transkrip) dari CSV """
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return
+    names = [name.strip().lower() for name in header]
+    folder_column = names.index('folder_name') if 'folder_name' in names else None
+
+    for line, row in enumerate(reader, start=2):
+        if not any(cell.strip() for cell in row):
+            continue
+        try:
+            sequence = int(row[0])
+            transcript = row[1]
+        except (IndexError, ValueError):
+            yield line, None, None, None
+            continue
+        folder = row[folder_column].strip() if folder_column is not None and folder_column < len(row) else ''
+        yield line, folder or None, sequence, transcript
+
+
+def import_transcripts(stream, folder_name=None):
+    """
+    Terapkan transkrip dari CSV (file teks) ke Video. Return ringkasan:
+    jumlah updated/unchanged dan baris invalid/not_found/ambiguous.
+    """
+    entries = {}  # (folder, sequence) -> (baris, transkrip); baris terakhir menang
+    invalid = []
+    for line, folder, sequence, transcript in _iter_entries(stream):
+        if sequence is None:
+            invalid.append(line)
+            continue
+        entries[(folder or folder_name or None, sequence)] = (line, transcript)
+
+    by_key, by_sequence = {}, {}
+    if entries:
+        folders = {folder for folder, _ in entries}
+        videos = Video.objects.filter(sequence__in={sequence for _, sequence in entries})
+        if None not in folders:
+            videos = videos.filter(folder_name__in=folders)
+        for video in videos.only('id', 'folder_name', 'sequence', 'transcript'):
+            by_key.setdefault((video.folder_name, video.sequence), []).append(video)
+            by_sequence.setdefault(video.sequence, []).append(video)
+
+    changed, unchanged, not_found, ambiguous = [], 0, [], []
+    for (folder, sequence), (line, transcript) in sorted(entries.items(), key=lambda item: item[1][0]):
+        matches = by_key.get((folder, sequence), []) if folder else by_sequence.get(sequence, [])
+        if not matches:
+            not_found.append(line)
+            continue
+        if len({video.folder_name for video in matches}) > 1:
+            ambiguous.append(line)
+            continue
+        # Duplikat judul di folder yang sama ikut diperbarui
+        for video in matches:
+            if video.transcript == transcript:
+                unchanged += 1
+            else:
+                video.transcript = transcript
+                changed.append(video)
+
+    with transaction.atomic():
+        Video.objects.bulk_update(changed, ['transcript'], batch_size=BATCH_SIZE)
+
+    for line in not_found:
+        print(f"Error for row {line}: video tidak ditemukan")
+    for line in ambiguous:
+        print(f"Error for row {line}: nomor video ada di lebih dari satu folder, isi folder_name")
+    return {
+        'updated': len(changed),
+        'unchanged': unchanged,
+        'invalid_rows': invalid[:MAX_REPORTED_ROWS],
+        'not_found_rows': not_found[:MAX_REPORTED_ROWS],
+        'ambiguous_rows': ambiguous[:MAX_REPORTED_ROWS],
+        'invalid': len(invalid),
+        'not_found': len(not_found),
+        'ambiguous': len(ambiguous),
+    }
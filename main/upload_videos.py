@@ -1,26 +1,231 @@
+"""
+Upload semua .mp4 di satu folder lewat upload resumable (/uploads/).
+
+Tiap file dikirim per chunk dengan beberapa koneksi paralel. Jika koneksi
+putus atau script dihentikan, jalankan ulang dengan argumen yang sama: upload
+yang belum selesai dilanjutkan dari chunk yang belum diterima server
+(disimpan di .upload_state.json di folder video), file yang sudah selesai
+dilewati.
+
+    python main/upload_videos.py "D:/video-riset" 29_Januari_2020 -u admin -p rahasia
+"""
+import argparse
+import getpass
+import hashlib
+import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import requests
 
 folder_path = r"C:\Users\Fiona Ratu Maheswari\Documents\Kerjaan eui\Asdos\video-riset"  # Ubah ke path folder yang diinginkan
-url = "http://127.0.0.1:8000/upload_video/"
+server_url = "http://127.0.0.1:8000"
 
 folder_name = "29_Januari_2020"
-count = 1
 
-for file_name in os.listdir(folder_path):
-    if file_name.endswith(".mp4"):  # Only upload files with .mp4
-        file_path = os.path.join(folder_path, file_name)
-        
+STATE_FILENAME = '.upload_state.json'
+CHUNK_SIZE = 8 * 1024 * 1024
+RETRIES = 5
+
+
+def login(session, base_url, username, password):
+    """ Login lewat form /login/ (butuh cookie CSRF) """
+    login_url = f"{base_url}/login/"
+    session.get(login_url).raise_for_status()
+    response = session.post(
+        login_url,
+        data={
+            'username': username,
+            'password': password,
+            'csrfmiddlewaretoken': session.cookies.get('csrftoken', ''),
+        },
+        headers={'Referer': login_url},
+        allow_redirects=False,
+    )
+    if response.status_code != 302 or 'sessionid' not in session.cookies:
+        raise SystemExit("Login gagal, cek username/password")
+
+
+def file_sha256(path):
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for data in iter(lambda: f.read(1024 * 1024), b''):
+            hasher.update(data)
+    return hasher.hexdigest()
+
+
+def with_retry(func, what):
+    """ Ulangi request yang gagal karena jaringan/server dengan jeda bertambah """
+    for attempt in range(RETRIES):
+        try:
+            response = func()
+            if response.status_code < 500:
+                return response
+            error = f"HTTP {response.status_code}"
+        except requests.RequestException as e:
+            error = str(e)
+        delay = 2 ** attempt
+        print(f"  ⚠️ {what} gagal ({error}), coba lagi dalam {delay}s")
+        time.sleep(delay)
+    raise RuntimeError(f"{what} gagal setelah {RETRIES} percobaan")
+
+
+class Uploader:
+    def __init__(self, base_url, cookies, workers, chunk_size):
+        self.base_url = base_url
+        self.cookies = cookies
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.local = threading.local()
+
+    def session(self):
+        # Satu requests.Session per thread, cookie login dibagi
+        if not hasattr(self.local, 'session'):
+            self.local.session = requests.Session()
+            self.local.session.cookies.update(self.cookies)
+        return self.local.session
+
+    def create(self, file_path, video_title):
+        response = with_retry(lambda: self.session().post(
+            f"{self.base_url}/uploads/",
+            json={
+                'folder_name': folder_name,
+                'video_title': video_title,
+                'size': os.path.getsize(file_path),
+                'chunk_size': self.chunk_size,
+                'sha256': file_sha256(file_path),
+                'filename': os.path.basename(file_path),
+            },
+        ), 'Membuat upload')
+        response.raise_for_status()
+        return response.json()
+
+    def status(self, upload_id):
+        response = with_retry(lambda: self.session().get(f"{self.base_url}/uploads/{upload_id}/"), 'Cek status')
+        if response.status_code == 404:
+            return None
+        response.raise_for_status()
+        return response.json()
+
+    def send_chunk(self, file_path, upload, index):
+        offset = index * upload['chunk_size']
+        with open(file_path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(upload['chunk_size'])
+        response = with_retry(lambda: self.session().patch(
+            f"{self.base_url}/uploads/{upload['upload_id']}/",
+            data=data,
+            headers={
+                'Upload-Offset': str(offset),
+                'Upload-Checksum': hashlib.sha256(data).hexdigest(),
+                'Content-Type': 'application/offset+octet-stream',
+            },
+        ), f"Chunk {index}")
+        if response.status_code != 200:
+            raise RuntimeError(f"Chunk {index} ditolak: {response.text}")
+        return len(data)
+
+    def finalize(self, upload_id):
+        response = with_retry(
+            lambda: self.session().post(f"{self.base_url}/uploads/{upload_id}/finalize/"), 'Finalize',
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"Finalize gagal: {response.text}")
+        return response.json()
+
+    def upload(self, file_path, upload):
+        """ Kirim chunk yang belum diterima server secara paralel, lalu finalize """
+        missing = upload['missing_chunks']
+        started = time.perf_counter()
+        sent = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self.send_chunk, file_path, upload, index) for index in missing]
+            for done, future in enumerate(as_completed(futures), start=1):
+                sent += future.result()
+                elapsed = time.perf_counter() - started
+                print(
+                    f"\r  {done}/{len(missing)} chunk, {sent / 1024 / 1024:.1f} MB "
+                    f"({sent / 1024 / 1024 / max(elapsed, 1e-6):.1f} MB/s)",
+                    end='', flush=True,
+                )
+        if missing:
+            print()
+        return self.finalize(upload['upload_id'])
+
+
+def load_state(path):
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(path, state):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def main():
+    global folder_name
+
+    parser = argparse.ArgumentParser(description="Upload video resumable per chunk")
+    parser.add_argument('folder_path', nargs='?', default=folder_path)
+    parser.add_argument('folder_name', nargs='?', default=folder_name)
+    parser.add_argument('--url', default=server_url, help="Alamat server, misal http://127.0.0.1:8000")
+    parser.add_argument('-u', '--username', required=True)
+    parser.add_argument('-p', '--password')
+    parser.add_argument('--workers', type=int, default=4, help="Jumlah chunk yang dikirim bersamaan")
+    parser.add_argument('--chunk-mb', type=int, default=CHUNK_SIZE // 1024 // 1024)
+    args = parser.parse_args()
+    folder_name = args.folder_name
+    base_url = args.url.rstrip('/')
+
+    session = requests.Session()
+    login(session, base_url, args.username, args.password or getpass.getpass())
+    uploader = Uploader(base_url, session.cookies, max(1, args.workers), args.chunk_mb * 1024 * 1024)
+
+    state_path = os.path.join(args.folder_path, STATE_FILENAME)
+    state = load_state(state_path)
+
+    # Urutan nama file menentukan nomor video, jadi harus sama setiap kali dijalankan ulang
+    file_names = sorted(name for name in os.listdir(args.folder_path) if name.endswith(".mp4"))
+    for count, file_name in enumerate(file_names, start=1):
+        file_path = os.path.join(args.folder_path, file_name)
         video_title = f"{count:04d}"
-        with open(file_path, "rb") as file:
-            files = {"file": file}
-            data = {
-                "folder_name": folder_name,
-                "video_title": video_title
-            }
-            response = requests.post(url, files=files, data=data)
-            
-            # Print the response from the server
-            print(f"Uploaded: {file_name} -> {response.json()}")
-
-        count += 1
+        key = f"{folder_name}/{file_name}"
+        entry = state.get(key)
+        stat = os.stat(file_path)
+
+        if entry and entry.get('done'):
+            print(f"Skip (sudah diupload): {file_name}")
+            continue
+
+        upload = None
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            upload = uploader.status(entry['upload_id'])
+            if upload and upload['status'] == 'complete':
+                # Finalize sudah berhasil tapi response-nya tidak sampai
+                state[key]['done'] = True
+                save_state(state_path, state)
+                print(f"Skip (sudah diupload): {file_name}")
+                continue
+            if upload:
+                print(f"Lanjutkan: {file_name} ({len(upload['missing_chunks'])} chunk tersisa)")
+        if not upload:
+            upload = uploader.create(file_path, video_title)
+            print(f"Upload: {file_name} ({upload['chunk_count']} chunk)")
+            state[key] = {'upload_id': upload['upload_id'], 'size': stat.st_size, 'mtime': stat.st_mtime}
+            save_state(state_path, state)
+
+        result = uploader.upload(file_path, upload)
+        state[key]['done'] = True
+        save_state(state_path, state)
+        print(f"Uploaded: {file_name} -> {result}")
+
+
+if __name__ == '__main__':
+    main()
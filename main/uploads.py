@@ -0,0 +1,362 @@
+"""
+Upload video tanpa buffer di memori.
+
+StreamingVideoUploadHandler menulis chunk upload langsung ke file di bawah
+MEDIA_ROOT sambil menghitung sha256, sehingga memori per upload konstan
+berapa pun ukuran file. File lalu dipindah (rename) ke raw_videos/, dan
+salinan di videos/ dibuat sebagai hardlink. Hardlink aman karena semua
+penulisan ke file video (trim, render) memakai atomic_output: file baru
+menggantikan link lama, isi raw tidak ikut berubah.
+
+Untuk file besar ada upload resumable (mirip tus): client membuat
+UploadSession, mengirim chunk dengan PATCH + header Upload-Offset (boleh
+paralel, tiap chunk ditulis di posisinya sendiri dalam satu file .part),
+menanyakan chunk yang belum diterima jika koneksi putus, lalu finalize.
+Finalize memeriksa sha256 dan memakai jalur yang sama dengan upload biasa;
+jika sha256 tidak cocok, response 422 memuat sha256 tiap chunk supaya
+client hanya mengirim ulang chunk yang berbeda.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .locks import atomic_output, file_lock
+from .media_tools import try_faststart
+from .metadata import probe_and_store
+from .models import UploadChunk, UploadSession, Video
+from .proxies import schedule_proxies
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_TMP_DIR = os.path.join('raw_videos', '.uploads')
+HASH_CHUNK_SIZE = 1024 * 1024
+# Ukuran chunk upload resumable; satu PATCH = satu chunk
+DEFAULT_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+MIN_UPLOAD_CHUNK_SIZE = 256 * 1024
+MAX_UPLOAD_CHUNK_SIZE = 64 * 1024 * 1024
+
+
+class UploadError(Exception):
+    """ Error upload resumable yang pesannya aman ditampilkan ke client """
+
+    def __init__(self, message, status=400, details=None):
+        super().__init__(message)
+        self.status = status
+        self.details = details or {}
+
+
+class HashedUploadedFile(UploadedFile):
+    """ File upload yang sudah ada di disk beserta sha256-nya """
+
+    def __init__(self, path, name, content_type, size, charset, content_hash):
+        super().__init__(open(path, 'rb'), name, content_type, size, charset)
+        self.path = path
+        self.content_hash = content_hash
+
+    def temporary_file_path(self):
+        return self.path
+
+    def close(self):
+        super().close()
+        # Sama seperti TemporaryUploadedFile: file yang tidak dipindah view dihapus
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class StreamingVideoUploadHandler(FileUploadHandler):
+    """ Menulis upload langsung ke MEDIA_ROOT/raw_videos/.uploads sambil menghitung sha256 """
+    chunk_size = HASH_CHUNK_SIZE
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        upload_dir = os.path.join(settings.MEDIA_ROOT, UPLOAD_TMP_DIR)
+        os.makedirs(upload_dir, exist_ok=True)
+        self.path = os.path.join(upload_dir, f"{uuid.uuid4().hex}.part")
+        self.file = open(self.path, 'wb')
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.file.write(raw_data)
+        self.hasher.update(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        self.file.close()
+        return HashedUploadedFile(
+            self.path, self.file_name, self.content_type, file_size,
+            self.charset, self.hasher.hexdigest(),
+        )
+
+    def upload_interrupted(self):
+        if hasattr(self, 'file'):
+            self.file.close()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+def link_or_copy(source_path, target_path):
+    """ Salinan kedua tanpa menulis ulang isi file jika filesystem mendukung hardlink """
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    with atomic_output(target_path) as tmp_path:
+        try:
+            os.link(source_path, tmp_path)
+        except OSError:
+            shutil.copyfile(source_path, tmp_path)
+
+
+def store_upload(uploaded_file, raw_path, video_path):
+    """
+    Menyimpan file upload ke raw_path dan video_path (path absolut).
+    Return sha256 isi file.
+    """
+    os.makedirs(os.path.dirname(raw_path), exist_ok=True)
+    content_hash = getattr(uploaded_file, 'content_hash', None)
+    if isinstance(uploaded_file, HashedUploadedFile):
+        # Sudah di MEDIA_ROOT, cukup rename
+        uploaded_file.file.close()
+        os.replace(uploaded_file.temporary_file_path(), raw_path)
+    else:
+        hasher = hashlib.sha256()
+        with atomic_output(raw_path) as tmp_path:
+            with open(tmp_path, 'wb') as f:
+                for chunk in uploaded_file.chunks(HASH_CHUNK_SIZE):
+                    f.write(chunk)
+                    hasher.update(chunk)
+        content_hash = hasher.hexdigest()
+
+    # Moov di depan supaya editor bisa mulai memutar tanpa membaca ujung file;
+    # content_hash tetap hash file yang di-upload
+    try_faststart(raw_path)
+    link_or_copy(raw_path, video_path)
+    return content_hash
+
+
+def create_uploaded_video(folder_name, video_title, uploaded_file):
+    """ Simpan file upload sebagai Video baru di folder_name (raw + videos/) """
+    video_filename = f"{folder_name}_{video_title}.mp4"
+    raw_video_file = default_storage.get_available_name(os.path.join('raw_videos', folder_name, video_filename))
+    video_file_new = default_storage.get_available_name(os.path.join('videos', folder_name, video_filename))
+    # Satu kali tulis: raw dipindah dari file upload, videos/ dibuat sebagai hardlink
+    content_hash = store_upload(
+        uploaded_file, default_storage.path(raw_video_file), default_storage.path(video_file_new),
+    )
+
+    video = Video.objects.create(
+        title=video_filename, file=video_file_new, folder_name=folder_name, content_hash=content_hash,
+    )
+    # Probe sekali saat ingest, editor membaca metadata ini tanpa decode
+    probe_and_store(video)
+    # Proxy editor dibuat worker di belakang, editor memakai file asli sampai proxy siap
+    schedule_proxies([video])
+    return video
+
+
+# Upload resumable
+
+def session_part_path(session):
+    return os.path.join(settings.MEDIA_ROOT, UPLOAD_TMP_DIR, f"{session.id.hex}.part")
+
+
+def _session_lock_path(session):
+    return os.path.join(settings.MEDIA_ROOT, UPLOAD_TMP_DIR, '.locks', f"{session.id.hex}.lock")
+
+
+def create_session(user, folder_name, video_title, size, chunk_size=None, sha256=None, filename=None):
+    """ Buat UploadSession dan file .part seukuran file akhir (sparse) """
+    if not folder_name or not video_title:
+        raise UploadError('folder_name dan video_title wajib diisi')
+    try:
+        size = int(size)
+        chunk_size = int(chunk_size or getattr(settings, 'UPLOAD_CHUNK_SIZE', DEFAULT_UPLOAD_CHUNK_SIZE))
+    except (TypeError, ValueError):
+        raise UploadError('size dan chunk_size harus angka')
+    if size <= 0:
+        raise UploadError('size harus lebih dari 0')
+    if not MIN_UPLOAD_CHUNK_SIZE <= chunk_size <= MAX_UPLOAD_CHUNK_SIZE:
+        raise UploadError(
+            f'chunk_size harus antara {MIN_UPLOAD_CHUNK_SIZE} dan {MAX_UPLOAD_CHUNK_SIZE} byte'
+        )
+
+    session = UploadSession.objects.create(
+        folder_name=folder_name, video_title=video_title, filename=filename,
+        size=size, chunk_size=chunk_size, sha256=(sha256 or '').lower() or None,
+        created_by=user if user and user.is_authenticated else None,
+    )
+    part_path = session_part_path(session)
+    os.makedirs(os.path.dirname(part_path), exist_ok=True)
+    with open(part_path, 'wb') as f:
+        f.truncate(size)
+    return session
+
+
+def received_chunks(session):
+    return sorted(session.chunks.values_list('index', flat=True))
+
+
+def session_to_dict(session):
+    received = received_chunks(session)
+    received_set = set(received)
+    return {
+        'upload_id': str(session.id),
+        'folder_name': session.folder_name,
+        'video_title': session.video_title,
+        'size': session.size,
+        'chunk_size': session.chunk_size,
+        'chunk_count': session.chunk_count,
+        'received_chunks': received,
+        'missing_chunks': [i for i in range(session.chunk_count) if i not in received_set],
+        'status': session.status,
+        'video_id': str(session.video_id) if session.video_id else None,
+    }
+
+
+def write_chunk(session, offset, stream, content_length, checksum=None):
+    """
+    Tulis satu chunk dari stream (body request) ke posisinya di file .part.
+    offset harus kelipatan chunk_size dan panjang body tepat satu chunk, jadi
+    chunk yang dikirim ulang (retry/resume) cukup menimpa posisi yang sama.
+    checksum opsional: sha256 hex isi chunk. Return index chunk.
+    """
+    if session.status != UploadSession.STATUS_UPLOADING:
+        raise UploadError('Upload sudah selesai', status=409)
+    try:
+        offset = int(offset)
+        content_length = int(content_length)
+    except (TypeError, ValueError):
+        raise UploadError('Header Upload-Offset dan Content-Length wajib diisi')
+    if offset < 0 or offset >= session.size or offset % session.chunk_size:
+        raise UploadError(f'Upload-Offset {offset} bukan awal chunk', status=409)
+
+    index = offset // session.chunk_size
+    expected_length = min(session.chunk_size, session.size - offset)
+    if content_length != expected_length:
+        raise UploadError(f'Chunk {index} harus {expected_length} byte, diterima {content_length}')
+
+    part_path = session_part_path(session)
+    if not os.path.exists(part_path):
+        raise UploadError('File upload sementara tidak ditemukan, buat upload baru', status=410)
+
+    hasher = hashlib.sha256()
+    written = 0
+    with open(part_path, 'r+b') as f:
+        f.seek(offset)
+        while written < expected_length:
+            data = stream.read(min(HASH_CHUNK_SIZE, expected_length - written))
+            if not data:
+                break
+            f.write(data)
+            hasher.update(data)
+            written += len(data)
+    error = None
+    if written != expected_length:
+        error = f'Chunk {index} terputus ({written}/{expected_length} byte)'
+    elif checksum and hasher.hexdigest() != checksum.lower():
+        error = f'Checksum chunk {index} tidak cocok'
+    if error:
+        # Isi lama di posisi ini sudah tertimpa sebagian, chunk harus dikirim ulang
+        UploadChunk.objects.filter(session=session, index=index).delete()
+        raise UploadError(error)
+
+    # Baris chunk dibuat setelah isinya tertulis; chunk yang dikirim ulang cukup diperbarui
+    try:
+        with transaction.atomic():
+            UploadChunk.objects.create(session=session, index=index, size=written)
+    except IntegrityError:
+        UploadChunk.objects.filter(session=session, index=index).update(size=written)
+    UploadSession.objects.filter(id=session.id).update(updated_at=timezone.now())
+    return index
+
+
+def _file_sha256(path):
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for data in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            hasher.update(data)
+    return hasher.hexdigest()
+
+
+def _chunk_sha256s(session, path):
+    """ sha256 tiap chunk di file .part, untuk menemukan chunk yang rusak """
+    digests = []
+    with open(path, 'rb') as f:
+        for _ in range(session.chunk_count):
+            hasher = hashlib.sha256()
+            remaining = session.chunk_size
+            while remaining:
+                data = f.read(min(HASH_CHUNK_SIZE, remaining))
+                if not data:
+                    break
+                hasher.update(data)
+                remaining -= len(data)
+            digests.append(hasher.hexdigest())
+    return digests
+
+
+def finalize_session(session):
+    """ Gabungkan upload menjadi Video setelah semua chunk diterima. Return Video """
+    with file_lock(_session_lock_path(session)):
+        session.refresh_from_db()
+        if session.status == UploadSession.STATUS_COMPLETE:
+            # Finalize diulang (mis. response sebelumnya hilang): kembalikan hasil yang sama
+            if session.video:
+                return session.video
+            raise UploadError('Upload sudah selesai', status=409)
+
+        missing = session.chunk_count - session.chunks.count()
+        if missing:
+            raise UploadError(f'{missing} chunk belum diterima', status=409)
+
+        part_path = session_part_path(session)
+        # Chunk ditulis langsung di posisinya, jadi file .part sudah utuh; cukup dicek
+        content_hash = _file_sha256(part_path)
+        if session.sha256 and content_hash != session.sha256:
+            # Baca ulang per chunk hanya saat gagal: client membandingkan dengan sha256 chunk miliknya
+            # dan cukup mengirim ulang chunk yang berbeda sebelum finalize lagi
+            raise UploadError('Checksum file tidak cocok, kirim ulang chunk yang rusak', status=422, details={
+                'chunk_size': session.chunk_size,
+                'chunk_sha256': _chunk_sha256s(session, part_path),
+            })
+
+        uploaded_file = HashedUploadedFile(
+            part_path, session.filename or f"{session.video_title}.mp4", 'video/mp4',
+            session.size, None, content_hash,
+        )
+        video = create_uploaded_video(session.folder_name, session.video_title, uploaded_file)
+
+        session.status = UploadSession.STATUS_COMPLETE
+        session.video = video
+        session.save(update_fields=['status', 'video', 'updated_at'])
+        session.chunks.all().delete()
+
+    logger.info(f"Upload resumable selesai: {video.title} ({session.size} byte)")
+    return video
+
+
+def cleanup_sessions(max_age_hours, dry_run=False):
+    """ Hapus sesi upload (dan file .part) yang tidak disentuh lebih dari max_age_hours. Return (jumlah, byte) """
+    cutoff = timezone.now() - timedelta(hours=max_age_hours)
+    count = 0
+    total = 0
+    for session in UploadSession.objects.filter(updated_at__lt=cutoff):
+        part_path = session_part_path(session)
+        if os.path.exists(part_path):
+            total += os.path.getsize(part_path)
+            if not dry_run:
+                os.remove(part_path)
+        count += 1
+        if not dry_run:
+            lock_path = _session_lock_path(session)
+            if os.path.exists(lock_path):
+                os.remove(lock_path)
+            session.delete()
+    return count, total
@@ -1,11 +1,23 @@
 from django.urls import path
 from .views import (
     upload_file,
+    ingest_status,
+    ingest_log,
+    ingest_commit,
+    upload_video,
+    create_upload,
+    upload_session,
+    finalize_upload,
     trim_video,
     save_transcript,
+    upload_transcript_csv,
     get_video_details,
     get_merged_video,
     merge_videos,
+    render_folder,
+    job_status,
+    prefetch_stats_view,
+    merge_cache_stats_view,
     video_editor_page,
     delete_video,
     search_videos,
@@ -36,6 +48,19 @@ urlpatterns = [
     # Upload file
     path('upload_file/', upload_file, name='upload_file'),
 
+    # Progress, log hasil per baris, dan simpan hasil dry run job ingest Excel
+    path('ingest_status/<uuid:job_id>/', ingest_status, name='ingest_status'),
+    path('ingest_log/<uuid:job_id>/', ingest_log, name='ingest_log'),
+    path('ingest_commit/<uuid:job_id>/', ingest_commit, name='ingest_commit'),
+
+    # Upload satu video (streaming ke disk)
+    path('upload_video/', upload_video, name='upload_video'),
+
+    # Upload resumable per chunk: buat sesi, PATCH chunk (Upload-Offset), status untuk resume, finalize
+    path('uploads/', create_upload, name='create_upload'),
+    path('uploads/<uuid:upload_id>/', upload_session, name='upload_session'),
+    path('uploads/<uuid:upload_id>/finalize/', finalize_upload, name='finalize_upload'),
+
     # Trim video berdasarkan video ID
     path('trim_video/<video_title>/', trim_video, name='trim_video'),
 
@@ -48,12 +73,24 @@ urlpatterns = [
     ## Ambil video yang sudah di-merge
     path('get_merged_video/<video_title>/', get_merged_video, name='get_merged_video'),
 
-    # # Upload transkrip dalam format CSV
-    # path('upload_transcript_csv/', upload_transcript_csv, name='upload_transcript_csv'),
+    # Upload transkrip dalam format CSV
+    path('upload_transcript_csv/', upload_transcript_csv, name='upload_transcript_csv'),
 
     # Merge video
     path('merge_videos/<video_title>/', merge_videos, name='merge_videos'),
 
+    # Render trim EDL satu folder lewat worker
+    path('render_folder/<folder_name>/', render_folder, name='render_folder'),
+
+    # Status dan progress job merge/trim
+    path('job_status/<uuid:job_id>/', job_status, name='job_status'),
+
+    # Counter hit/miss prefetch merge (admin only)
+    path('prefetch_stats/', prefetch_stats_view, name='prefetch_stats'),
+
+    # Statistik cache hasil merge (admin only)
+    path('merge_cache_stats/', merge_cache_stats_view, name='merge_cache_stats'),
+
     # Delete video
     path('delete_video/<video_title>/', delete_video, name='delete_video'),
 
@@ -1,12 +1,10 @@
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
 from django.conf import settings
-from moviepy import concatenate_videoclips
 from django.views.decorators.http import require_http_methods
-from moviepy.video.io.VideoFileClip import VideoFileClip
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth import login, logout, update_session_auth_hash
 from django.contrib.auth.decorators import login_required
@@ -18,20 +16,34 @@ from django.template.loader import render_to_string
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from .forms import CustomUserCreationForm, CustomPasswordResetForm, CustomSetPasswordForm, CustomPasswordChangeForm
-import pandas as pd
-import requests
-import re
-import openpyxl
 from io import BytesIO
+import io
 from django.contrib.auth.models import User
 import os
 import json
 import csv
-from .models import Video
+from . import merge_cache
+from .archives import get_fresh_archive, iter_zip, safe_name, video_entries
+from .models import MergedVideoCache, UploadSession, Video, VideoJob, VideoMetadata
+from .edl import edl_enabled, pending_videos, record_trim, virtual_merge_info
+from .editing import VideoProcessingError, get_next_video
+from .folders import folder_summaries
+from .excel import read_header
+from .ingest import ingest_progress, write_result_csv
+from .jobs import enqueue_job, enqueue_render_jobs, failed_render_job, job_to_dict
+from .media import serve_file
+from .transcripts import import_transcripts
+from .uploads import (
+    StreamingVideoUploadHandler, UploadError, create_session, create_uploaded_video, finalize_session,
+    session_part_path, session_to_dict, write_chunk,
+)
+from .proxies import cached_proxy_merge, proxies_ready, schedule_proxies
+from .prefetch import (
+    cancel_prefetch, enqueue_interactive_merge, prefetch_stats, record_prefetch_hit, record_proxy_prefetch,
+    schedule_prefetch,
+)
 import logging
-from collections import defaultdict
-import zipfile
-from django.http import HttpResponse, FileResponse
+from django.http import HttpResponse, StreamingHttpResponse
 
 logger = logging.getLogger(__name__)
 
@@ -46,22 +58,73 @@ def download_video(request, video_id):
         messages.error(request, f'File video tidak ditemukan: {video.title}')
         return redirect('main:landing_page')
     
-    file_path = video.file.path
-    
+    # Trim EDL yang belum di-render ditulis dulu ke file oleh worker
+    pending = _pending_render_response(request, Video.objects.filter(pk=video.pk))
+    if pending:
+        return pending
+
     try:
-        response = FileResponse(
-            open(file_path, 'rb'),
-            content_type='video/mp4'
-        )
-        # Set filename untuk download
-        safe_filename = "".join(c for c in video.title if c.isalnum() or c in (' ', '-', '_', '.')).strip()
-        response['Content-Disposition'] = f'attachment; filename="{safe_filename}"'
-        
-        return response
+        file_path = video.file.path
+
+        # Set filename untuk download; Range/ETag supaya download bisa dilanjutkan
+        safe_filename = safe_name(video.title, '.')
+        return serve_file(request, file_path, 'video/mp4', safe_filename)
     except Exception as e:
         messages.error(request, f'Error downloading video: {str(e)}')
         return redirect('main:landing_page')
 
+# Detik sebelum browser mengulang download yang menunggu render
+RENDER_RETRY_SECONDS = 5
+
+
+def _pending_render_response(request, videos):
+    """
+    Video dengan trim EDL yang belum di-render tidak di-download dalam isi
+    lama, dan render tidak dijalankan di request: worker diminta me-render
+    (satu job per video) dan response 202 berisi job untuk dipoll, dengan
+    header Refresh supaya browser mengulang download sampai file siap.
+    Return None jika semua video sudah ter-render.
+    """
+    pending = list(videos.filter(needs_render=True))
+    if not pending:
+        return None
+    failed = failed_render_job(pending)
+    if failed:
+        # Tidak diulang otomatis; render ulang lewat render_folder atau trim baru
+        return JsonResponse({'error': f'Render {failed.video.title} gagal: {failed.error}'}, status=500)
+    jobs = [job for job in enqueue_render_jobs(pending, user=request.user) if job.status != VideoJob.STATUS_DONE]
+    if not jobs:
+        # VIDEO_JOBS_INLINE: sudah di-render di request ini
+        return None
+    failed = next((job for job in jobs if job.status == VideoJob.STATUS_FAILED), None)
+    if failed:
+        return JsonResponse({'error': f'Render gagal: {failed.error}'}, status=500)
+    response = JsonResponse({
+        'message': f'{len(jobs)} video sedang di-render, download dimulai otomatis setelah selesai.',
+        'pending': len(jobs),
+        'jobs': [job_to_dict(job) for job in jobs[:20]],
+    }, status=202)
+    response['Retry-After'] = str(RENDER_RETRY_SECONDS)
+    response['Refresh'] = str(RENDER_RETRY_SECONDS)
+    return response
+
+
+def _folder_archive_response(request, folder_name, filename):
+    """
+    Kirim ZIP folder dari archives/ (Content-Length + Range) jika masih sesuai
+    isi folder. Jika belum ada atau basi, worker diminta membangunnya dan
+    return None: request ini di-stream seperti biasa.
+    """
+    archive = get_fresh_archive(folder_name)
+    if archive is None:
+        job = enqueue_job(VideoJob.KIND_ARCHIVE, None, params={'folder_name': folder_name}, user=request.user)
+        if job.status == VideoJob.STATUS_DONE:
+            # VIDEO_JOBS_INLINE: arsip sudah dibangun di request ini
+            archive = get_fresh_archive(folder_name)
+    if archive is None:
+        return None
+    return serve_file(request, os.path.join(settings.MEDIA_ROOT, archive.path), 'application/zip', filename)
+
 @login_required
 def download_folder_videos(request, folder_name):
     """Download semua video dalam folder sebagai ZIP"""
@@ -70,21 +133,19 @@ def download_folder_videos(request, folder_name):
     if not videos.exists():
         messages.error(request, f'Tidak ada video di folder: {folder_name}')
         return redirect('main:landing_page')
+
+    # Trim EDL yang belum di-render ditulis dulu ke file oleh worker
+    response = _pending_render_response(request, videos)
+    if response:
+        return response
+
+    response = _folder_archive_response(request, folder_name, f"{safe_name(folder_name)}.zip")
+    if response:
+        return response
     
-    # Create ZIP in memory
-    response = HttpResponse(content_type='application/zip')
-    safe_folder_name = "".join(c for c in folder_name if c.isalnum() or c in (' ', '-', '_')).strip()
-    response['Content-Disposition'] = f'attachment; filename="{safe_folder_name}.zip"'
-    
-    with zipfile.ZipFile(response, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        for video in videos:
-            if video.file and default_storage.exists(video.file.name):
-                file_path = video.file.path
-                
-                # Add video to ZIP (hanya video, tanpa metadata)
-                safe_title = "".join(c for c in video.title if c.isalnum() or c in (' ', '-', '_', '.')).strip()
-                zip_file.write(file_path, f'{safe_folder_name}/{safe_title}')
-    
+    # ZIP di-stream sambil ditulis, memori tetap kecil berapa pun ukuran folder
+    response = StreamingHttpResponse(iter_zip(video_entries(videos)), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="{safe_name(folder_name)}.zip"'
     return response
 
 @login_required
@@ -108,196 +169,166 @@ def download_all_videos(request):
     if not videos.exists():
         messages.error(request, 'Tidak ada video di database')
         return redirect('main:landing_page')
+
+    # Trim EDL yang belum di-render ditulis dulu ke file oleh worker
+    response = _pending_render_response(request, videos)
+    if response:
+        return response
+
+    if folder_filter and folder_filter != 'all':
+        response = _folder_archive_response(request, folder_filter, zip_filename)
+        if response:
+            return response
     
-    # Create ZIP in memory
-    response = HttpResponse(content_type='application/zip')
+    # ZIP di-stream sambil ditulis (dikelompokkan per folder), Zip64 untuk arsip > 4 GB
+    response = StreamingHttpResponse(iter_zip(video_entries(videos)), content_type='application/zip')
     response['Content-Disposition'] = f'attachment; filename="{zip_filename}"'
-    
-    with zipfile.ZipFile(response, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-        # Group by folder
-        folder_dict = defaultdict(list)
-        for video in videos:
-            folder_dict[video.folder_name or 'uncategorized'].append(video)
-        
-        for folder_name, folder_videos in folder_dict.items():
-            safe_folder = "".join(c for c in folder_name if c.isalnum() or c in (' ', '-', '_')).strip()
-            
-            for video in folder_videos:
-                if video.file and default_storage.exists(video.file.name):
-                    file_path = video.file.path
-                    
-                    # Add video to ZIP (hanya video, tanpa metadata)
-                    safe_title = "".join(c for c in video.title if c.isalnum() or c in (' ', '-', '_', '.')).strip()
-                    zip_file.write(file_path, f'{safe_folder}/{safe_title}')
-    
     return response
 
 @csrf_exempt
 @login_required
 def upload_video(request):
     """ Mengunggah video baru """
+    # Upload ditulis langsung ke disk per chunk, harus diset sebelum request.POST/FILES dibaca
+    request.upload_handlers = [StreamingVideoUploadHandler(request)]
     if request.method == 'POST' and request.FILES.get('file'):
-        video_file = request.FILES['file'].read()
         folder_name = request.POST.get('folder_name')
         video_title = request.POST.get('video_title')
         
-        video_filename = f"{folder_name}_{video_title}.mp4"
-        
-        raw_video_folder = os.path.join('raw_videos', folder_name)
-        video_folder = os.path.join('videos', folder_name)
-        
-        # Ensure the subdirectories exist
-        os.makedirs(os.path.join(settings.MEDIA_ROOT, raw_video_folder), exist_ok=True)
-        os.makedirs(os.path.join(settings.MEDIA_ROOT, video_folder), exist_ok=True)
-        
-        raw_video_path = os.path.join(raw_video_folder, video_filename)
-        raw_video_file = default_storage.save(raw_video_path, ContentFile(video_file))
-        
-        video_path = os.path.join(video_folder, video_filename)
-        video_file_new = default_storage.save(video_path, ContentFile(video_file))
-
-        video = Video.objects.create(title=video_filename, file=video_file_new, folder_name=folder_name)
+        create_uploaded_video(folder_name, video_title, request.FILES['file'])
 
         return JsonResponse({'message': 'Video uploaded successfully', 'video_title': video_title})
     
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
+def _get_upload_session(request, upload_id):
+    """ UploadSession milik user (superuser boleh semua), atau None """
+    sessions = UploadSession.objects.all()
+    if not request.user.is_superuser:
+        sessions = sessions.filter(created_by=request.user)
+    return sessions.filter(id=upload_id).first()
+
+
+@csrf_exempt
+@login_required
+@require_http_methods(["POST"])
+def create_upload(request):
+    """ Mulai upload resumable: body JSON {folder_name, video_title, size, chunk_size?, sha256?, filename?} """
+    try:
+        data = json.loads(request.body or b'{}')
+        session = create_session(
+            request.user, data.get('folder_name'), data.get('video_title'), data.get('size'),
+            chunk_size=data.get('chunk_size'), sha256=data.get('sha256'), filename=data.get('filename'),
+        )
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Body harus JSON'}, status=400)
+    except UploadError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+
+    logger.info(f"Upload resumable dibuat: {session.folder_name}/{session.video_title} ({session.size} byte)")
+    response = JsonResponse(session_to_dict(session), status=201)
+    response['Location'] = reverse('main:upload_session', args=[session.id])
+    return response
+
+
+@csrf_exempt
+@login_required
+@require_http_methods(["GET", "HEAD", "PATCH", "DELETE"])
+def upload_session(request, upload_id):
+    """
+    GET/HEAD: status upload (chunk yang sudah/belum diterima) untuk resume.
+    PATCH: satu chunk, body = isi chunk, header Upload-Offset = posisi byte.
+    DELETE: batalkan upload dan hapus file sementara.
+    """
+    session = _get_upload_session(request, upload_id)
+    if not session:
+        return JsonResponse({'error': 'Upload tidak ditemukan'}, status=404)
+
+    if request.method == 'PATCH':
+        try:
+            index = write_chunk(
+                session, request.headers.get('Upload-Offset'), request,
+                request.headers.get('Content-Length'), checksum=request.headers.get('Upload-Checksum'),
+            )
+        except UploadError as e:
+            return JsonResponse({'error': str(e)}, status=e.status)
+        return JsonResponse({'chunk': index, 'received': session.chunks.count(), 'chunk_count': session.chunk_count})
+
+    if request.method == 'DELETE':
+        if session.status == UploadSession.STATUS_UPLOADING:
+            part_path = session_part_path(session)
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            session.delete()
+        return JsonResponse({'message': 'Upload dibatalkan'})
+
+    data = session_to_dict(session)
+    response = JsonResponse(data)
+    response['Upload-Length'] = str(session.size)
+    # Offset = byte yang sudah diterima berurutan dari awal (seperti tus)
+    first_missing = data['missing_chunks'][0] if data['missing_chunks'] else session.chunk_count
+    response['Upload-Offset'] = str(min(session.size, first_missing * session.chunk_size))
+    return response
+
+
+@csrf_exempt
+@login_required
+@require_http_methods(["POST"])
+def finalize_upload(request, upload_id):
+    """ Selesaikan upload resumable menjadi Video """
+    session = _get_upload_session(request, upload_id)
+    if not session:
+        return JsonResponse({'error': 'Upload tidak ditemukan'}, status=404)
+    try:
+        video = finalize_session(session)
+    except UploadError as e:
+        return JsonResponse({'error': str(e), **e.details}, status=e.status)
+    return JsonResponse({
+        'message': 'Video uploaded successfully',
+        'video_title': session.video_title,
+        'video_id': str(video.id),
+        'content_hash': video.content_hash,
+    })
+
+
+def _job_response(job, extra=None):
+    """ Response untuk job: hasil langsung jika sudah selesai, atau job id (202) untuk dipoll """
+    data = dict(extra or {})
+    if job.status == VideoJob.STATUS_DONE:
+        data.update(job.result or {})
+        return JsonResponse(data)
+    if job.status == VideoJob.STATUS_FAILED:
+        data['error'] = job.error
+        return JsonResponse(data, status=500)
+    data.update(job_to_dict(job))
+    return JsonResponse(data, status=202)
+
+
 @csrf_exempt
 @login_required
 def merge_videos(request, video_title):
     """ Menggabungkan video dengan video selanjutnya (berdasarkan urutan nama) """
     try:
-        print(f"\n=== MERGE DEBUG untuk {video_title} ===")
-        
         # Ambil video saat ini - gunakan filter().first() untuk menghindari error multiple objects
         video = Video.objects.filter(title=video_title).first()
         if not video:
             print(f"❌ Video tidak ditemukan: {video_title}")
             return JsonResponse({'error': f'Video tidak ditemukan: {video_title}'}, status=404)
-        
-        # Cek jika ada duplikasi
-        duplicate_count = Video.objects.filter(title=video_title).count()
-        if duplicate_count > 1:
-            print(f"⚠️ WARNING: Ditemukan {duplicate_count} video dengan nama '{video_title}'!")
-            print("Menggunakan video yang pertama ditemukan...")
-        print(f"Video ditemukan: {video.title} (ID: {video.id})")
-        print(f"Video file path: {video.file}")
-
-        # Ekstrak sequence dari nama file, misal: "TVRI_SB_061119_0052.mp4"
-        name_parts = video_title.replace('.mp4', '').split('_')
-        print(f"Name parts: {name_parts}")
-        
-        current_sequence = int(name_parts[-1])
-        base_title = '_'.join(name_parts[:-1])
-        print(f"Current sequence: {current_sequence}")
-        print(f"Base title: {base_title}")
 
-        # Buat nama video berikutnya
-        next_sequence = current_sequence + 1
-        next_video_title = f"{base_title}_{next_sequence:04d}.mp4"
-        print(f"Looking for next video: {next_video_title}")
-
-        # Coba ambil video berikutnya dari database
-        next_video = Video.objects.filter(title=next_video_title).first()
-        
+        next_video_title, next_video = get_next_video(video)
         if not next_video:
-            print(f"❌ Video berikutnya tidak ditemukan: {next_video_title}")
-            # Cek video apa saja yang ada dengan base_title yang sama
-            similar_videos = Video.objects.filter(title__startswith=base_title).order_by('title')
-            print(f"Video dengan base '{base_title}' yang ada:")
-            for v in similar_videos:
-                print(f"  - {v.title}")
-            
-            print(f"✅ Tidak ada video berikutnya, mengembalikan video asli: {video.title}")
+            print(f"✅ Tidak ada video berikutnya ({next_video_title}), mengembalikan video asli: {video.title}")
             # Tidak ada video berikutnya, return video asli saja
             return JsonResponse({
                 'message': 'Video asli (tidak ada video berikutnya untuk merge).',
                 'merged_video_url': video.file.url,
                 'is_single_video': True
             })
-        
-        # Cek duplikasi video berikutnya juga
-        next_duplicate_count = Video.objects.filter(title=next_video_title).count()
-        if next_duplicate_count > 1:
-            print(f"⚠️ WARNING: Ditemukan {next_duplicate_count} video dengan nama '{next_video_title}'!")
-            print("Menggunakan video yang pertama ditemukan...")
-        
-        print(f"✅ Video berikutnya ditemukan: {next_video.title} (ID: {next_video.id})")
 
-        # Dapatkan path file kedua video
-        path1 = video.file.path
-        path2 = next_video.file.path
-        
-        print(f"Path video 1: {path1}")
-        print(f"Path video 2: {path2}")
-        print(f"File 1 exists: {os.path.exists(path1)}")
-        print(f"File 2 exists: {os.path.exists(path2)}")
-
-        if not os.path.exists(path1):
-            print(f"❌ File pertama tidak ditemukan: {path1}")
-            return JsonResponse({'error': f'File video pertama tidak ditemukan: {path1}'}, status=404)
-        
-        if not os.path.exists(path2):
-            print(f"❌ File kedua tidak ditemukan: {path2}")
-            return JsonResponse({'error': f'File video kedua tidak ditemukan: {path2}'}, status=404)
-
-        logger.info(f"Merging {path1} + {path2}")
-        print("🎬 Memulai proses merge dengan moviepy...")
-
-        # Gabungkan menggunakan moviepy
-        try:
-            clip1 = VideoFileClip(path1)
-            clip2 = VideoFileClip(path2)
-            video_n_duration = clip1.duration  # Simpan durasi video n untuk marker
-            print(f"Video 1 duration: {video_n_duration} seconds")
-            print(f"Video 2 duration: {clip2.duration} seconds")
-            
-            merged_clip = concatenate_videoclips([clip1, clip2])
-            print(f"Merged clip duration: {merged_clip.duration} seconds")
-
-            # Simpan hasil merge
-            merged_filename = f"merged_{video_title.replace('.mp4','')}_{next_video_title}"
-            merged_path = os.path.join('edited_videos', merged_filename)
-            
-            print(f"Merged filename: {merged_filename}")
-            print(f"Merged path: {merged_path}")
-            
-            # Buat folder edited_videos jika belum ada
-            edited_dir = os.path.join(settings.MEDIA_ROOT, 'edited_videos')
-            os.makedirs(edited_dir, exist_ok=True)
-            print(f"Edited videos directory: {edited_dir}")
-            
-            # Path lengkap untuk file output
-            full_merged_path = default_storage.path(merged_path)
-            print(f"Full merged path: {full_merged_path}")
-            
-            print("📹 Writing merged video file...")
-            merged_clip.write_videofile(full_merged_path, codec="libx264")
-            print("✅ Video merge completed successfully")
-            
-            # Tutup clips untuk free memory
-            clip1.close()
-            clip2.close()
-            merged_clip.close()
-
-            # Simpan path dan durasi video n ke model
-            video.merged_video_path = merged_path
-            video.video_n_duration = video_n_duration  # Simpan durasi untuk marker
-            video.save()
-            print(f"✅ Database updated with merged_video_path: {merged_path}")
-            print(f"✅ Video n duration (marker position): {video_n_duration} seconds")
-
-            return JsonResponse({
-                'message': 'Video berhasil digabung.',
-                'merged_video_url': default_storage.url(merged_path),
-                'video_n_duration': video_n_duration  # Kirim durasi untuk marker di timeline
-            })
-        
-        except Exception as moviepy_error:
-            print(f"❌ Error during moviepy processing: {moviepy_error}")
-            import traceback
-            traceback.print_exc()
-            return JsonResponse({'error': f'Error saat memproses video: {str(moviepy_error)}'}, status=500)
+        # Encode dijalankan worker di background, kembalikan job id
+        job = enqueue_interactive_merge(video, user=request.user)
+        print(f"🎬 Merge {video.title} + {next_video_title} masuk antrian (job {job.id})")
+        return _job_response(job)
 
     except Exception as e:
         logger.error(f"Error in merging videos: {str(e)}")
@@ -308,13 +339,8 @@ def merge_videos(request, video_title):
 @login_required
 def trim_video(request, video_title):
     """
-    Algoritma Trim Video:
-    1. Yang ditampilkan adalah merge dari video n dan n+1
-    2. Saat trim:
-       - Bagian yang di-keep (start_time sampai end_time) → overwrite video n
-       - Bagian remainder (end_time sampai akhir merge) → overwrite video n+1
-    3. Hapus merged_video_path dari video n
-    4. Saat next, akan merge video n+1 (baru) dengan video n+2
+    Trim video n (merge n + n+1) pada end_time, lihat editing.trim_video_pair.
+    Encode dijalankan worker di background, response berisi job id.
     """
     if request.method == 'POST':
         video = get_object_or_404(Video, title=video_title)
@@ -326,98 +352,67 @@ def trim_video(request, video_title):
         if start_time is None or end_time is None:
             return JsonResponse({'error': 'Invalid start or end time'}, status=400)
 
-        try:
-            print(f"\n=== TRIM VIDEO {video_title} ===")
-            print(f"Start time: {start_time}, End time: {end_time}")
-            
-            # Ekstrak informasi sequence dari nama file
-            parts = video.title.replace('.mp4', '').split('_')
-            current_seq = int(parts[-1])
-            base = '_'.join(parts[:-1])
-            
-            # Cari video berikutnya
-            next_title = f"{base}_{current_seq+1:04d}.mp4"
-            next_video = Video.objects.filter(title=next_title).first()
-            
-            # Gunakan merged video jika ada, kalau tidak ada gunakan video asli
-            if video.merged_video_path and default_storage.exists(video.merged_video_path):
-                # Gunakan merged video (n+n+1)
-                source_path = default_storage.path(video.merged_video_path)
-                print(f"Using merged video as source: {source_path}")
-            else:
-                # Fallback ke video asli di raw_videos
-                source_path = os.path.join(settings.MEDIA_ROOT, 'raw_videos', video.folder_name, video.title)
-                print(f"Using raw video as source: {source_path}")
-            
-            if not os.path.exists(source_path):
-                return JsonResponse({'error': f'Source video not found: {source_path}'}, status=404)
-            
-            # Load video source
-            source_clip = VideoFileClip(source_path)
-            source_duration = source_clip.duration
-            print(f"Source video duration: {source_duration} seconds")
-
-            # Validasi waktu
-            if end_time > source_duration:
-                end_time = source_duration - 0.01
-                print(f"Adjusted end_time to {end_time}")
-
-            if start_time >= end_time:
-                source_clip.close()
-                return JsonResponse({'error': 'Invalid time range'}, status=400)
-
-            # BAGIAN 1: Trim video (start_time sampai end_time) → overwrite video n
-            trimmed_clip = source_clip.subclipped(start_time, end_time)
-            final_output_path = video.file.path
-            print(f"Writing trimmed video to video n: {final_output_path}")
-            trimmed_clip.write_videofile(final_output_path, codec="libx264", audio_codec="aac")
-            trimmed_clip.close()
-            
-            # BAGIAN 2: Remainder (end_time sampai akhir) → overwrite video n+1
-            if next_video and end_time < source_duration:
-                try:
-                    remainder_clip = source_clip.subclipped(end_time, source_duration)
-                    next_video_path = next_video.file.path
-                    print(f"Writing remainder to video n+1: {next_video_path}")
-                    remainder_clip.write_videofile(next_video_path, codec="libx264", audio_codec="aac")
-                    remainder_clip.close()
-                    
-                    # Hapus merged_video_path dari video n+1 jika ada
-                    if next_video.merged_video_path:
-                        print(f"Clearing merged_video_path from video n+1")
-                        next_video.merged_video_path = None
-                        next_video.save()
-                    
-                    print(f"✅ Successfully overwritten video n+1 with remainder")
-                except Exception as remainder_error:
-                    logger.error(f"Error saving remainder to next video: {str(remainder_error)}")
-                    import traceback
-                    traceback.print_exc()
-            else:
-                if not next_video:
-                    print(f"ℹ️ No next video found ({next_title})")
-                if end_time >= source_duration:
-                    print(f"ℹ️ No remainder (trim ends at video end)")
-            
-            # Clean up
-            source_clip.close()
-            
-            # BAGIAN 3: Hapus merged_video_path dari video n agar next time merge ulang
-            if video.merged_video_path:
-                print(f"Clearing merged_video_path from video n")
-                video.merged_video_path = None
-                video.save()
+        if start_time >= end_time:
+            return JsonResponse({'error': 'Invalid time range'}, status=400)
 
-            print(f"✅ Trim completed successfully")
-            return JsonResponse({
-                'message': 'Video trimmed and saved successfully.',
-                'trimmed_video_url': video.file.url
-            })
+        # Trim mengubah video n dan n+1, prefetch merge keduanya sudah tidak valid
+        _, next_video = get_next_video(video)
+        cancel_prefetch([v for v in (video, next_video) if v])
 
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
-            return JsonResponse({'error': str(e)}, status=500)
+        if edl_enabled():
+            # Trim non-destruktif: hanya mencatat potongan, tanpa encode
+            try:
+                result = record_trim(video, start_time, end_time)
+            except VideoProcessingError as e:
+                return JsonResponse({'error': str(e)}, status=e.status)
+            # Potongan baru bisa bersumber dari file raw yang belum punya proxy
+            schedule_proxies([v for v in (video, next_video) if v], user=request.user)
+            return JsonResponse(result)
+
+        job = enqueue_job(
+            VideoJob.KIND_TRIM, video,
+            params={'start_time': start_time, 'end_time': end_time},
+            user=request.user,
+        )
+        print(f"✂️ Trim {video_title} ({start_time} - {end_time}) masuk antrian (job {job.id})")
+        return _job_response(job)
+
+    return JsonResponse({'error': 'Invalid request'}, status=400)
+
+
+@csrf_exempt
+@login_required
+def render_folder(request, folder_name):
+    """ Render semua trim EDL di folder lewat worker, satu job per video """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    jobs = enqueue_render_jobs(pending_videos(folder_name), user=request.user)
+    print(f"🎞️ Render {folder_name}: {len(jobs)} video masuk antrian")
+    return JsonResponse({'folder_name': folder_name, 'jobs': [job_to_dict(job) for job in jobs]})
+
+
+@csrf_exempt
+@login_required
+def job_status(request, job_id):
+    """ Status dan progress job merge/trim untuk dipoll editor """
+    job = get_object_or_404(VideoJob, id=job_id)
+    return JsonResponse(job_to_dict(job))
+
+
+@login_required
+def prefetch_stats_view(request):
+    """ Counter hit/miss pre-merge spekulatif (Admin only) """
+    if not request.user.is_superuser:
+        return JsonResponse({'error': 'Unauthorized - Admin access required'}, status=403)
+    return JsonResponse(prefetch_stats())
+
+
+@login_required
+def merge_cache_stats_view(request):
+    """ Hit ratio dan ukuran cache hasil merge (Admin only) """
+    if not request.user.is_superuser:
+        return JsonResponse({'error': 'Unauthorized - Admin access required'}, status=403)
+    return JsonResponse(merge_cache.cache_stats())
 
 
 @csrf_exempt
@@ -443,6 +438,8 @@ def save_transcript(request, video_title):
 
         video.is_annotated = True
         video.annotated_by = request.user
+        # Isi tidak lagi sama dengan baris Excel terakhir, ingest berikutnya membandingkan per kolom
+        video.import_hash = None
         video.save()
 
         return JsonResponse({'message': 'Data disimpan'})
@@ -463,51 +460,55 @@ def get_video_details(request, video_title):
 @csrf_exempt
 @login_required
 def get_merged_video(request, video_title):
-    print(f"\n=== GET_MERGED_VIDEO DEBUG untuk {video_title} ===")
-    
     try:
         # Gunakan filter().first() untuk menghindari error multiple objects
         video = Video.objects.filter(title=video_title).first()
         if not video:
             print(f"❌ Video tidak ditemukan: {video_title}")
             return JsonResponse({'error': f'Video tidak ditemukan: {video_title}'}, status=404)
-        
-        # Cek jika ada duplikasi
-        duplicate_count = Video.objects.filter(title=video_title).count()
-        if duplicate_count > 1:
-            print(f"⚠️ WARNING: Ditemukan {duplicate_count} video dengan nama yang sama!")
-            print("Menggunakan video yang pertama ditemukan...")
-        print(f"Video ditemukan: {video.title} (ID: {video.id})")
-        print(f"Merged video path: {video.merged_video_path}")
-        
-        # Cek apakah file merge sudah ada
-        if video.merged_video_path:
-            file_exists = default_storage.exists(video.merged_video_path)
-            print(f"Merged file exists: {file_exists}")
-            if file_exists:
-                full_path = default_storage.path(video.merged_video_path)
-                print(f"Full path: {full_path}")
-                print(f"File size: {os.path.getsize(full_path)} bytes")
+
+        merge_mode = request.GET.get('mode') or ('virtual' if settings.VIDEO_VIRTUAL_MERGE else 'merged')
+        # Proxy resolusi rendah untuk diputar di editor; file asli hanya dibaca saat trim/render
+        _, next_video = get_next_video(video)
+        pair = [v for v in (video, next_video) if v]
+        use_proxies = proxies_ready(pair)
+        if not use_proxies:
+            schedule_proxies(pair, user=request.user)
+        elif merge_mode != 'virtual' and not video.needs_render:
+            proxy_info = cached_proxy_merge(video)
+            if proxy_info:
+                print(f"✅ Returning proxy merge: {proxy_info['merged_video_url']}")
+                record_prefetch_hit(video)
+                proxy_info.update({
+                    'transcript': video.transcript,
+                    'comment': video.comment,
+                })
+                return JsonResponse(proxy_info)
+            if not (video.merged_video_path and default_storage.exists(video.merged_video_path)):
+                # ffprobe + concat proxy dijalankan worker, editor polling lalu memanggil ulang endpoint ini
+                job = enqueue_interactive_merge(video, user=request.user, proxy=True)
+                print(f"🎬 Merge proxy masuk antrian (job {job.id}, status {job.status})")
+                return _job_response(job, extra={
+                    'transcript': video.transcript,
+                    'comment': video.comment,
+                })
         
         if video.merged_video_path and default_storage.exists(video.merged_video_path):
             merged_video_url = default_storage.url(video.merged_video_path)
             print(f"✅ Returning existing merged video: {merged_video_url}")
+            record_prefetch_hit(video)
+            schedule_prefetch(video, user=request.user)
             
             # Ambil durasi video n untuk marker
-            video_n_duration = getattr(video, 'video_n_duration', None)
+            video_n_duration = video.video_n_duration
             
-            # Jika tidak ada di database, hitung dari file asli
+            # Jika tidak ada di database, pakai entri cache merge atau metadata tersimpan (tanpa ffprobe di request)
+            if video_n_duration is None:
+                video_n_duration = MergedVideoCache.objects.filter(
+                    path=video.merged_video_path,
+                ).values_list('video_n_duration', flat=True).first()
             if video_n_duration is None:
-                try:
-                    video_path = video.file.path
-                    if os.path.exists(video_path):
-                        temp_clip = VideoFileClip(video_path)
-                        video_n_duration = temp_clip.duration
-                        temp_clip.close()
-                        print(f"✅ Calculated video_n_duration: {video_n_duration} seconds")
-                except Exception as e:
-                    print(f"⚠️ Could not calculate video_n_duration: {e}")
-                    video_n_duration = None
+                video_n_duration = VideoMetadata.objects.filter(video=video).values_list('duration', flat=True).first()
             
             return JsonResponse({
                 'merged_video_url': merged_video_url,
@@ -516,50 +517,42 @@ def get_merged_video(request, video_title):
                 'video_n_duration': video_n_duration  # Kirim durasi untuk marker
             })
 
-        print("❌ No existing merged video, attempting to create new one...")
-        # Jika belum ada hasil merge, lakukan merge dulu
-        merge_response = merge_videos(request, video_title)
-        print(f"Merge response status: {merge_response.status_code}")
-
-        # Kalau sukses (status 200), process response
-        if merge_response.status_code == 200:
-            # Parse response untuk cek apakah ini single video atau merged video
-            response_data = json.loads(merge_response.content.decode('utf-8'))
-            
-            if response_data.get('is_single_video'):
-                # Video tunggal (tidak ada video berikutnya)
-                print(f"✅ Single video returned: {response_data.get('merged_video_url')}")
-                return JsonResponse({
-                    'merged_video_url': response_data.get('merged_video_url'),
+        # Video dengan trim EDL yang belum di-render selalu diputar lewat offset
+        if merge_mode == 'virtual' or video.needs_render:
+            # n dan n+1 diputar berurutan di editor, merge fisik baru dibuat saat trim
+            virtual_info = virtual_merge_info(video)
+            if virtual_info:
+                print(f"✅ Returning virtual merge: {[s['title'] for s in virtual_info['segments']]}")
+                record_proxy_prefetch(pair)
+                schedule_prefetch(video, user=request.user)
+                virtual_info.update({
+                    'merged_video_url': None,
                     'transcript': video.transcript,
                     'comment': video.comment,
-                    'is_single_video': True,
-                    'message': 'Video asli (tidak ada video berikutnya untuk merge)',
-                    'video_n_duration': None  # Tidak ada marker untuk single video
                 })
-            else:
-                # Video berhasil di-merge
-                video.refresh_from_db()  # Pastikan ambil data terbaru dari DB
-                print(f"After merge - merged_video_path: {video.merged_video_path}")
-                if video.merged_video_path:
-                    merged_video_url = default_storage.url(video.merged_video_path)
-                    video_n_duration = response_data.get('video_n_duration') or getattr(video, 'video_n_duration', None)
-                    print(f"✅ Merge successful, returning: {merged_video_url}")
-                    print(f"✅ Video n duration (marker): {video_n_duration} seconds")
-                    return JsonResponse({
-                        'merged_video_url': merged_video_url,
-                        'transcript': video.transcript,
-                        'comment': video.comment,
-                        'is_single_video': False,
-                        'video_n_duration': video_n_duration  # Kirim durasi untuk marker
-                    })
-                else:
-                    print("❌ Merge reported success but no merged_video_path saved")
-                    return JsonResponse({'error': 'Merge completed but path not saved'}, status=500)
+                return JsonResponse(virtual_info)
 
-        # Kalau merge gagal, return responsenya langsung
-        print("❌ Merge failed, returning error response")
-        return merge_response
+        print("❌ No existing merged video, attempting to create new one...")
+        if not next_video:
+            # Video tunggal (tidak ada video berikutnya)
+            print(f"✅ Single video returned: {video.file.url}")
+            return JsonResponse({
+                'merged_video_url': video.file.url,
+                'transcript': video.transcript,
+                'comment': video.comment,
+                'is_single_video': True,
+                'message': 'Video asli (tidak ada video berikutnya untuk merge)',
+                'video_n_duration': None  # Tidak ada marker untuk single video
+            })
+
+        # Merge dijalankan worker, editor polling job_status lalu memanggil ulang endpoint ini
+        job = enqueue_interactive_merge(video, user=request.user)
+        print(f"🎬 Merge masuk antrian (job {job.id}, status {job.status})")
+        schedule_prefetch(video, user=request.user)
+        return _job_response(job, extra={
+            'transcript': video.transcript,
+            'comment': video.comment,
+        })
         
     except Exception as e:
         print(f"❌ Exception in get_merged_video: {str(e)}")
@@ -570,429 +563,128 @@ def get_merged_video(request, video_title):
 @csrf_exempt
 @login_required
 def get_next_video_status(request, folder_name, current_title):
-    videos = Video.objects.filter(folder_name=folder_name, is_annotated=False).order_by('title')
-
-    for video in videos:
-        if video.title != current_title:
-            return JsonResponse({'has_next': True})
-    
-    return JsonResponse({'has_next': False})
+    # Satu query lewat index (folder_name, is_annotated, sequence)
+    has_next = Video.objects.filter(folder_name=folder_name, is_annotated=False).exclude(title=current_title).exists()
+    return JsonResponse({'has_next': has_next})
 
 
 @csrf_exempt
 @login_required
 def upload_transcript_csv(request):
-    """ Mengunggah transkrip dari file CSV """
+    """
+    Mengunggah transkrip dari file CSV (nomor video, transkrip). Folder dari
+    kolom folder_name di CSV atau parameter folder_name; lihat transcripts.py
+    """
     if request.method == 'POST' and request.FILES.get('file'):
         file = request.FILES['file']
-        file_path = default_storage.save(f"transcripts/{file.name}", file)
-
-        with default_storage.open(file_path, 'r') as f:
-            reader = csv.reader(f)
-            next(reader)  # Skip header
-
-            for row in reader:
-                video_id_title, transcript = row[0], row[1]
-                last_4_digits = f"{int(video_id_title):04d}"
-                try:
-                    video = get_object_or_404(Video, title__endswith=f"{last_4_digits}.mp4")
-                    video.transcript = transcript
-                    video.save()
-                except Exception as e:
-                    # Debugging: Catch any exceptions and print the error
-                    print(f"Error for video_id: {video_id_title} - {str(e)}")
-
-        return JsonResponse({'message': 'Transcript uploaded successfully.'})
+        folder_name = request.POST.get('folder_name', '').strip() or None
+        # CSV dibaca langsung dari upload, tidak disimpan ke transcripts/
+        try:
+            result = import_transcripts(io.TextIOWrapper(file.file, encoding='utf-8-sig', newline=''), folder_name)
+        except (UnicodeDecodeError, csv.Error) as e:
+            return JsonResponse({'error': f'File CSV tidak bisa dibaca: {e}'}, status=400)
+
+        print(f"📝 Transkrip {file.name}: {result['updated']} diperbarui, {result['not_found']} tidak ditemukan")
+        return JsonResponse(dict(result, message='Transcript uploaded successfully.'))
     
     return JsonResponse({'error': 'Invalid request'}, status=400)
 
 @csrf_exempt
 @login_required
 def upload_file(request):
-    """Mengunggah file Excel dengan link Google Drive di hyperlink kolom A"""
+    """
+    Mengunggah file Excel dengan link Google Drive di hyperlink kolom A.
+    Baris diproses oleh worker (job ingest); response berisi job id untuk
+    dipoll di ingest_status. Dengan dry_run=1 job hanya membuat laporan diff,
+    perubahan disimpan lewat ingest_commit.
+    """
     if request.method == 'POST' and request.FILES.get('file'):
         file = request.FILES['file']
         tmp_path = default_storage.save(f"temp/{file.name}", file)
 
-        # Logic sederhana: gunakan file yang sudah ada jika valid, atau download jika tidak ada
-        print("Mode: Otomatis - gunakan file lokal jika ada, atau download jika tidak ada")
-
+        # Header dicek langsung supaya file yang salah format ditolak tanpa menunggu worker
         try:
+            columns = read_header(default_storage.path(tmp_path))
+        except Exception as e:
+            default_storage.delete(tmp_path)
+            return JsonResponse({'error': f'File Excel tidak bisa dibaca: {e}'}, status=400)
+        if 'Nama Data' not in columns:
+            default_storage.delete(tmp_path)
+            return JsonResponse({'error': f'Kolom "Nama Data" tidak ditemukan. Kolom tersedia: {columns}'}, status=400)
+
+        params = {'excel_path': tmp_path, 'filename': file.name}
+        if request.POST.get('dry_run', '').lower() in ('1', 'true', 'on', 'yes'):
+            params['dry_run'] = True
+        job = enqueue_job(VideoJob.KIND_INGEST, None, params=params, user=request.user)
+        print(f"📄 Ingest Excel {file.name} masuk antrian (job {job.id}{', dry run' if params.get('dry_run') else ''})")
+        return _ingest_job_response(job)
 
-            file_path = default_storage.path(tmp_path)
+    return JsonResponse({'error': 'Invalid request'}, status=400)
 
-            # Baca isi tabel ke DataFrame
-            df = pd.read_excel(file_path, engine='openpyxl')
-            
-            print(f"DataFrame shape: {df.shape}")
-            print(f"DataFrame columns: {list(df.columns)}")
-            print("First few rows:")
-            print(df.head())
-            
-            # Cek apakah kolom 'Nama Data' ada
-            if 'Nama Data' not in df.columns:
-                available_cols = list(df.columns)
-                print("ERROR: Kolom 'Nama Data' tidak ditemukan!")
-                print(f"Kolom yang tersedia: {available_cols}")
-                return JsonResponse({'error': f'Kolom "Nama Data" tidak ditemukan. Kolom tersedia: {available_cols}'}, status=400)
-
-            # Baca workbook untuk ambil hyperlink kolom A
-            wb = openpyxl.load_workbook(file_path)
-            ws = wb.active
-            
-            print(f"Worksheet loaded: {ws.title}")
-            print(f"Total rows in worksheet: {ws.max_row}")
-            print(f"Total columns in worksheet: {ws.max_column}")
-
-            # Ambil hyperlink dari kolom A (A2, A3, ...)
-            drive_links = []
-            for row_num, row in enumerate(ws.iter_rows(min_row=2), start=2):  # skip header
-                cell = row[0]  # kolom A
-                
-                # Cek hyperlink dulu, lalu cell value
-                if cell.hyperlink:
-                    link = cell.hyperlink.target
-                    print(f"Row {row_num}: Found hyperlink = '{link}'")
-                elif cell.value:
-                    link = str(cell.value).strip()
-                    print(f"Row {row_num}: Found cell value = '{link}'")
-                else:
-                    link = ""
-                    print(f"Row {row_num}: No link found (empty cell)")
-                
-                drive_links.append(link)
 
-            count = 1
-            print(f"Total baris data: {len(df)}")
-            print(f"Total drive links: {len(drive_links)}")
-            
-            for idx, row in df.iterrows():
-                try:
-                    # Debugging informasi baris
-                    print(f"\n=== Memproses Baris {idx+2} ===")
-                    
-                    # Cek apakah idx dalam range drive_links
-                    if idx >= len(drive_links):
-                        print(f"[SKIP] Baris {idx+2}: Index melebihi jumlah drive_links ({len(drive_links)})")
-                        continue
-                    
-                    link = str(drive_links[idx]).strip() if drive_links[idx] else ""
-                    
-                    # Cek kolom 'Nama Data'
-                    nama_data_col = row.get('Nama Data')
-                    if nama_data_col is None:
-                        print(f"[SKIP] Baris {idx+2}: Kolom 'Nama Data' tidak ditemukan")
-                        print(f"Available columns: {list(row.keys())}")
-                        continue
-                    
-                    video_title_raw = str(nama_data_col).strip()
-                    
-                    # Detail debugging
-                    print(f"Link: '{link}'")
-                    print(f"Video title raw: '{video_title_raw}'")
-                    print(f"Link valid: {'drive.google.com' in link}")
-                    print(f"Video title valid: {video_title_raw not in ['', 'nan', 'None']}")
-
-                    # Validasi dan normalisasi link
-                    if not link or link in ['nan', 'None', '']:
-                        print(f"[SKIP] Baris {idx+2}: Link kosong atau invalid. Link: '{link}'")
-                        continue
-                    
-                    # Coba normalisasi link jika tidak lengkap
-                    if 'drive.google.com' not in link:
-                        # Jika hanya file ID, buat URL lengkap
-                        if re.match(r'^[a-zA-Z0-9_-]{25,}$', link.strip()):
-                            link = f"https://drive.google.com/file/d/{link.strip()}/view"
-                            print(f"Link dinormalisasi menjadi: {link}")
-                        else:
-                            print(f"[SKIP] Baris {idx+2}: Bukan link Google Drive atau file ID. Link: '{link}'")
-                            continue
-                        
-                    if not video_title_raw or video_title_raw in ['nan', 'None', '']:
-                        print(f"[SKIP] Baris {idx+2}: Video title kosong atau invalid. Title: '{video_title_raw}'")
-                        continue
-
-                    video_title = f"{video_title_raw}.mp4"
-                    folder_name = "_".join(video_title_raw.split("_")[:-1])
-
-                    # Ambil metadata lain dengan debugging
-                    automated_transcript = str(row.get('Transkripsi Suara secara Otomatis oleh Sistem', '')).strip()
-                    transcript_alignment = str(row.get('Penyelarasan Suara/Teks Transkripsi dan Gerakan Bahasa Isyarat', '')).strip()
-                    sibi_sentence = str(row.get('Kalimat yang Diperagakan', '')).strip()
-                    potential_problem = str(row.get('Potensi Masalah', '')).strip()
-                    comment = str(row.get('Keterangan Annotator', '')).strip()
-                    username = str(row.get('Nama Annotator', '')).strip()
-                    
-                    print("Metadata extracted:")
-                    print(f"- Automated transcript: {len(automated_transcript)} chars")
-                    print(f"- Transcript alignment: {len(transcript_alignment)} chars")
-                    print(f"- SIBI sentence: {len(sibi_sentence)} chars")
-                    print(f"- Potential problem: {len(potential_problem)} chars")
-                    print(f"- Comment: {len(comment)} chars")
-                    print(f"- Username: '{username}'")
-                    
-                    # Parsing kolom Hasil Alignment (NEW) dengan debugging
-                    hasil_alignment_raw = row.get('Hasil Alignment (NEW)')
-                    print(f"Hasil Alignment (NEW) raw value: '{hasil_alignment_raw}' (type: {type(hasil_alignment_raw)})")
-                    
-                    if hasil_alignment_raw is None or hasil_alignment_raw == '':
-                        is_annotated = False
-                        print("is_annotated = False (kolom kosong)")
-                    else:
-                        # Konversi ke string dan normalisasi
-                        hasil_alignment_str = str(hasil_alignment_raw).strip().lower()
-                        print(f"Hasil Alignment (NEW) normalized: '{hasil_alignment_str}'")
-                        
-                        # Cek berbagai format yang mungkin
-                        if hasil_alignment_str in ['1', '1.0', 'true', 'yes', 'ya', 'sudah']:
-                            is_annotated = True
-                            print("is_annotated = True (nilai positif terdeteksi)")
-                        elif hasil_alignment_str in ['0', '0.0', 'false', 'no', 'tidak', 'belum', '']:
-                            is_annotated = False
-                            print("is_annotated = False (nilai negatif terdeteksi)")
-                        else:
-                            # Coba parsing sebagai angka
-                            try:
-                                numeric_value = float(hasil_alignment_str)
-                                is_annotated = numeric_value > 0
-                                print(f"is_annotated = {is_annotated} (parsed as number: {numeric_value})")
-                            except ValueError:
-                                is_annotated = False
-                                print(f"is_annotated = False (tidak bisa parsing: '{hasil_alignment_str}')")
-                    
-                    print(f"Final is_annotated value: {is_annotated}")
-
-                    # Parsing username dengan debugging
-                    print(f"Username raw: '{username}'")
-                    try:
-                        if username and username not in ['', 'nan', 'None']:
-                            user = User.objects.get(username=username)
-                            print(f"User found: {user.username} (ID: {user.id})")
-                        else:
-                            user = None
-                            print("No username provided, user = None")
-                    except User.DoesNotExist:
-                        user = None
-                        print(f"User with username '{username}' not found in database")
-
-                    # Ambil file ID dari link - Support berbagai format Google Drive
-                    file_id = None
-                    
-                    # Pattern 1: /d/FILE_ID/view atau /d/FILE_ID
-                    match = re.search(r'/d/([a-zA-Z0-9_-]+)', link)
-                    if match:
-                        file_id = match.group(1)
-                        print(f"File ID extracted (pattern 1): {file_id}")
-                    else:
-                        # Pattern 2: id=FILE_ID
-                        match = re.search(r'[?&]id=([a-zA-Z0-9_-]+)', link)
-                        if match:
-                            file_id = match.group(1)
-                            print(f"File ID extracted (pattern 2): {file_id}")
-                        else:
-                            # Pattern 3: Link berakhir dengan file ID
-                            match = re.search(r'([a-zA-Z0-9_-]{25,})/?$', link)
-                            if match:
-                                file_id = match.group(1)
-                                print(f"File ID extracted (pattern 3): {file_id}")
-                    
-                    if not file_id:
-                        print(f"[SKIP] Baris {idx+2}: Gagal ekstrak file ID dari link: {link}")
-                        print("Supported formats:")
-                        print("- https://drive.google.com/file/d/FILE_ID/view")
-                        print("- https://drive.google.com/open?id=FILE_ID")
-                        print("- https://drive.google.com/file/d/FILE_ID")
-                        continue
-                    
-                    download_url = f"https://drive.google.com/uc?export=download&id={file_id}"
-                    print(f"Download URL: {download_url}")
-
-                    # Siapkan path untuk file sebelum melakukan pengecekan
-                    videos_dir = os.path.join('videos', folder_name)
-                    raw_dir = os.path.join('raw_videos', folder_name)
-                    final_video_path = os.path.join(videos_dir, video_title)
-                    raw_video_path = os.path.join(raw_dir, video_title)
-                    
-                    # Path absolut untuk pengecekan file di local storage
-                    final_full_path = os.path.join(settings.MEDIA_ROOT, final_video_path)
-                    raw_full_path = os.path.join(settings.MEDIA_ROOT, raw_video_path)
-                    
-                    # Fungsi untuk validasi file video
-                    def is_valid_video_file(file_path):
-                        """Validasi apakah file adalah video yang valid dan tidak corrupt"""
-                        try:
-                            if not os.path.exists(file_path):
-                                return False
-                            
-                            # Cek ukuran file minimal (100KB untuk video)
-                            file_size = os.path.getsize(file_path)
-                            if file_size < 100000:  # 100KB minimum
-                                print(f"File terlalu kecil: {file_size} bytes")
-                                return False
-                            
-                            # Cek ekstensi file
-                            if not file_path.lower().endswith(('.mp4', '.avi', '.mov', '.mkv')):
-                                print(f"Ekstensi file tidak valid: {file_path}")
-                                return False
-                            
-                            print(f"File valid: {file_path} ({file_size} bytes)")
-                            return True
-                        except Exception as e:
-                            print(f"Error validating file {file_path}: {e}")
-                            return False
-                    
-                    # Cek apakah file sudah ada di local storage
-                    file_exists_in_final = is_valid_video_file(final_full_path)
-                    file_exists_in_raw = is_valid_video_file(raw_full_path)
-                    file_exists_locally = file_exists_in_final or file_exists_in_raw
-                    
-                    if file_exists_locally:
-                        existing_path = final_full_path if file_exists_in_final else raw_full_path
-                        file_size = os.path.getsize(existing_path)
-                        print(f"📁 File sudah ada di local storage: {existing_path}")
-                        print(f"File size: {file_size:,} bytes ({file_size/1024/1024:.1f} MB)")
-                        print(f"[SKIP] Baris {idx+2}: File sudah ada dan valid, melewati download")
-                        
-                        # Tetap buat atau update record di database jika diperlukan
-                        existing_videos = Video.objects.filter(title=video_title, folder_name=folder_name)
-                        existing_video = existing_videos.first()
-                        
-                        # Cek jika ada duplikasi dan hapus yang extra
-                        if existing_videos.count() > 1:
-                            print(f"⚠️ WARNING: Ditemukan {existing_videos.count()} video duplikat dengan nama {video_title}")
-                            # Hapus duplikasi, sisakan yang pertama
-                            for duplicate in existing_videos[1:]:
-                                print(f"Menghapus duplikasi video ID: {duplicate.id}")
-                                duplicate.delete()
-                            existing_video = existing_videos.first()
-                        
-                        if not existing_video:
-                            print("File ada di local tapi tidak ada record di database, membuat record baru...")
-                            # Gunakan path file yang sudah ada
-                            relative_path = final_video_path if file_exists_in_final else raw_video_path
-                            video_obj = Video.objects.create(
-                                title=video_title,
-                                folder_name=folder_name,
-                                file=relative_path,
-                                automated_transcript=automated_transcript,
-                                transcript_alignment=transcript_alignment,
-                                sibi_sentence=sibi_sentence,
-                                potential_problem=potential_problem,
-                                comment=comment,
-                                annotated_by=user,
-                                is_annotated=is_annotated
-                            )
-                            print(f"✅ Record database dibuat untuk file yang sudah ada (ID: {video_obj.id})")
-                            count += 1
-                        else:
-                            # Update metadata dari Excel meskipun file sudah ada
-                            print(f"Record database sudah ada (ID: {existing_video.id}), update metadata dari Excel...")
-                            existing_video.automated_transcript = automated_transcript
-                            existing_video.transcript_alignment = transcript_alignment
-                            existing_video.sibi_sentence = sibi_sentence
-                            existing_video.potential_problem = potential_problem
-                            existing_video.comment = comment
-                            if user:
-                                existing_video.annotated_by = user
-                            existing_video.is_annotated = is_annotated
-                            existing_video.save()
-                            print(f"✅ Metadata berhasil diperbarui (ID: {existing_video.id})")
-                            count += 1
-                        continue
-
-                    # Buat folder jika belum ada
-                    os.makedirs(os.path.join(settings.MEDIA_ROOT, videos_dir), exist_ok=True)
-                    os.makedirs(os.path.join(settings.MEDIA_ROOT, raw_dir), exist_ok=True)
-
-                    # Unduh video dengan handling untuk large files
-                    print(f"Attempting to download from: {download_url}")
-                    response = requests.get(download_url, stream=True)
-                    
-                    if response.status_code != 200:
-                        print(f"[SKIP] Baris {idx+2}: Gagal download video (status {response.status_code})")
-                        print(f"Response headers: {dict(response.headers)}")
-                        continue
-                    
-                    # Cek apakah response berisi HTML (Google Drive confirmation page)
-                    content_type = response.headers.get('content-type', '')
-                    if 'text/html' in content_type:
-                        print(f"[SKIP] Baris {idx+2}: Response berisi HTML, mungkin perlu konfirmasi download")
-                        print("Kemungkinan file terlalu besar atau memerlukan konfirmasi manual")
-                        
-                        # Coba ekstrak confirmation URL jika ada
-                        html_content = response.text
-                        confirm_match = re.search(r'action="([^"]*)" method="post"', html_content)
-                        if confirm_match:
-                            confirm_url = confirm_match.group(1).replace('&amp;', '&')
-                            print(f"Found confirmation URL: {confirm_url}")
-                            # Coba download dengan confirmation
-                            confirm_response = requests.get(f"https://drive.google.com{confirm_url}", stream=True)
-                            if confirm_response.status_code == 200 and 'video' in confirm_response.headers.get('content-type', ''):
-                                response = confirm_response
-                            else:
-                                print("[SKIP] Confirmation download juga gagal")
-                                continue
-                        else:
-                            continue
-                    
-                    # Verifikasi content-type untuk memastikan ini file video
-                    if response.status_code == 200:
-                        content_type = response.headers.get('content-type', '')
-                        content_length = response.headers.get('content-length', 'Unknown')
-                        print(f"Content-Type: {content_type}, Content-Length: {content_length}")
-                        
-                        # Baca content untuk file yang berhasil didownload
-                        video_content = response.content
-                        if len(video_content) < 1000:  # File terlalu kecil, kemungkinan bukan video
-                            print(f"[SKIP] Baris {idx+2}: File terlalu kecil ({len(video_content)} bytes), kemungkinan bukan video")
-                            continue
-
-                    # Path sudah disiapkan sebelumnya, langsung simpan
-                    print(f"Saving video to: {final_video_path}")
-                    print(f"Video size: {len(video_content):,} bytes ({len(video_content)/1024/1024:.1f} MB)")
-
-                    final_path = default_storage.save(final_video_path, ContentFile(video_content))
-                    default_storage.save(raw_video_path, ContentFile(video_content))
-
-                    # Simpan ke DB
-                    print("Creating Video record:")
-                    print(f"- Title: {video_title}")
-                    print(f"- Folder: {folder_name}")
-                    print(f"- Annotated by: {user.username if user else 'None'}")
-                    print(f"- Is annotated: {is_annotated}")
-                    
-                    video_obj = Video.objects.create(
-                        title=video_title,
-                        folder_name=folder_name,
-                        file=final_path,
-                        automated_transcript=automated_transcript,
-                        transcript_alignment=transcript_alignment,
-                        sibi_sentence=sibi_sentence,
-                        potential_problem=potential_problem,
-                        comment=comment,
-                        annotated_by=user,
-                        is_annotated=is_annotated
-                    )
-                    
-                    print(f"✅ SUCCESS: Video {video_title} berhasil diproses dan disimpan (ID: {video_obj.id})")
-                    count += 1
+def _ingest_job_response(job):
+    extra = {
+        'progress_url': reverse('main:ingest_status', args=[job.id]),
+        'log_url': reverse('main:ingest_log', args=[job.id]),
+    }
+    if job.params.get('dry_run'):
+        extra['commit_url'] = reverse('main:ingest_commit', args=[job.id])
+    return _job_response(job, extra=extra)
 
-                except Exception as e:
-                    print(f"[ERROR] Baris {idx+2}: {str(e)}")
-                    import traceback
-                    traceback.print_exc()
 
-            print("\n=== SUMMARY ===")
-            print(f"Total baris diproses: {len(df)}")
-            print(f"Video berhasil diupload: {count-1}")
-            return JsonResponse({'message': f'Upload selesai. {count-1} video diproses dari {len(df)} baris.'})
+def _get_ingest_job(request, job_id):
+    """ Job ingest milik user (superuser boleh semua), atau None """
+    jobs = VideoJob.objects.filter(kind=VideoJob.KIND_INGEST)
+    if not request.user.is_superuser:
+        jobs = jobs.filter(created_by=request.user)
+    return jobs.filter(id=job_id).first()
 
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
-            return JsonResponse({'error': str(e)}, status=500)
 
-    return JsonResponse({'error': 'Invalid request'}, status=400)
+@login_required
+def ingest_status(request, job_id):
+    """ Progress job ingest Excel: baris selesai/skip/gagal, byte download, ETA """
+    job = _get_ingest_job(request, job_id)
+    if not job:
+        return JsonResponse({'error': 'Job tidak ditemukan'}, status=404)
+    data = job_to_dict(job)
+    data.update(ingest_progress(job))
+    if job.params.get('dry_run'):
+        data['dry_run'] = True
+        data['commit_url'] = reverse('main:ingest_commit', args=[job.id])
+    return JsonResponse(data)
+
+
+@csrf_exempt
+@login_required
+def ingest_commit(request, job_id):
+    """ Jalankan ingest sungguhan untuk file Excel dari job dry run yang sudah selesai """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Invalid request'}, status=400)
+    job = _get_ingest_job(request, job_id)
+    if not job:
+        return JsonResponse({'error': 'Job tidak ditemukan'}, status=404)
+    if not job.params.get('dry_run') or job.status != VideoJob.STATUS_DONE:
+        return JsonResponse({'error': 'Hanya dry run yang sudah selesai yang bisa disimpan'}, status=400)
+    if not default_storage.exists(job.params['excel_path']):
+        return JsonResponse({'error': 'File Excel dry run sudah tidak ada, upload ulang'}, status=410)
+
+    params = {'excel_path': job.params['excel_path'], 'filename': job.params.get('filename'), 'dry_run_job': str(job.id)}
+    commit_job = enqueue_job(VideoJob.KIND_INGEST, None, params=params, user=request.user)
+    print(f"📄 Ingest Excel {params['filename']} dari dry run {job.id} masuk antrian (job {commit_job.id})")
+    return _ingest_job_response(commit_job)
+
+
+@login_required
+def ingest_log(request, job_id):
+    """ Download hasil per baris job ingest sebagai CSV """
+    job = _get_ingest_job(request, job_id)
+    if not job:
+        return JsonResponse({'error': 'Job tidak ditemukan'}, status=404)
+    filename = os.path.splitext(job.params.get('filename') or 'ingest')[0]
+    response = HttpResponse(content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}_hasil_{job.id.hex[:8]}.csv"'
+    write_result_csv(job, response)
+    return response
 
 @csrf_exempt
 @login_required
@@ -1066,22 +758,20 @@ def debug_video_merge(request, video_title):
         if duplicate_count > 1:
             print(f"⚠️ WARNING: Ditemukan {duplicate_count} video duplikat!")
         
-        # Parse nama file
+        # Nomor urut dari kolom sequence (diisi dari judul saat save)
         name_parts = video_title.replace('.mp4', '').split('_')
-        current_sequence = int(name_parts[-1])
+        current_sequence = video.sequence
         base_title = '_'.join(name_parts[:-1])
-        
+        next_sequence = current_sequence + 1 if current_sequence is not None else None
+
         # Cari video berikutnya
-        next_sequence = current_sequence + 1
-        next_video_title = f"{base_title}_{next_sequence:04d}.mp4"
-        
+        next_video_title, next_video = get_next_video(video)
         print(f"Looking for next video: {next_video_title}")
-        
-        next_video = Video.objects.filter(title=next_video_title).first()
-        
-        # Cek semua video dengan base yang sama
-        similar_videos = Video.objects.filter(title__startswith=base_title).order_by('title')
-        video_list = [v.title for v in similar_videos]
+
+        # Cek semua video di folder yang sama
+        video_list = list(
+            Video.objects.filter(folder_name=video.folder_name).order_by('sequence', 'title').values_list('title', flat=True)
+        )
         
         debug_info = {
             'current_video': {
@@ -1137,12 +827,12 @@ def delete_video(request, video_title):
 @csrf_exempt
 @login_required
 def search_videos(request, folder_name):
-    # Ambil semua video dalam folder, urutkan berdasarkan nama
-    videos = Video.objects.filter(folder_name=folder_name).order_by('title')
-
-    for video in videos:
-        if not video.is_annotated:
-            return redirect('main:video_editor', video_title=video.title)
+    # Video pertama yang belum dianotasi, satu query lewat index (folder_name, is_annotated, sequence)
+    video_title = Video.objects.filter(
+        folder_name=folder_name, is_annotated=False,
+    ).order_by('sequence', 'title').values_list('title', flat=True).first()
+    if video_title:
+        return redirect('main:video_editor', video_title=video_title)
 
     # Jika semua sudah dianotasi, redirect ke folder_page
     messages.info(request, 'Semua video sudah dianotasi.')
@@ -1335,42 +1025,7 @@ def change_password(request):
 @login_required
 def landing_page(request):
     """ Menampilkan halaman landing page dengan folder-folder """
-    all_videos = Video.objects.all()
-    folder_dict = defaultdict(list)
-
-    # Kelompokkan video berdasarkan folder_name
-    for video in all_videos:
-        folder_dict[video.folder_name].append(video)
-
-    # Buat list folder dengan status annotasi
-    folder_info = []
-    for folder_name, videos in folder_dict.items():
-        total = len(videos)
-        annotated = sum(1 for v in videos if v.is_annotated)
-        # Untuk display nama folder
-        parts = folder_name.split('_')
-        lembaga = parts[0]
-        jenis = 'SIBI' if parts[1] == 'SB' else parts[1]
-        tanggal_str = parts[2]  # e.g: 290120
-
-        # Formating tanggal
-        day = tanggal_str[0:2]
-        month = tanggal_str[2:4]
-        year = '20' + tanggal_str[4:6]
-        tanggal_format = f"{day}/{month}/{year}"
-        display_name = f'{lembaga} - {jenis} - {tanggal_format}'
-
-        # display_name = format_folder_display(folder_name)
-        all_done = (annotated == total)
-        folder_info.append({
-            'name': folder_name,
-            'annotated': annotated,
-            'total': total,
-            'all_done': all_done,
-            'display_name': display_name
-        })
-
-    return render(request, 'landing_page.html', {'folders': folder_info})
+    return render(request, 'landing_page.html', {'folders': folder_summaries()})
 
 @csrf_exempt
 @login_required
@@ -1419,60 +1074,11 @@ def upload_file_page(request):
 
 # ENHANCED USER INTERFACE
 
-@csrf_exempt
-@login_required
-def format_folder_display(name):
-    """ Format nama folder untuk tampilan yang lebih user-friendly """
-    try:
-        parts = name.split('_')
-        lembaga = parts[0]
-        jenis = 'SIBI' if parts[1] == 'SB' else parts[1]
-        tanggal_str = parts[2]  # e.g: 290120
-
-        # Formating tanggal
-        day = tanggal_str[0:2]
-        month = tanggal_str[2:4]
-        year = '20' + tanggal_str[4:6]
-        tanggal_format = f"{day}/{month}/{year}"
-
-        return f'{lembaga} - {jenis} - {tanggal_format}'
-    except Exception:
-        return name # Kalo misalnya format namanya ga sesuai
-
 @csrf_exempt
 @login_required
 def landing_page_data(request):
-    """ Menampilkan halaman landing page dengan folder-folder """
-    all_videos = Video.objects.all()
-    folder_dict = defaultdict(list)
-
-    # Kelompokkan video berdasarkan folder_name
-    for video in all_videos:
-        folder_dict[video.folder_name].append(video)
-
-    # Buat list folder dengan status annotasi
-    folder_info = []
-    for folder_name, videos in folder_dict.items():
-        total = len(videos)
-        annotated = sum(1 for v in videos if v.is_annotated)
-        # display_name = format_folder_display(str(folder_name))
-        all_done = (annotated == total)
-        folder_info.append({
-            'name': folder_name,
-            'annotated': annotated,
-            'total': total,
-            'all_done': all_done,
-            # 'display_name': display_name,
-        })
-
-    return JsonResponse({
-        'folders': [
-            {
-                'name': folder['name'],
-                'annotated': folder['annotated'],
-                'total': folder['total'],
-                'all_done': folder['all_done'],
-                # 'display_name': folder['display_name'],
-            } for folder in folder_info
-        ]
-    })
\ No newline at end of file
+    """ Data folder untuk landing page (JSON), sama dengan yang dirender landing_page """
+    folders = folder_summaries()
+    for folder in folders:
+        del folder['display_name']
+    return JsonResponse({'folders': folders})
\ No newline at end of file
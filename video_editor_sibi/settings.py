@@ -145,6 +145,47 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Layani MEDIA_URL dari Django (Range, ETag); set False jika media dilayani web server lain
+SERVE_MEDIA = os.environ.get('SERVE_MEDIA', 'True') == 'True'
+
+# Binary ffmpeg/ffprobe untuk merge video (stream copy)
+FFMPEG_BINARY = os.environ.get('FFMPEG_BINARY', 'ffmpeg')
+FFPROBE_BINARY = os.environ.get('FFPROBE_BINARY', 'ffprobe')
+
+# Worker job merge/trim (python manage.py run_video_worker)
+VIDEO_WORKER_PROCESSES = int(os.environ.get('VIDEO_WORKER_PROCESSES', 2))
+VIDEO_JOB_HEARTBEAT_SECONDS = 10  # Worker memperbarui heartbeat_at job yang berjalan setiap interval ini
+VIDEO_JOB_STALE_SECONDS = 120  # Job running tanpa heartbeat selama ini dianggap worker mati dan diantrikan ulang
+# True: jalankan job langsung di request (development tanpa worker)
+VIDEO_JOBS_INLINE = os.environ.get('VIDEO_JOBS_INLINE', 'False') == 'True'
+# True: editor memutar n lalu n+1 tanpa file merge, merge fisik hanya saat trim
+VIDEO_VIRTUAL_MERGE = os.environ.get('VIDEO_VIRTUAL_MERGE', 'True') == 'True'
+# Jumlah segmen berikutnya yang di-merge lebih dulu saat editor dibuka (0 = nonaktif)
+VIDEO_PREFETCH_COUNT = int(os.environ.get('VIDEO_PREFETCH_COUNT', 2))
+# Batas ukuran cache hasil merge di edited_videos/cache (python manage.py gc_merged_videos)
+MERGED_CACHE_MAX_BYTES = int(os.environ.get('MERGED_CACHE_MAX_MB', 10240)) * 1024 * 1024
+# Batas ukuran arsip ZIP folder di archives/ (python manage.py build_folder_archives)
+FOLDER_ARCHIVE_MAX_BYTES = int(os.environ.get('FOLDER_ARCHIVE_MAX_MB', 20480)) * 1024 * 1024
+# Mode trim: 'smart' (copy GOP utuh, encode ulang GOP tepi saja) atau 'reencode' (encode penuh)
+VIDEO_TRIM_MODE = os.environ.get('VIDEO_TRIM_MODE', 'smart')
+# True: trim hanya dicatat sebagai EDL dan file di-render belakangan (python manage.py render_edits)
+VIDEO_TRIM_EDL = os.environ.get('VIDEO_TRIM_EDL', 'True') == 'True'
+# Tulis bagian n dan remainder n+1 bersamaan di process terpisah saat trim
+VIDEO_TRIM_PARALLEL = os.environ.get('VIDEO_TRIM_PARALLEL', 'True') == 'True'
+# Thread encoder per job trim (0 = jumlah CPU / VIDEO_WORKER_PROCESSES), dibagi ke tiap bagian
+VIDEO_ENCODE_THREADS = int(os.environ.get('VIDEO_ENCODE_THREADS', 0))
+# Proxy resolusi rendah yang diputar editor (python manage.py build_proxies), file asli hanya untuk trim/render
+VIDEO_PROXY_ENABLED = os.environ.get('VIDEO_PROXY_ENABLED', 'True') == 'True'
+VIDEO_PROXY_HEIGHT = int(os.environ.get('VIDEO_PROXY_HEIGHT', 360))  # Tinggi maksimal proxy (piksel)
+VIDEO_PROXY_CRF = int(os.environ.get('VIDEO_PROXY_CRF', 30))  # Kualitas x264 proxy, makin besar makin kecil file
+# Ukuran chunk default upload resumable (/uploads/), client boleh meminta ukuran lain
+UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_MB', 8)) * 1024 * 1024
+
+# Download Google Drive saat upload Excel (upload_file)
+GOOGLE_DRIVE_BASE_URL = os.environ.get('GOOGLE_DRIVE_BASE_URL', 'https://drive.google.com')  # Ganti untuk uji dengan server lokal
+DRIVE_DOWNLOAD_WORKERS = int(os.environ.get('DRIVE_DOWNLOAD_WORKERS', 4))  # Download paralel
+DRIVE_DOWNLOAD_RETRIES = int(os.environ.get('DRIVE_DOWNLOAD_RETRIES', 3))  # Per file, dengan backoff
+INGEST_BATCH_ROWS = int(os.environ.get('INGEST_BATCH_ROWS', 500))  # Baris per transaksi bulk_create/bulk_update
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
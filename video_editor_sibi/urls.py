@@ -24,6 +24,7 @@ urlpatterns = [
 ]
 
 from django.conf import settings
-from django.conf.urls.static import static
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+from main.media import serve_media
+if settings.SERVE_MEDIA:
+    # Media (video editor, hasil merge) dengan dukungan Range/ETag, lihat main/media.py
+    urlpatterns += [path(f"{settings.MEDIA_URL.strip('/')}/<path:path>", serve_media, name='media')]